@@ -1,14 +1,222 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox, ttk, colorchooser
-from PIL import Image, ImageTk, ImageDraw
-import numpy as np
-from sklearn.cluster import KMeans
-import cv2
+from tkinter import filedialog, messagebox, simpledialog, ttk, colorchooser
+from PIL import Image, ImageTk
+import math
+import multiprocessing
+import os
+import queue
+import sys
+import threading
 import warnings
+import weakref
+
+import export
+import frames
+import history
+import image_core
+import palettes
+import result_cache
+import timing
 
 # 콘솔 경고 메시지 숨기기
 warnings.filterwarnings('ignore')
 
+# 색상 변경 범위와 캔버스 안내 문구
+REGION_MODES = ["Whole image", "Rectangle", "Lasso", "Flood fill"]
+REGION_HINTS = {
+    "Whole image": "Click to pick color",
+    "Rectangle": "Drag to select a rectangle, click to pick color",
+    "Lasso": "Drag to draw a selection, click to pick color",
+    "Flood fill": "Click to fill the connected area with New Color",
+}
+# 영역 변경 조각이 이보다 많이 쌓이면 캔버스 전체를 다시 그림
+MAX_CANVAS_PATCHES = 32
+
+
+class BackgroundJobs:
+    """무거운 처리를 작업 스레드에서 실행하고 root.after 폴링으로 결과를 받습니다.
+    
+    한 번에 하나의 작업만 유효하며, 새 작업을 시작하면 진행 중인 작업은
+    취소 표시되고 그 결과는 버려집니다 (뒤에 줄 서지 않음).
+    """
+    
+    def __init__(self, root, poll_ms=50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._messages = queue.Queue()
+        self._next_id = 0
+        self._active = None  # (job_id, cancel_event, on_done, on_error, on_progress)
+        self._polling = False
+        self.last_timing = None  # 마지막으로 끝난 작업의 단계별 시간 기록
+    
+    @property
+    def busy(self):
+        return self._active is not None
+    
+    def submit(self, work, on_done, on_error=None, on_progress=None, name="job"):
+        """work(progress)를 작업 스레드에서 실행합니다.
+        
+        progress(fraction, message)는 취소되면 OperationCancelled를 던지므로
+        work는 단계 사이에서 자연스럽게 중단됩니다. 작업은 name으로 시간이 측정됩니다.
+        """
+        self.cancel()
+        self._next_id += 1
+        job_id = self._next_id
+        cancel_event = threading.Event()
+        self._active = (job_id, cancel_event, on_done, on_error, on_progress)
+        
+        def progress(fraction, message=""):
+            if cancel_event.is_set():
+                raise image_core.OperationCancelled()
+            self._messages.put((job_id, 'progress', (fraction, message)))
+        
+        def run():
+            try:
+                with timing.operation(name) as record:
+                    result = work(progress)
+            except image_core.OperationCancelled:
+                return
+            except Exception as e:
+                self._messages.put((job_id, 'error', e))
+            else:
+                self._messages.put((job_id, 'done', (result, record)))
+        
+        threading.Thread(target=run, daemon=True).start()
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return job_id
+    
+    def cancel(self):
+        """진행 중인 작업을 취소합니다. 이미 끝난 결과가 큐에 있어도 무시됩니다."""
+        if self._active is not None:
+            self._active[1].set()
+            self._active = None
+    
+    def _poll(self):
+        while True:
+            try:
+                job_id, kind, payload = self._messages.get_nowait()
+            except queue.Empty:
+                break
+            # 취소되었거나 새 작업으로 대체된 작업의 메시지는 버림
+            if self._active is None or self._active[0] != job_id:
+                continue
+            _, _, on_done, on_error, on_progress = self._active
+            if kind == 'progress':
+                if on_progress:
+                    on_progress(*payload)
+                continue
+            self._active = None
+            if kind == 'done':
+                result, self.last_timing = payload
+                on_done(result)
+            elif on_error:
+                on_error(payload)
+        
+        if self._active is not None:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+
+class PreviewCache:
+    """이미지별 디스플레이용 축소본을 캐시합니다.
+    
+    이미지마다 절반씩 줄인 피라미드(reduce(2))를 한 번만 만들고, 요청한 크기는
+    그보다 크거나 같은 가장 작은 단계에서 LANCZOS로 줄입니다. 캐시는 이미지
+    객체에 묶여 있어 original_image / processed_image가 다른 객체로 바뀌면
+    (이전 이미지가 해제되면서) 자동으로 비워집니다.
+    """
+    
+    def __init__(self):
+        self._entries = {}  # id(image) -> (weakref, pyramid levels, {(max_w, max_h): (img, ratio)})
+        self._lock = threading.Lock()
+    
+    def get(self, image, max_w, max_h):
+        """(max_w, max_h)에 맞게 축소한 이미지와 축소 비율(<= 1.0)을 반환합니다."""
+        if image.width <= max_w and image.height <= max_h:
+            # 줄일 필요가 없으면 캐시하지 않음 (항목이 이미지 자신을 참조하면 weakref가 해제되지 않음)
+            return image, 1.0
+        with self._lock:
+            key = id(image)
+            entry = self._entries.get(key)
+            if entry is None or entry[0]() is not image:
+                entry = (weakref.ref(image, lambda _, key=key: self._entries.pop(key, None)), [], {})
+                self._entries[key] = entry
+            _, levels, sized = entry
+            
+            if (max_w, max_h) not in sized:
+                sized[(max_w, max_h)] = self._build(image, levels, max_w, max_h)
+            return sized[(max_w, max_h)]
+    
+    def invalidate(self, image):
+        """이미지를 제자리에서 수정했을 때 캐시를 버립니다."""
+        with self._lock:
+            self._entries.pop(id(image), None)
+    
+    def patch(self, old, new, box):
+        """new가 old와 box 안에서만 다를 때, old의 축소본에서 그 부분만 다시 줄여 new의 축소본으로 등록합니다.
+        
+        old의 축소본이 없으면 아무것도 하지 않고 False를 반환합니다.
+        """
+        with self._lock:
+            entry = self._entries.get(id(old))
+            if entry is None or entry[0]() is not old:
+                return False
+            sized = dict(entry[2])
+        
+        patched = {}
+        for size, (display, ratio) in sized.items():
+            if display is old:
+                # 줄이지 않은 크기는 get()이 이미지를 그대로 돌려주므로 저장하지 않음 (자기 참조 방지)
+                continue
+            dbox = self.scale_box(box, old, display)
+            if dbox[0] < dbox[2] and dbox[1] < dbox[3]:
+                # LANCZOS 필터가 읽는 주변 픽셀(축소본 3픽셀 폭)까지만 잘라서 줄임
+                # (RGBA는 resize가 이미지 전체를 premultiplied로 변환하므로 전체에 바로 쓰지 않음)
+                sx, sy = display.width / old.width, display.height / old.height
+                src = (dbox[0] / sx, dbox[1] / sy, dbox[2] / sx, dbox[3] / sy)
+                margin = math.ceil(3 / min(sx, sy)) + 1
+                crop = (max(0, int(src[0]) - margin), max(0, int(src[1]) - margin),
+                        min(new.width, math.ceil(src[2]) + margin), min(new.height, math.ceil(src[3]) + margin))
+                region = new.crop(crop).resize(
+                    (dbox[2] - dbox[0], dbox[3] - dbox[1]), Image.Resampling.LANCZOS,
+                    box=(src[0] - crop[0], src[1] - crop[1], src[2] - crop[0], src[3] - crop[1]))
+                display = display.copy()
+                display.paste(region, dbox[:2])
+            patched[size] = (display, ratio)
+        
+        with self._lock:
+            key = id(new)
+            self._entries[key] = (weakref.ref(new, lambda _, key=key: self._entries.pop(key, None)), [], patched)
+        return True
+    
+    @staticmethod
+    def scale_box(box, image, display):
+        """원본 좌표 box를 덮는 축소본 좌표 상자"""
+        sx, sy = display.width / image.width, display.height / image.height
+        return (int(box[0] * sx), int(box[1] * sy),
+                min(display.width, math.ceil(box[2] * sx)), min(display.height, math.ceil(box[3] * sy)))
+    
+    def _build(self, image, levels, max_w, max_h):
+        ratio = min(max_w / image.width, max_h / image.height)
+        target = (max(1, int(image.width * ratio)), max(1, int(image.height * ratio)))
+        
+        # 목표보다 두 배 이상 큰 동안 피라미드를 한 단계씩 더 만듦
+        source = levels[-1] if levels else image
+        while source.width // 2 >= target[0] and source.height // 2 >= target[1]:
+            source = source.reduce(2)
+            levels.append(source)
+        
+        # 목표 이상인 가장 작은 단계에서 최종 크기로 줄임
+        source = image
+        for level in levels:
+            if level.width >= target[0] and level.height >= target[1]:
+                source = level
+        return source.resize(target, Image.Resampling.LANCZOS), ratio
+
+
 class ImageProcessor:
     def __init__(self, root):
         self.root = root
@@ -19,6 +227,17 @@ class ImageProcessor:
         self.original_image = None
         self.processed_image = None
         self.display_ratio = 1.0
+        # 전체 해상도로 읽는 중인 이미지의 (width, height)와 그동안 미뤄 둔 요청
+        self.loading_size = None
+        self.pending_actions = []
+        # 불러온 파일 경로와 프레임 수 (애니메이션 GIF, 여러 페이지 TIFF 등은 2 이상)
+        self.source_path = None
+        self.source_frames = 1
+        # 색상 변경 범위: 선택 영역(원본 좌표 다각형, 사각형은 네 꼭짓점)과 드래그 중인 캔버스 좌표
+        self.selection = None
+        self._drag_points = []
+        # 영역만 바꾼 뒤 캔버스에 덧그린 조각 (전체를 다시 그리면 비움)
+        self.canvas_patches = []
         
         # iOS 스타일 색상 테마
         self.bg_color = "#F2F2F7"
@@ -27,8 +246,35 @@ class ImageProcessor:
         self.text_color = "#000000"
         self.secondary_text = "#8E8E93"
         
+        # 디스플레이 크기
+        self.preview_size = 350
+        self.canvas_w = 650
+        self.canvas_h = 400
+        
+        # 무거운 처리는 작업 스레드에서 실행
+        self.jobs = BackgroundJobs(self.root)
+        
+        # 디스플레이용 축소본 캐시
+        self.previews = PreviewCache()
+        self._ui_stages = []  # UI 스레드에서 측정한 (단계, 초) - 상태 표시줄용
+        
+        # 같은 이미지/설정으로 돌아오면 다시 계산하지 않도록 결과 캐시
+        self.result_cache = result_cache.ResultCache.from_env()
+        # 실행 취소/다시 실행 (단계별 변경분만 저장)
+        self.history = history.History.from_env()
+        
+        # 실시간 미리보기: 전체 해상도 작업과 별도로 실행되며 입력이 멈추면 시작
+        self.preview_jobs = BackgroundJobs(self.root)
+        self.preview_delay_ms = 300
+        self._preview_after_id = None
+        # 작업 종류별 직전 양자화 설정 (색상 수만 바꿨을 때 K-means 이어서 학습)
+        self._last_quantize = {}
+        
         self.configure_style()
         self.setup_ui()
+        
+        # 창이 뜬 뒤 유휴 시간에 scikit-learn을 미리 가져와서 첫 K-means 처리가 기다리지 않게 함
+        self.root.after_idle(lambda: threading.Thread(target=image_core.warm_up, daemon=True).start())
     
     def configure_style(self):
         """iOS 스타일 테마 설정"""
@@ -90,6 +336,41 @@ class ImageProcessor:
                             padx=20, pady=8, cursor='hand2')
         save_btn.pack(side=tk.LEFT)
         
+        # PNG/GIF 인코딩 속도/크기 프리셋
+        self.save_preset = tk.StringVar(value=export.DEFAULT_PRESET)
+        ttk.Combobox(control_inner, textvariable=self.save_preset,
+                    values=list(export.PRESETS),
+                    state="readonly", width=9, font=('SF Pro Display', 9)).pack(side=tk.LEFT, padx=(6, 0))
+        
+        # 여러 프레임 원본의 모든 프레임 처리/저장 (프레임이 2개 이상일 때만 활성화)
+        self.export_frames_btn = tk.Button(control_inner, text="Export Frames...",
+                                           command=self.export_frames,
+                                           bg='#E5E5EA', fg=self.text_color,
+                                           font=('SF Pro Display', 10),
+                                           relief='flat', bd=0, state=tk.DISABLED,
+                                           padx=14, pady=8, cursor='hand2')
+        self.export_frames_btn.pack(side=tk.LEFT, padx=(8, 0))
+        
+        self.undo_btn = tk.Button(control_inner, text="Undo",
+                                  command=self.undo,
+                                  bg='#E5E5EA', fg=self.text_color,
+                                  font=('SF Pro Display', 10),
+                                  relief='flat', bd=0, state=tk.DISABLED,
+                                  padx=14, pady=8, cursor='hand2')
+        self.undo_btn.pack(side=tk.LEFT, padx=(16, 4))
+        
+        self.redo_btn = tk.Button(control_inner, text="Redo",
+                                  command=self.redo,
+                                  bg='#E5E5EA', fg=self.text_color,
+                                  font=('SF Pro Display', 10),
+                                  relief='flat', bd=0, state=tk.DISABLED,
+                                  padx=14, pady=8, cursor='hand2')
+        self.redo_btn.pack(side=tk.LEFT)
+        
+        self.root.bind('<Control-z>', lambda event: self.undo())
+        self.root.bind('<Control-y>', lambda event: self.redo())
+        self.root.bind('<Control-Z>', lambda event: self.redo())
+        
         # 탭 생성
         self.notebook = ttk.Notebook(main_frame)
         self.notebook.pack(fill=tk.BOTH, expand=True)
@@ -103,6 +384,25 @@ class ImageProcessor:
         self.color_change_tab = tk.Frame(self.notebook, bg=self.bg_color)
         self.notebook.add(self.color_change_tab, text="Color Change")
         self.setup_color_change_tab()
+        
+        # 상태 표시줄 (진행률 + 취소)
+        status_frame = tk.Frame(main_frame, bg=self.bg_color)
+        status_frame.pack(fill=tk.X, pady=(8, 0))
+        
+        self.status_label = tk.Label(status_frame, text="Ready", bg=self.bg_color,
+                                     fg=self.secondary_text, font=('SF Pro Display', 9))
+        self.status_label.pack(side=tk.LEFT)
+        
+        self.cancel_btn = tk.Button(status_frame, text="Cancel",
+                                    command=self.cancel_job,
+                                    bg='#E5E5EA', fg=self.text_color,
+                                    font=('SF Pro Display', 9),
+                                    relief='flat', bd=0, state=tk.DISABLED,
+                                    padx=12, pady=2, cursor='hand2')
+        self.cancel_btn.pack(side=tk.RIGHT)
+        
+        self.progress = ttk.Progressbar(status_frame, length=200, maximum=1.0, mode='determinate')
+        self.progress.pack(side=tk.RIGHT, padx=(0, 8))
     
     def setup_antialiasing_tab(self):
         """안티앨리어싱 제거 탭 설정"""
@@ -131,8 +431,8 @@ class ImageProcessor:
         
         self.method = tk.StringVar(value="kmeans")
         method_menu = ttk.Combobox(control_inner, textvariable=self.method,
-                                  values=["kmeans", "quantize", "threshold"],
-                                  state="readonly", width=10, font=('SF Pro Display', 10))
+                                  values=list(image_core.METHODS),
+                                  state="readonly", width=12, font=('SF Pro Display', 10))
         method_menu.grid(row=0, column=3, padx=(0, 15))
         
         # 처리 버튼
@@ -144,6 +444,39 @@ class ImageProcessor:
                                padx=20, pady=6, cursor='hand2')
         process_btn.grid(row=0, column=4)
         
+        # 실시간 미리보기 (축소본으로 빠르게 결과 확인)
+        self.live_preview = tk.BooleanVar(value=True)
+        tk.Checkbutton(control_inner, text="Live preview", variable=self.live_preview,
+                      command=self.schedule_preview,
+                      bg=self.card_color, fg=self.text_color, activebackground=self.card_color,
+                      font=('SF Pro Display', 10), cursor='hand2').grid(row=0, column=5, padx=(15, 0))
+        
+        # 고정 팔레트 ("palette" 방법): 파일 또는 hex 목록, 거리는 RGB 또는 CIELAB
+        self.fixed_palette = None
+        palette_row = tk.Frame(control_inner, bg=self.card_color)
+        palette_row.grid(row=1, column=0, columnspan=6, pady=(8, 0), sticky='w')
+        
+        for text, command in (("Palette File...", self.load_fixed_palette),
+                              ("Hex Colors...", self.enter_fixed_palette)):
+            tk.Button(palette_row, text=text, bg='#E5E5EA',
+                     fg=self.text_color, font=('SF Pro Display', 9),
+                     relief='flat', bd=0, padx=8, pady=2,
+                     cursor='hand2', command=command).pack(side=tk.LEFT, padx=(0, 6))
+        
+        self.palette_label = tk.Label(palette_row, text="No fixed palette", bg=self.card_color,
+                                      fg=self.secondary_text, font=('SF Pro Display', 9))
+        self.palette_label.pack(side=tk.LEFT, padx=(4, 12))
+        
+        self.palette_lab = tk.BooleanVar(value=False)
+        tk.Checkbutton(palette_row, text="Perceptual (CIELAB)", variable=self.palette_lab,
+                      bg=self.card_color, fg=self.text_color, activebackground=self.card_color,
+                      font=('SF Pro Display', 9), cursor='hand2').pack(side=tk.LEFT)
+        
+        # 설정이 바뀌면 미리보기 갱신
+        self.color_count.trace_add('write', lambda *args: self.schedule_preview())
+        self.method.trace_add('write', lambda *args: self.schedule_preview())
+        self.palette_lab.trace_add('write', lambda *args: self.schedule_preview())
+        
         # 이미지 디스플레이 영역
         image_container = tk.Frame(self.antialiasing_tab, bg=self.bg_color)
         image_container.pack(fill=tk.BOTH, expand=True, padx=10, pady=8)
@@ -164,8 +497,9 @@ class ImageProcessor:
         processed_card = tk.Frame(image_container, bg=self.card_color, relief='flat')
         processed_card.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(5, 0))
         
-        tk.Label(processed_card, text="Processed", bg=self.card_color,
-                fg=self.secondary_text, font=('SF Pro Display', 9)).pack(pady=(8, 5))
+        self.aa_processed_title = tk.Label(processed_card, text="Processed", bg=self.card_color,
+                                          fg=self.secondary_text, font=('SF Pro Display', 9))
+        self.aa_processed_title.pack(pady=(8, 5))
         
         self.aa_processed_label = tk.Label(processed_card, text="Processed result will appear here",
                                           bg=self.card_color, fg=self.secondary_text,
@@ -186,17 +520,33 @@ class ImageProcessor:
         canvas_inner.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
         
         # 캔버스
-        self.canvas = tk.Canvas(canvas_inner, width=650, height=400, 
+        self.canvas = tk.Canvas(canvas_inner, width=self.canvas_w, height=self.canvas_h, 
                                bg="#FAFAFA", highlightthickness=0)
         self.canvas.pack()
         self.canvas.bind("<Button-1>", self.on_canvas_click)
+        self.canvas.bind("<B1-Motion>", self.on_canvas_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_canvas_release)
+        
+        # 색상 변경 범위: 전체, 사각형/올가미 선택 영역, 클릭한 곳과 이어진 영역
+        region_frame = tk.Frame(canvas_inner, bg=self.card_color)
+        region_frame.pack(pady=(5, 0))
+        
+        tk.Label(region_frame, text="Region", bg=self.card_color,
+                fg=self.text_color, font=('SF Pro Display', 9)).pack(side=tk.LEFT, padx=(0, 4))
+        
+        self.region_mode = tk.StringVar(value=REGION_MODES[0])
+        region_combo = ttk.Combobox(region_frame, textvariable=self.region_mode,
+                                    values=REGION_MODES, state="readonly", width=12,
+                                    font=('SF Pro Display', 9))
+        region_combo.pack(side=tk.LEFT)
+        region_combo.bind("<<ComboboxSelected>>", lambda e: self.clear_selection())
         
         # 안내 라벨
-        info_label = tk.Label(canvas_inner, 
-                             text="Click to pick color",
-                             bg=self.card_color, fg=self.secondary_text,
-                             font=('SF Pro Display', 8))
-        info_label.pack(pady=(5, 0))
+        self.canvas_hint = tk.Label(region_frame,
+                                    text=REGION_HINTS[REGION_MODES[0]],
+                                    bg=self.card_color, fg=self.secondary_text,
+                                    font=('SF Pro Display', 8))
+        self.canvas_hint.pack(side=tk.LEFT, padx=(8, 0))
         
         # 오른쪽: 색상 설정 카드
         color_card = tk.Frame(main_container, bg=self.card_color, relief='flat')
@@ -246,6 +596,25 @@ class ImageProcessor:
                  relief='flat', bd=0, width=6, height=1,
                  cursor='hand2', command=self.open_color_palette).pack(side=tk.LEFT, padx=3)
         
+        # 허용 오차 (안티앨리어싱된 근사 색상도 함께 교체)
+        tolerance_frame = tk.Frame(color_inner, bg=self.card_color)
+        tolerance_frame.grid(row=12, column=0, columnspan=2, pady=(10, 0))
+        
+        tk.Label(tolerance_frame, text="Tolerance", bg=self.card_color,
+                fg=self.text_color, font=('SF Pro Display', 9)).pack(side=tk.LEFT, padx=(0, 4))
+        
+        self.tolerance = tk.StringVar(value="0")
+        tk.Spinbox(tolerance_frame, from_=0, to=255, width=4,
+                  textvariable=self.tolerance,
+                  font=('SF Pro Display', 9),
+                  relief='flat', bd=1,
+                  highlightthickness=1, highlightbackground='#E5E5EA').pack(side=tk.LEFT, padx=(0, 4))
+        
+        self.tolerance_metric = tk.StringVar(value="channel")
+        ttk.Combobox(tolerance_frame, textvariable=self.tolerance_metric,
+                    values=["channel", "euclidean"],
+                    state="readonly", width=9, font=('SF Pro Display', 9)).pack(side=tk.LEFT)
+        
         # 적용 버튼
         apply_btn = tk.Button(color_inner, text="Apply", 
                              command=self.change_color,
@@ -253,7 +622,36 @@ class ImageProcessor:
                              font=('SF Pro Display', 10, 'bold'),
                              relief='flat', bd=0,
                              padx=30, pady=8, cursor='hand2')
-        apply_btn.grid(row=12, column=0, columnspan=2, pady=(15, 0))
+        apply_btn.grid(row=13, column=0, columnspan=2, pady=(15, 0))
+        
+        # 교체 표: 여러 규칙을 모아 한 번에 적용
+        tk.Frame(color_inner, height=1, bg='#E5E5EA').grid(row=14, column=0, columnspan=2, sticky='ew', pady=10)
+        tk.Label(color_inner, text="Remap Table", bg=self.card_color,
+                fg=self.text_color, font=('SF Pro Display', 10, 'bold')).grid(row=15, column=0, columnspan=2, pady=(0, 6))
+        
+        self.remap_rules = []
+        self.remap_list = tk.Listbox(color_inner, height=5, width=30,
+                                     font=('SF Mono', 8), relief='flat', bd=1,
+                                     highlightthickness=1, highlightbackground='#E5E5EA',
+                                     selectmode=tk.EXTENDED)
+        self.remap_list.grid(row=16, column=0, columnspan=2)
+        
+        remap_btns = tk.Frame(color_inner, bg=self.card_color)
+        remap_btns.grid(row=17, column=0, columnspan=2, pady=(6, 0))
+        for text, command in (("Add", self.add_remap_rule), ("Remove", self.remove_remap_rules),
+                              ("Load...", self.load_remap_table), ("Save...", self.save_remap_table)):
+            tk.Button(remap_btns, text=text, bg='#E5E5EA',
+                     fg=self.text_color, font=('SF Pro Display', 8),
+                     relief='flat', bd=0, padx=6, pady=2,
+                     cursor='hand2', command=command).pack(side=tk.LEFT, padx=2)
+        
+        apply_all_btn = tk.Button(color_inner, text="Apply All",
+                                 command=self.apply_remap_table,
+                                 bg=self.accent_color, fg='white',
+                                 font=('SF Pro Display', 10, 'bold'),
+                                 relief='flat', bd=0,
+                                 padx=20, pady=6, cursor='hand2')
+        apply_all_btn.grid(row=18, column=0, columnspan=2, pady=(10, 0))
     
     def create_color_inputs(self, parent, prefix, start_row):
         """RGBA 입력 필드 생성"""
@@ -313,44 +711,153 @@ class ImageProcessor:
             ]
         )
         
-        if file_path:
-            try:
-                # 원본 이미지와 처리된 이미지 모두 초기화
-                self.original_image = Image.open(file_path).convert('RGBA')
-                self.processed_image = None
-                
-                # 모든 디스플레이 업데이트
-                self.update_displays()
-                
-                # 처리된 이미지 라벨 초기화
-                self.aa_processed_label.config(image='', text="Processed result will appear here",
-                                              fg=self.secondary_text)
-                
-                messagebox.showinfo("Success", "Image loaded successfully!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to load image: {str(e)}")
+        if not file_path:
+            return
+        # 이전 이미지에 대한 작업은 더 이상 의미가 없음
+        if self.jobs.busy:
+            self.cancel_job()
+        self.cancel_preview()
+        
+        # 1단계: 축소 디코딩(JPEG draft, 피라미드 TIFF)으로 바로 화면에 표시
+        try:
+            with timing.operation("load:draft") as record:
+                with timing.span("decode"):
+                    draft, full_size = image_core.open_draft(file_path, (self.canvas_w, self.canvas_h))
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load image: {str(e)}")
+            return
+        
+        # 원본 이미지와 처리된 이미지 모두 초기화 (전체 이미지가 준비될 때까지 None)
+        self.original_image = None
+        self.processed_image = None
+        # 이전 이미지의 기록도 함께 버림 (읽기를 취소하거나 실패하면 되돌릴 이미지가 없음)
+        self.history.reset(None)
+        self.loading_size = full_size
+        self.pending_actions = []
+        self.source_path = file_path
+        self.source_frames = 1
+        self.selection = None
+        self.export_frames_btn.config(state=tk.DISABLED)
+        self.update_history_buttons()
+        self.show_draft(draft, full_size)
+        self.show_status("Loading full image...", record)
+        
+        # 2단계: 전체 해상도 디코딩과 RGBA 변환은 작업 스레드에서
+        def work(progress):
+            progress(0.1, "Decoding full image")
+            with timing.span("decode"):
+                image = Image.open(file_path)
+                image.load()
+                frame_count = frames.frame_count(image)
+            progress(0.6, "Converting")
+            with timing.span("convert"):
+                image = image.convert('RGBA')
+            self.prepare_previews(image)
+            return image, frame_count
+        
+        def on_done(payload):
+            self.original_image, self.source_frames = payload
+            self.loading_size = None
+            if self.source_frames > 1:
+                self.export_frames_btn.config(state=tk.NORMAL)
+            self.history.reset(self.original_image)
+            self.update_history_buttons()
+            
+            # 모든 디스플레이 업데이트
+            self.update_displays()
+            
+            # 처리된 이미지 라벨 초기화
+            self.aa_processed_label.config(image='', text="Processed result will appear here",
+                                          fg=self.secondary_text)
+            self.aa_processed_title.config(text="Processed")
+            if self.source_frames > 1:
+                self.finish_job(f"Image loaded (showing frame 1 of {self.source_frames}; "
+                                "use Export Frames... for all frames).", self.jobs.last_timing)
+            else:
+                self.finish_job("Image loaded.", self.jobs.last_timing)
+            
+            # 읽는 동안 누른 스포이드/처리 요청은 전체 이미지에 적용
+            actions, self.pending_actions = self.pending_actions, []
+            for action in actions:
+                action()
+            if not self.jobs.busy:
+                self.schedule_preview()
+        
+        def on_error(e):
+            self.loading_size = None
+            self.pending_actions = []
+            self.finish_job("Load failed")
+            self.clear_displays()
+            messagebox.showerror("Error", f"Failed to load image: {str(e)}")
+        
+        self.start_job(work, on_done, on_error, name="load")
+    
+    def show_draft(self, draft, full_size):
+        """전체 이미지를 읽는 동안 축소 디코딩한 이미지를 표시합니다 (없으면 안내 문구)."""
+        self.aa_processed_label.config(image='', text="Processed result will appear here",
+                                      fg=self.secondary_text)
+        self.aa_processed_title.config(text="Processed")
+        self.canvas.delete("all")
+        if draft is None:
+            self.aa_original_label.config(image='', text="Loading...", fg=self.secondary_text)
+            self.aa_original_label.image = None
+            self.canvas.img = None
+            return
+        
+        photo = self.make_photo(self.resize_for_display(draft))
+        self.aa_original_label.config(image=photo, text="", bg=self.card_color)
+        self.aa_original_label.image = photo
+        
+        display_img, ratio = self.previews.get(draft, self.canvas_w, self.canvas_h)
+        # 스포이드 좌표는 전체 해상도 기준으로 변환
+        self.display_ratio = ratio * draft.width / full_size[0]
+        img_tk = self.make_photo(display_img)
+        self.canvas.create_image(0, 0, anchor=tk.NW, image=img_tk)
+        self.canvas.img = img_tk
+    
+    def clear_displays(self):
+        self.aa_original_label.config(image='', text="Load an image to start", fg=self.secondary_text)
+        self.aa_original_label.image = None
+        self.canvas.delete("all")
+        self.canvas.img = None
+    
+    def defer_until_loaded(self, action):
+        """전체 이미지를 읽는 중이면 action을 기억했다가 다 읽은 뒤 실행하고 True를 반환합니다."""
+        if self.loading_size is None:
+            return False
+        self.pending_actions.append(action)
+        self.status_label.config(text="Waiting for the full image to load...")
+        return True
     
     def update_displays(self):
         """모든 디스플레이를 업데이트합니다."""
         if self.original_image:
             # 안티앨리어싱 탭 - 원본 이미지 업데이트
-            display_img = self.resize_for_display(self.original_image, 350)
-            photo = ImageTk.PhotoImage(display_img)
+            display_img = self.resize_for_display(self.original_image)
+            photo = self.make_photo(display_img)
             self.aa_original_label.config(image=photo, text="", bg=self.card_color)
             self.aa_original_label.image = photo
             
             # 색상 변경 탭 - 캔버스 업데이트
             self.update_canvas()
     
-    def resize_for_display(self, image, max_size=350):
-        """이미지를 디스플레이용으로 크기 조정합니다."""
-        width, height = image.size
-        if width > max_size or height > max_size:
-            ratio = min(max_size/width, max_size/height)
-            new_width = int(width * ratio)
-            new_height = int(height * ratio)
-            return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        return image
+    def make_photo(self, image):
+        """Tk 표시용 PhotoImage를 만듭니다 (생성 시간을 상태 표시줄 요약에 포함)."""
+        photo_span = timing.span("photoimage")
+        with photo_span:
+            photo = ImageTk.PhotoImage(image)
+        self._ui_stages.append(("photoimage", photo_span.seconds))
+        return photo
+    
+    def resize_for_display(self, image, max_size=None):
+        """이미지를 디스플레이용으로 크기 조정합니다 (캐시 사용)."""
+        max_size = max_size or self.preview_size
+        return self.previews.get(image, max_size, max_size)[0]
+    
+    def prepare_previews(self, image):
+        """작업 스레드에서 미리 축소본을 만들어 두어 UI 스레드의 대기 시간을 줄입니다."""
+        self.previews.get(image, self.preview_size, self.preview_size)
+        self.previews.get(image, self.canvas_w, self.canvas_h)
     
     def update_canvas(self):
         """캔버스에 이미지를 표시합니다."""
@@ -361,36 +868,111 @@ class ImageProcessor:
         else:
             return
         
-        canvas_w = 650
-        canvas_h = 400
-        img_w, img_h = img.size
-        
-        # 캔버스에 맞게 축소 비율 계산
-        self.display_ratio = min(canvas_w / img_w, canvas_h / img_h)
-        
-        if self.display_ratio < 1.0:
-            new_w = int(img_w * self.display_ratio)
-            new_h = int(img_h * self.display_ratio)
-            display_img = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-        else:
-            self.display_ratio = 1.0
-            display_img = img.copy()
+        # 캔버스에 맞게 축소 (축소 비율은 스포이드 좌표 변환에 사용)
+        display_img, self.display_ratio = self.previews.get(img, self.canvas_w, self.canvas_h)
         
-        img_tk = ImageTk.PhotoImage(display_img)
+        img_tk = self.make_photo(display_img)
         self.canvas.delete("all")
         self.canvas.create_image(0, 0, anchor=tk.NW, image=img_tk)
         self.canvas.img = img_tk
+        self.canvas_patches = []
+        self.draw_selection()
+    
+    def redraw_canvas_box(self, box):
+        """원본 좌표 box 부분만 캔버스에 다시 그립니다 (축소본 캐시는 patch()로 갱신되어 있어야 함)."""
+        if len(self.canvas_patches) >= MAX_CANVAS_PATCHES:
+            self.update_canvas()
+            return
+        img = self.processed_image or self.original_image
+        display_img, self.display_ratio = self.previews.get(img, self.canvas_w, self.canvas_h)
+        dbox = PreviewCache.scale_box(box, img, display_img)
+        if dbox[0] >= dbox[2] or dbox[1] >= dbox[3]:
+            return
+        photo = self.make_photo(display_img.crop(dbox))
+        self.canvas.create_image(dbox[0], dbox[1], anchor=tk.NW, image=photo)
+        self.canvas_patches.append(photo)
+        self.canvas.tag_raise("selection")
+    
+    def canvas_to_image(self, event):
+        """화면 좌표를 원본 이미지 좌표로 변환합니다."""
+        return int(event.x / self.display_ratio), int(event.y / self.display_ratio)
     
     def on_canvas_click(self, event):
-        """캔버스 클릭 시 스포이드 기능"""
+        """캔버스 클릭: 스포이드, 이어진 영역 채우기 또는 선택 영역 드래그 시작"""
+        mode = self.region_mode.get()
+        if mode in ("Rectangle", "Lasso"):
+            # 놓을 때까지 거의 움직이지 않았으면 스포이드로 처리
+            self._drag_points = [(event.x, event.y)]
+            return
+        orig_x, orig_y = self.canvas_to_image(event)
+        if mode == "Flood fill":
+            action = lambda: self.flood_fill(orig_x, orig_y)
+        else:
+            action = lambda: self.pick_color(orig_x, orig_y)
+        if self.defer_until_loaded(action):
+            return
+        action()
+    
+    def on_canvas_drag(self, event):
+        """사각형/올가미 선택 영역을 그리는 중"""
+        if not self._drag_points:
+            return
+        if self.region_mode.get() == "Rectangle":
+            self._drag_points[1:] = [(event.x, event.y)]
+            (x0, y0), (x1, y1) = self._drag_points
+            points = [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+        else:
+            self._drag_points.append((event.x, event.y))
+            points = self._drag_points
+        self.canvas.delete("selection")
+        if len(points) > 1:
+            self.canvas.create_line(*[v for point in points + points[:1] for v in point],
+                                    fill=self.accent_color, dash=(4, 2), tags="selection")
+    
+    def on_canvas_release(self, event):
+        """선택 영역 확정 (거의 움직이지 않았으면 스포이드)"""
+        points, self._drag_points = self._drag_points, []
+        if not points:
+            return
+        x0, y0 = points[0]
+        if max(abs(x - x0) + abs(y - y0) for x, y in points + [(event.x, event.y)]) < 3:
+            self.draw_selection()
+            orig_x, orig_y = self.canvas_to_image(event)
+            if not self.defer_until_loaded(lambda: self.pick_color(orig_x, orig_y)):
+                self.pick_color(orig_x, orig_y)
+            return
+        if self.region_mode.get() == "Rectangle":
+            x1, y1 = event.x, event.y
+            points = [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+        elif len(points) < 3:
+            return
+        # 선택 영역은 원본 좌표로 보관 (표시 크기가 바뀌어도 그대로 사용)
+        ratio = self.display_ratio
+        self.selection = [(x / ratio, y / ratio) for x, y in points]
+        self.draw_selection()
+    
+    def draw_selection(self):
+        """선택 영역 윤곽선을 캔버스 좌표로 그립니다."""
+        self.canvas.delete("selection")
+        if not self.selection:
+            return
+        ratio = self.display_ratio
+        coords = [v * ratio for point in self.selection + self.selection[:1] for v in point]
+        self.canvas.create_line(*coords, fill=self.accent_color, dash=(4, 2), width=2, tags="selection")
+    
+    def clear_selection(self):
+        """범위를 바꾸면 이전 선택 영역은 버립니다."""
+        self.selection = None
+        self._drag_points = []
+        self.canvas.delete("selection")
+        self.canvas_hint.config(text=REGION_HINTS[self.region_mode.get()])
+    
+    def pick_color(self, orig_x, orig_y):
+        """원본 좌표의 픽셀 색을 목표 색상 입력창에 채웁니다."""
         img = self.processed_image if self.processed_image else self.original_image
         if img is None:
             return
         
-        # 화면 좌표를 원본 이미지 좌표로 변환
-        orig_x = int(event.x / self.display_ratio)
-        orig_y = int(event.y / self.display_ratio)
-        
         if 0 <= orig_x < img.width and 0 <= orig_y < img.height:
             pixel = img.getpixel((orig_x, orig_y))
             
@@ -407,79 +989,153 @@ class ImageProcessor:
             self.target_a.delete(0, tk.END)
             self.target_a.insert(0, str(pixel[3]))
     
+    def load_fixed_palette(self):
+        """고정 팔레트 파일(.gpl/.act/.json/.hex/.txt)을 불러옵니다."""
+        file_path = filedialog.askopenfilename(
+            title="Load Palette",
+            filetypes=[("Palettes", "*.gpl *.act *.json *.hex *.txt"), ("All Files", "*.*")]
+        )
+        if file_path:
+            self.set_fixed_palette(file_path, os.path.basename(file_path))
+    
+    def enter_fixed_palette(self):
+        text = simpledialog.askstring("Fixed Palette", "Hex colors (e.g. #ff0000, #00ff00, #0000ff):",
+                                      parent=self.root)
+        if text:
+            self.set_fixed_palette(text, "custom")
+    
+    def set_fixed_palette(self, spec, name):
+        try:
+            self.fixed_palette = palettes.load_palette(spec)
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Error", f"Failed to load palette: {str(e)}")
+            return
+        self.palette_label.config(text=f"{name} ({len(self.fixed_palette)} colors)", fg=self.text_color)
+        self.method.set("palette")
+        self.schedule_preview()
+    
+    def method_options(self, method):
+        """처리 방법별 추가 옵션 (고정 팔레트 방법의 팔레트와 색 공간)"""
+        if method != "palette":
+            return {}
+        # 룩업 테이블은 결과 캐시와 같은 폴더에 저장해 재시작 후에도 재사용
+        return {'palette': tuple(self.fixed_palette), 'space': "lab" if self.palette_lab.get() else "rgb",
+                'lut_dir': self.result_cache.disk_dir}
+    
     def process_antialiasing(self):
         """안티앨리어싱 제거 처리"""
+        if self.defer_until_loaded(self.process_antialiasing):
+            return
         if not self.original_image:
             messagebox.showwarning("Warning", "Please load an image first.")
             return
         
         try:
             color_count = int(self.color_count.get())
-            method = self.method.get()
-            
-            # RGB로 변환하여 처리
-            img_array = np.array(self.original_image.convert('RGB'))
-            
-            if method == "kmeans":
-                processed_array = self.process_with_kmeans(img_array, color_count)
-            elif method == "quantize":
-                processed_array = self.process_with_quantize(img_array, color_count)
-            elif method == "threshold":
-                processed_array = self.process_with_threshold(img_array, color_count)
-            
-            # 알파 채널 보존
-            if self.original_image.mode == 'RGBA':
-                alpha = np.array(self.original_image)[:, :, 3]
-                processed_rgba = np.dstack((processed_array, alpha))
-                self.processed_image = Image.fromarray(processed_rgba.astype(np.uint8), 'RGBA')
-            else:
-                self.processed_image = Image.fromarray(processed_array.astype(np.uint8), 'RGB')
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid color count.")
+            return
+        method = self.method.get()
+        if method == "palette" and not self.fixed_palette:
+            messagebox.showwarning("Warning", "Load a fixed palette first.")
+            return
+        options = self.method_options(method)
+        source = self.original_image
+        warm_start = self.only_color_count_changed("process", source, method, options, color_count)
+        
+        def work(progress):
+            # 실행 취소 기록에는 결과 이미지 대신 라벨 배열 + 팔레트를 저장
+            step = history.QuantizeStep.compute(source, method, color_count, progress=progress,
+                                                cache=self.result_cache, warm_start=warm_start, **options)
+            result = step.image(source)
+            self.prepare_previews(result)
+            return result, step
+        
+        def on_done(payload):
+            result, step = payload
+            self.processed_image = result
+            self.history.push(step)
+            self.update_history_buttons()
             
             # 처리된 이미지 표시
-            display_img = self.resize_for_display(self.processed_image, 350)
-            photo = ImageTk.PhotoImage(display_img)
+            display_img = self.resize_for_display(self.processed_image)
+            photo = self.make_photo(display_img)
             self.aa_processed_label.config(image=photo, text="", bg=self.card_color)
             self.aa_processed_label.image = photo
+            self.aa_processed_title.config(text="Processed")
             
             # 색상 변경 탭의 캔버스도 업데이트
             self.update_canvas()
             
-            messagebox.showinfo("Success", "Image processing completed!")
-            
-        except Exception as e:
+            self.finish_job("Image processing completed!", self.jobs.last_timing)
+        
+        def on_error(e):
+            self.finish_job("Processing failed")
             messagebox.showerror("Error", f"Error during image processing: {str(e)}")
+        
+        # 전체 해상도 결과가 곧 나오므로 대기 중인 미리보기는 취소
+        self.cancel_preview()
+        self.start_job(work, on_done, on_error, name=f"process:{method}")
     
-    def process_with_kmeans(self, img_array, color_count):
-        """K-means 클러스터링을 사용한 색상 양자화"""
-        pixels = img_array.reshape(-1, 3)
-        kmeans = KMeans(n_clusters=color_count, random_state=42, n_init=10)
-        kmeans.fit(pixels)
-        new_pixels = kmeans.cluster_centers_[kmeans.labels_]
-        return new_pixels.reshape(img_array.shape)
-    
-    def process_with_quantize(self, img_array, color_count):
-        """PIL의 quantize를 사용한 색상 양자화"""
-        pil_image = Image.fromarray(img_array)
-        quantized = pil_image.quantize(colors=color_count)
-        return np.array(quantized.convert('RGB'))
-    
-    def process_with_threshold(self, img_array, color_count):
-        """단순 임계값을 사용한 색상 양자화"""
-        step = 256 // color_count
-        processed = img_array.copy().astype(float)
-        processed = (processed // step) * step
-        processed = np.clip(processed, 0, 255)
-        return processed
+    def only_color_count_changed(self, kind, source, method, options, color_count):
+        """kind("process"/"preview")의 직전 처리와 이미지, 방법, 옵션이 같고 색상 수만 다른지
+        
+        그럴 때만 K-means를 이전 결과에서 이어서 학습합니다 (배치/서버는 항상 새로 학습).
+        """
+        last = self._last_quantize.get(kind)
+        self._last_quantize[kind] = (weakref.ref(source), method, options, color_count)
+        return (last is not None and last[0]() is source and last[1:3] == (method, options)
+                and last[3] != color_count)
     
-    def change_color(self):
-        """특정 색상을 다른 색상으로 변경"""
-        # 처리된 이미지가 있으면 그것을 사용, 없으면 원본 사용
-        img = self.processed_image if self.processed_image else self.original_image
-        
-        if img is None:
-            messagebox.showwarning("Warning", "Please load an image first.")
+    def schedule_preview(self):
+        """설정 변경 후 입력이 잠시 멈추면 미리보기를 실행합니다 (디바운스)."""
+        if self._preview_after_id is not None:
+            self.root.after_cancel(self._preview_after_id)
+            self._preview_after_id = None
+        if self.live_preview.get() and self.original_image:
+            self._preview_after_id = self.root.after(self.preview_delay_ms, self.run_preview)
+    
+    def cancel_preview(self):
+        if self._preview_after_id is not None:
+            self.root.after_cancel(self._preview_after_id)
+            self._preview_after_id = None
+        self.preview_jobs.cancel()
+    
+    def run_preview(self):
+        """표시용 축소본에 현재 설정을 적용해 결과 영역에 보여줍니다."""
+        self._preview_after_id = None
+        if not self.original_image:
+            return
+        try:
+            color_count = int(self.color_count.get())
+        except ValueError:
+            return
+        if not 2 <= color_count <= 256:
+            return
+        method = self.method.get()
+        if method == "palette" and not self.fixed_palette:
             return
+        options = self.method_options(method)
+        proxy = self.resize_for_display(self.original_image)
+        warm_start = self.only_color_count_changed("preview", proxy, method, options, color_count)
         
+        def work(progress):
+            return image_core.quantize_image(proxy, method, color_count, progress=progress,
+                                             cache=self.result_cache, warm_start=warm_start, **options)
+        
+        def on_done(result):
+            photo = self.make_photo(result)
+            self.aa_processed_label.config(image=photo, text="", bg=self.card_color)
+            self.aa_processed_label.image = photo
+            self.aa_processed_title.config(text="Processed (preview - click Process for full resolution)")
+            # 전체 해상도 작업이 진행 중이면 그 진행 상황을 가리지 않음
+            if not self.jobs.busy:
+                self.show_status("Preview updated.", self.preview_jobs.last_timing)
+        
+        self.preview_jobs.submit(work, on_done, name=f"preview:{method}")
+    
+    def read_color_inputs(self):
+        """입력 필드의 (목표 색상, 새 색상)을 반환합니다. 잘못된 값이면 None"""
         try:
             target_color = (
                 int(self.target_r.get()), 
@@ -493,38 +1149,316 @@ class ImageProcessor:
                 int(self.new_b.get()), 
                 int(self.new_a.get())
             )
+            if not all(0 <= v <= 255 for v in target_color + new_color):
+                raise ValueError
         except ValueError:
             messagebox.showerror("Error", "Please enter valid numbers for all color values.")
+            return None
+        return target_color, new_color
+    
+    def read_tolerance(self):
+        try:
+            return int(self.tolerance.get())
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid number for tolerance.")
+            return None
+    
+    def add_remap_rule(self):
+        """입력 필드의 색상 쌍을 교체 표에 추가"""
+        rule = self.read_color_inputs()
+        if rule is None:
+            return
+        self.remap_rules.append(rule)
+        self.refresh_remap_list()
+    
+    def remove_remap_rules(self):
+        for index in reversed(self.remap_list.curselection()):
+            del self.remap_rules[index]
+        self.refresh_remap_list()
+    
+    def refresh_remap_list(self):
+        self.remap_list.delete(0, tk.END)
+        for target_color, new_color in self.remap_rules:
+            self.remap_list.insert(tk.END, f"{palettes.format_hex(target_color)} → {palettes.format_hex(new_color)}")
+    
+    def load_remap_table(self):
+        file_path = filedialog.askopenfilename(
+            title="Load Remap Table",
+            filetypes=[("Remap Tables", "*.json *.gpl"), ("All Files", "*.*")]
+        )
+        if not file_path:
+            return
+        try:
+            self.remap_rules = palettes.load_remap(file_path)
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Error", f"Failed to load remap table: {str(e)}")
+            return
+        self.refresh_remap_list()
+    
+    def save_remap_table(self):
+        if not self.remap_rules:
+            messagebox.showwarning("Warning", "The remap table is empty.")
+            return
+        file_path = filedialog.asksaveasfilename(
+            title="Save Remap Table",
+            defaultextension=".json",
+            filetypes=[("JSON Files", "*.json"), ("GIMP Palettes", "*.gpl")]
+        )
+        if not file_path:
             return
+        try:
+            palettes.save_remap(file_path, self.remap_rules)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Failed to save remap table: {str(e)}")
+    
+    def change_color(self):
+        """특정 색상을 다른 색상으로 변경"""
+        colors = self.read_color_inputs()
+        if colors is None:
+            return
+        self.recolor([colors], "Color changed successfully!", self.selected_region())
+    
+    def apply_remap_table(self):
+        """교체 표의 모든 규칙을 한 번에 적용"""
+        if not self.remap_rules:
+            messagebox.showwarning("Warning", "Add rules to the remap table first.")
+            return
+        self.recolor(list(self.remap_rules), f"Applied {len(self.remap_rules)} color rules!",
+                     self.selected_region())
+    
+    def selected_region(self):
+        """사각형/올가미 범위이면 선택 영역의 다각형, 전체 이미지면 None"""
+        if self.region_mode.get() in ("Rectangle", "Lasso") and self.selection:
+            return ("polygon", self.selection)
+        return None
+    
+    def flood_fill(self, orig_x, orig_y):
+        """클릭한 픽셀과 이어진 같은 색(허용 오차 안) 영역을 새 색상으로 바꿉니다."""
+        img = self.processed_image if self.processed_image else self.original_image
+        if img is None or not (0 <= orig_x < img.width and 0 <= orig_y < img.height):
+            return
+        self.pick_color(orig_x, orig_y)
+        colors = self.read_color_inputs()
+        if colors is None:
+            return
+        self.recolor([colors], "Region filled!", ("fill", (orig_x, orig_y)))
+    
+    def recolor(self, rules, message, region=None):
+        """현재 이미지에 교체 규칙들을 작업 스레드에서 한 번에 적용합니다.
         
-        # 이미지 데이터 변경
-        img_data = img.getdata()
-        new_img_data = []
+        region이 ("polygon", 점 목록)이면 선택 영역 안에만, ("fill", (x, y))이면 그 점과
+        이어진 영역에만 적용하고, 바뀐 경계 상자만 다시 그립니다.
+        """
+        if self.defer_until_loaded(lambda: self.recolor(rules, message, region)):
+            return
+        # 처리된 이미지가 있으면 그것을 사용, 없으면 원본 사용
+        img = self.processed_image if self.processed_image else self.original_image
+        
+        if img is None:
+            messagebox.showwarning("Warning", "Please load an image first.")
+            return
+        if region is None and self.region_mode.get() in ("Rectangle", "Lasso"):
+            messagebox.showwarning("Warning", "Drag on the canvas to select a region first.")
+            return
         
-        for item in img_data:
-            if item == target_color:
-                new_img_data.append(new_color)
+        tolerance = self.read_tolerance()
+        if tolerance is None:
+            return
+        metric = self.tolerance_metric.get()
+        
+        def work(progress):
+            if region is None:
+                # 규칙 수와 관계없이 이미지 전체를 한 번만 훑음
+                result = image_core.remap_colors(img, rules, tolerance, metric, progress=progress)
+                with timing.span("history"):
+                    step = history.RecolorStep.between(img, result)
+                self.prepare_previews(result)
+                return result, step, None
+            
+            # 영역만 바꿀 때는 영역의 경계 상자 안에서만 비교/기록/축소
+            kind, value = region
+            with timing.span("region"):
+                if kind == "fill":
+                    selected = image_core.flood_fill_mask(img, value, tolerance, metric, progress=progress)
+                else:
+                    selected = image_core.polygon_mask(value, img.size)
+            if selected is None:
+                return img, None, None
+            box, mask = selected
+            result = image_core.recolor_region(img, box, mask, rules, tolerance, metric, progress=progress)
+            with timing.span("history"):
+                step = history.RecolorStep.within(img, result, box)
+            with timing.span("preview"):
+                if not self.previews.patch(img, result, box):
+                    self.prepare_previews(result)
+            return result, step, box
+        
+        def on_done(payload):
+            result, step, box = payload
+            if step is None:
+                self.finish_job("The selection is outside the image.")
+                return
+            self.processed_image = result
+            self.history.push(step)
+            self.update_history_buttons()
+            
+            # 색상 변경 탭 캔버스 업데이트 (영역만 바꿨으면 그 부분만)
+            if box is None:
+                self.update_canvas()
             else:
-                new_img_data.append(item)
+                self.redraw_canvas_box(box)
+            
+            # 안티앨리어싱 탭의 원본 이미지 위치에도 표시
+            display_img = self.resize_for_display(self.processed_image)
+            photo = self.make_photo(display_img)
+            self.aa_original_label.config(image=photo, text="", bg=self.card_color)
+            self.aa_original_label.image = photo
+            
+            self.finish_job(message, self.jobs.last_timing)
         
-        # 새 이미지 생성
-        new_img = Image.new('RGBA', img.size)
-        new_img.putdata(new_img_data)
-        self.processed_image = new_img
+        def on_error(e):
+            self.finish_job("Color change failed")
+            messagebox.showerror("Error", f"Error during color change: {str(e)}")
         
-        # 색상 변경 탭 캔버스 업데이트
-        self.update_canvas()
+        self.start_job(work, on_done, on_error, name="recolor" if region is None else f"recolor:{region[0]}")
+    
+    def export_frames(self):
+        """여러 프레임 원본의 모든 프레임에 현재 처리 방법/색상 수와 교체 표를 적용해 저장합니다."""
+        if self.defer_until_loaded(self.export_frames):
+            return
+        if self.source_frames <= 1:
+            return
+        try:
+            color_count = int(self.color_count.get())
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid color count.")
+            return
+        method = self.method.get()
+        if method == "palette" and not self.fixed_palette:
+            messagebox.showwarning("Warning", "Load a fixed palette first.")
+            return
+        tolerance = self.read_tolerance()
+        if tolerance is None:
+            return
         
-        # 안티앨리어싱 탭의 원본 이미지 위치에도 표시
-        display_img = self.resize_for_display(self.processed_image, 350)
-        photo = ImageTk.PhotoImage(display_img)
-        self.aa_original_label.config(image=photo, text="", bg=self.card_color)
-        self.aa_original_label.image = photo
+        file_path = filedialog.asksaveasfilename(
+            title="Export Frames",
+            defaultextension=".gif",
+            filetypes=[
+                ("Animated GIF", "*.gif"),
+                ("Animated PNG", "*.png *.apng"),
+                ("Animated WebP", "*.webp"),
+                ("Multi-page TIFF", "*.tif *.tiff"),
+            ]
+        )
+        if not file_path:
+            return
+        
+        src_path = self.source_path
+        rules = list(self.remap_rules)
+        metric = self.tolerance_metric.get()
+        preset = self.save_preset.get()
+        options = self.method_options(method)
+        
+        # 팔레트는 모든 프레임의 표본으로 한 번 학습하고, 프레임은 프로세스 풀에서 처리
+        def work(progress):
+            return frames.process_file_frames(src_path, file_path, method, color_count, replace=rules,
+                                              tolerance=tolerance, metric=metric,
+                                              workers=os.cpu_count() or 1, preset=preset,
+                                              progress=progress, **options)
+        
+        def on_done(count):
+            self.finish_job(f"Exported {count} frames.", self.jobs.last_timing)
         
-        messagebox.showinfo("Success", "Color changed successfully!")
+        def on_error(e):
+            self.finish_job("Frame export failed")
+            messagebox.showerror("Error", f"Error exporting frames: {str(e)}")
+        
+        self.start_job(work, on_done, on_error, name=f"frames:{method}")
+    
+    def undo(self):
+        """마지막 편집을 되돌립니다."""
+        if self.history.can_undo and self.loading_size is None:
+            self.step_history(self.history.undo, "Undo")
+    
+    def redo(self):
+        """되돌린 편집을 다시 적용합니다."""
+        if self.history.can_redo and self.loading_size is None:
+            self.step_history(self.history.redo, "Redo")
+    
+    def step_history(self, move, label):
+        # 진행 중인 작업의 결과는 이동한 뒤의 상태와 맞지 않으므로 취소
+        if self.jobs.busy:
+            self.cancel_job()
+        current = self.processed_image or self.original_image
+        with timing.operation(label.lower()) as record:
+            image = move(current)
+        self.processed_image = None if image is self.original_image else image
+        self.show_processed_image()
+        self.update_history_buttons()
+        self.show_status(f"{label} done.", record)
+    
+    def show_processed_image(self):
+        """현재 처리 결과(없으면 원본)로 두 탭의 표시를 갱신합니다."""
+        self.update_displays()
+        if self.processed_image is None:
+            self.aa_processed_label.config(image='', text="Processed result will appear here",
+                                          fg=self.secondary_text)
+        else:
+            photo = self.make_photo(self.resize_for_display(self.processed_image))
+            self.aa_processed_label.config(image=photo, text="", bg=self.card_color)
+            self.aa_processed_label.image = photo
+        self.aa_processed_title.config(text="Processed")
+    
+    def update_history_buttons(self):
+        # 새 이미지를 읽는 동안에는 이전 이미지의 기록으로 이동하지 않음
+        loading = self.loading_size is not None
+        self.undo_btn.config(state=tk.NORMAL if self.history.can_undo and not loading else tk.DISABLED)
+        self.redo_btn.config(state=tk.NORMAL if self.history.can_redo and not loading else tk.DISABLED)
+    
+    def start_job(self, work, on_done, on_error, name):
+        """작업 스레드에서 처리를 시작합니다. 진행 중인 작업이 있으면 대체합니다."""
+        self.progress['value'] = 0
+        self.status_label.config(text="Working...")
+        self.cancel_btn.config(state=tk.NORMAL)
+        self._ui_stages = []
+        self.jobs.submit(work, on_done, on_error, on_progress=self.on_job_progress, name=name)
+    
+    def on_job_progress(self, fraction, message):
+        self.progress['value'] = fraction
+        self.status_label.config(text=message)
+    
+    def finish_job(self, message, record=None):
+        """상태 표시줄에 결과와 단계별 시간 요약을 표시합니다."""
+        self.progress['value'] = 0
+        self.show_status(message, record)
+        self.cancel_btn.config(state=tk.DISABLED)
+    
+    def show_status(self, message, record=None):
+        # 여러 번 만든 PhotoImage 시간은 한 항목으로 합침
+        ui_seconds = {}
+        for stage, seconds in self._ui_stages:
+            ui_seconds[stage] = ui_seconds.get(stage, 0.0) + seconds
+        self._ui_stages = []
+        summary = timing.format_summary(record, ui_seconds.items())
+        self.status_label.config(text=f"{message}  {summary}" if summary else message)
+    
+    def cancel_job(self):
+        """진행 중인 작업 취소"""
+        self.jobs.cancel()
+        if self.loading_size is not None:
+            # 읽기를 취소하면 표시 중인 축소본도 의미가 없음
+            self.loading_size = None
+            self.pending_actions = []
+            self.source_path = None
+            self.clear_displays()
+            self.update_history_buttons()
+        self.finish_job("Cancelled")
     
     def save_image(self):
         """처리된 이미지를 저장합니다."""
+        if self.defer_until_loaded(self.save_image):
+            return
         img_to_save = self.processed_image if self.processed_image else self.original_image
         
         if not img_to_save:
@@ -536,22 +1470,47 @@ class ImageProcessor:
             defaultextension=".png",
             filetypes=[
                 ("PNG Files", "*.png"),
+                ("GIF Files", "*.gif"),
                 ("JPEG Files", "*.jpg"),
                 ("All Files", "*.*")
             ]
         )
         
-        if file_path:
-            try:
-                img_to_save.save(file_path)
-                messagebox.showinfo("Success", "Image saved successfully!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Error saving image: {str(e)}")
+        if not file_path:
+            return
+        preset = self.save_preset.get()
+        
+        # 팔레트 변환과 압축은 작업 스레드에서 실행
+        def work(progress):
+            progress(0.1, "Encoding")
+            return export.save_image(img_to_save, file_path, preset)
+        
+        def on_done(mode):
+            kind = "palette" if mode == 'P' else mode
+            self.finish_job(f"Image saved ({kind}, {preset}).", self.jobs.last_timing)
+            messagebox.showinfo("Success", "Image saved successfully!")
+        
+        def on_error(e):
+            self.finish_job("Save failed")
+            messagebox.showerror("Error", f"Error saving image: {str(e)}")
+        
+        self.start_job(work, on_done, on_error, name="save")
 
 def main():
+    # 헤드리스 배치 모드: python ImageProcessor.py batch in/ out/ ...
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        import batch
+        sys.exit(batch.main(sys.argv[2:]))
+    # 로컬 HTTP 서버 모드: python ImageProcessor.py serve --port 8765
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        import server
+        sys.exit(server.main(sys.argv[2:]))
+    
     root = tk.Tk()
     app = ImageProcessor(root)
     root.mainloop()
 
 if __name__ == "__main__":
+    # PyInstaller 실행파일에서 프로세스 풀을 쓰기 위해 필요
+    multiprocessing.freeze_support()
     main()
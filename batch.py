@@ -0,0 +1,266 @@
+"""헤드리스 배치 처리
+
+사용법:
+    python ImageProcessor.py batch in/ out/ --method kmeans --colors 16
+    python ImageProcessor.py batch in/ out/ --method none --replace 255,255,255,255=0,0,0,0 --tolerance 8
+
+입력 폴더의 이미지를 프로세스 풀로 병렬 처리하고, 끝나는 대로 결과를 저장합니다.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from PIL import Image
+
+import export
+import frames
+import image_core
+import palettes
+import pipeline
+import tiled
+import timing
+
+# 콘솔 경고 메시지 숨기기
+warnings.filterwarnings('ignore')
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.tif')
+
+
+def parse_replace(text):
+    """--replace 인자: 'R,G,B,A=R,G,B,A' 형식의 색상 교체 규칙을 파싱합니다."""
+    try:
+        return pipeline.parse_replace(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def find_images(input_dir):
+    """입력 폴더 아래의 이미지 파일 경로를 (정렬된 순서로) 모읍니다."""
+    for dirpath, dirnames, filenames in os.walk(input_dir):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(dirpath, name)
+
+
+def init_worker(trace_path, profile_path):
+    """워커 프로세스마다 단계별 시간 기록/프로파일 출력 위치를 설정합니다."""
+    if profile_path:
+        # 워커마다 첫 번째 이미지를 프로파일링해서 각자의 파일에 저장
+        root, ext = os.path.splitext(profile_path)
+        profile_path = f"{root}.{os.getpid()}{ext or '.prof'}"
+    timing.configure(trace_path=trace_path, profile_path=profile_path)
+
+
+def process_file(src_path, dst_path, options):
+    """워커 프로세스에서 이미지 한 장을 처리하고 저장합니다."""
+    with timing.operation(f"batch:{os.path.basename(src_path)}"):
+        return _process_file(src_path, dst_path, options)
+
+
+def _process_file(src_path, dst_path, options):
+    start = time.perf_counter()
+    with Image.open(src_path) as probe:
+        megapixels = probe.width * probe.height / 1_000_000
+        frame_count = frames.frame_count(probe)
+
+    # 애니메이션/여러 페이지 이미지는 모든 프레임을 같은 팔레트로 처리 (병렬화는 파일 단위로)
+    if frame_count > 1 and not options['first_frame'] and dst_path.lower().endswith(frames.ANIMATED_EXTENSIONS):
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        frames.process_file_frames(src_path, dst_path, options['method'], options['colors'],
+                                   replace=options['replace'], tolerance=options['tolerance'],
+                                   metric=options['metric'], preset=options['preset'],
+                                   **options['method_options'])
+        return megapixels * frame_count, time.perf_counter() - start
+
+    # 큰 이미지는 띠 단위로 처리해서 최대 메모리를 띠 크기로 제한
+    # (JPEG/BMP 출력은 띠 단위로 쓸 수 없으므로 --tiled를 직접 준 경우가 아니면 메모리에서 처리)
+    no_alpha = dst_path.lower().endswith(export.NO_ALPHA_EXTENSIONS)
+    if options['tiled'] or (megapixels >= options['tiled_above'] and not no_alpha):
+        if no_alpha:
+            raise ValueError("tiled processing writes PNG/TIFF/GIF output only")
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        tiled.quantize_file_tiled(src_path, dst_path, options['method'], options['colors'],
+                                  tile_rows=options['tile_rows'], replace=options['replace'],
+                                  tolerance=options['tolerance'], metric=options['metric'],
+                                  preset=options['preset'], **options['method_options'])
+        return megapixels, time.perf_counter() - start
+
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+    # 결과 캐시는 --cache-dir이 있을 때만 사용 (이미지마다 내용이 다르므로 디스크 계층을 주로 사용)
+    cache = pipeline.worker_cache(options['cache_dir']) if options['cache_dir'] else None
+    pipeline.process_image(src_path, dst_path, options['method'], options['colors'],
+                           options['method_options'], replace=options['replace'],
+                           tolerance=options['tolerance'], metric=options['metric'],
+                           preset=options['preset'], indexed=options['indexed'], cache=cache)
+    return megapixels, time.perf_counter() - start
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ImageProcessor.py batch",
+                                     description="Process a directory of images without the GUI.")
+    parser.add_argument('input_dir')
+    parser.add_argument('output_dir')
+    parser.add_argument('--method', choices=list(image_core.METHODS) + ["none"], default="kmeans")
+    parser.add_argument('--colors', type=int, default=8, help="color count (default: 8)")
+    parser.add_argument('--sample-size', type=int, default=image_core.DEFAULT_SAMPLE_SIZE,
+                        help="pixels used to fit kmeans-fast (default: %(default)s)")
+    parser.add_argument('--sampling', choices=["random", "grid"], default="random",
+                        help="how kmeans-fast picks its sample (default: random)")
+    parser.add_argument('--palette', metavar="FILE_OR_HEX",
+                        help="fixed palette for --method palette: .gpl/.act/.json/.hex file or '#rrggbb,...'")
+    parser.add_argument('--lab', action='store_true',
+                        help="snap to the fixed palette by CIELAB distance instead of RGB")
+    parser.add_argument('--lut-bits', type=int, default=image_core.DEFAULT_LUT_BITS, choices=range(4, 9),
+                        metavar="4-8", help="bits per channel of the palette lookup table "
+                                             "(8 = exact, 16 MB; default: %(default)s)")
+    parser.add_argument('--replace', type=parse_replace, action='append', default=[],
+                        metavar="R,G,B,A=R,G,B,A", help="color replacement rule, may be repeated")
+    parser.add_argument('--remap', metavar="FILE",
+                        help="load replacement rules from a .json or .gpl remap table")
+    parser.add_argument('--tolerance', type=int, default=0)
+    parser.add_argument('--metric', choices=["channel", "euclidean"], default="channel")
+    parser.add_argument('--format', default="png", help="output file extension (default: png)")
+    parser.add_argument('--preset', choices=list(export.PRESETS), default=export.DEFAULT_PRESET,
+                        help="PNG/GIF encoder speed vs. size preset (default: %(default)s)")
+    parser.add_argument('--first-frame', action='store_true',
+                        help="process only the first frame of animated GIF/APNG/WebP and multi-page TIFF inputs")
+    parser.add_argument('--full-color', action='store_true',
+                        help="always write full-color PNG/GIF instead of palette mode for <= 256 colors")
+    parser.add_argument('--tiled', action='store_true',
+                        help="always process in row bands through a memory-mapped output buffer")
+    parser.add_argument('--tiled-above', type=float, default=64, metavar="MP",
+                        help="use tiled processing for PNG/TIFF/GIF output of at least this many megapixels (default: 64)")
+    parser.add_argument('--tile-rows', type=int, default=tiled.DEFAULT_TILE_ROWS,
+                        help="rows per band in tiled processing (default: %(default)s)")
+    parser.add_argument('--cache-dir', help="reuse quantization results stored in this directory")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="process pool size (default: number of cores)")
+    parser.add_argument('--trace', metavar="JSONL",
+                        help="append per-stage timings of every image to this file")
+    parser.add_argument('--profile', metavar="PROF",
+                        help="cProfile the first image of each worker (saved as PROF.<pid>)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not 2 <= args.colors <= 256:
+        print("error: --colors must be between 2 and 256", file=sys.stderr)
+        return 2
+
+    replace = list(args.replace)
+    if args.remap:
+        try:
+            replace += palettes.load_remap(args.remap)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"error: cannot load remap table: {e}", file=sys.stderr)
+            return 2
+
+    method_options = {}
+    if args.method == "kmeans-fast":
+        method_options = {'sample_size': args.sample_size, 'sampling': args.sampling}
+    elif args.method == "palette":
+        if not args.palette:
+            print("error: --method palette needs --palette", file=sys.stderr)
+            return 2
+        try:
+            fixed_palette = palettes.load_palette(args.palette)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"error: cannot load palette: {e}", file=sys.stderr)
+            return 2
+        # 룩업 테이블은 워커마다 한 번 만들고, --cache-dir이 있으면 파일로 공유
+        method_options = {'palette': tuple(fixed_palette), 'space': "lab" if args.lab else "rgb",
+                          'lut_bits': args.lut_bits, 'lut_dir': args.cache_dir}
+
+    options = {
+        'method': args.method,
+        'colors': args.colors,
+        'method_options': method_options,
+        'cache_dir': args.cache_dir,
+        'tiled': args.tiled,
+        'tiled_above': args.tiled_above,
+        'tile_rows': args.tile_rows,
+        'replace': replace,
+        'tolerance': args.tolerance,
+        'metric': args.metric,
+        'preset': args.preset,
+        'indexed': not args.full_color,
+        'first_frame': args.first_frame,
+    }
+
+    jobs = []
+    for src_path in find_images(args.input_dir):
+        rel_path = os.path.relpath(src_path, args.input_dir)
+        dst_path = os.path.join(args.output_dir, os.path.splitext(rel_path)[0] + '.' + args.format.lstrip('.'))
+        jobs.append((src_path, dst_path))
+
+    if not jobs:
+        print(f"No images found in {args.input_dir}")
+        return 1
+
+    # 고정 팔레트 룩업 테이블은 워커를 띄우기 전에 한 번만 만들고 워커들은 메모리 맵으로 공유
+    scratch_dir = None
+    if args.method == "palette":
+        if not method_options['lut_dir']:
+            scratch_dir = tempfile.mkdtemp(prefix="imageprocessor-lut-")
+            method_options['lut_dir'] = scratch_dir
+        image_core.palette_lut(method_options['palette'], method_options['space'],
+                               method_options['lut_bits'], method_options['lut_dir'])
+    try:
+        return run_jobs(jobs, options, args)
+    finally:
+        if scratch_dir:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+def run_jobs(jobs, options, args):
+    """프로세스 풀로 (원본, 결과) 경로 목록을 처리하고 종료 코드를 반환합니다."""
+    done_count = 0
+    failed = 0
+    total_megapixels = 0.0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                             initargs=(args.trace, args.profile)) as executor:
+        # 한 번에 너무 많은 작업을 올리지 않도록 워커 수의 두 배까지만 제출
+        pending = {}
+        job_iter = iter(jobs)
+        max_in_flight = args.workers * 2
+
+        def submit_next():
+            job = next(job_iter, None)
+            if job is None:
+                return False
+            src_path, dst_path = job
+            pending[executor.submit(process_file, src_path, dst_path, options)] = src_path
+            return True
+
+        while len(pending) < max_in_flight and submit_next():
+            pass
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                src_path = pending.pop(future)
+                done_count += 1
+                try:
+                    megapixels, elapsed = future.result()
+                    total_megapixels += megapixels
+                    print(f"[{done_count}/{len(jobs)}] {src_path} ({megapixels:.1f} MP, {elapsed:.2f}s)")
+                except Exception as e:
+                    failed += 1
+                    print(f"[{done_count}/{len(jobs)}] {src_path} FAILED: {e}", file=sys.stderr)
+                submit_next()
+
+    elapsed = time.perf_counter() - start
+    succeeded = len(jobs) - failed
+    print(f"Processed {succeeded} images ({total_megapixels:.1f} MP) in {elapsed:.2f}s "
+          f"with {args.workers} workers: {succeeded / elapsed:.2f} images/s, "
+          f"{total_megapixels / elapsed:.2f} MP/s" + (f", {failed} failed" if failed else ""))
+    return 1 if failed else 0
@@ -0,0 +1,86 @@
+"""change_color 벤치마크: 기존 getdata/putdata 루프와 NumPy 마스크 교체 비교
+
+사용법:
+    python benchmarks/bench_change_color.py --megapixels 4 --repeat 3
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_core import replace_color
+
+
+def make_image(megapixels, seed=0):
+    """몇 가지 단색 블록 위에 안티앨리어싱 느낌의 노이즈를 섞은 RGBA 이미지"""
+    side = int((megapixels * 1_000_000) ** 0.5)
+    rng = np.random.default_rng(seed)
+    palette = np.array([[255, 255, 255, 255], [0, 0, 0, 255],
+                        [200, 30, 30, 255], [30, 30, 200, 255]], dtype=np.uint8)
+    blocks = rng.integers(0, len(palette), size=(side // 16 + 1, side // 16 + 1))
+    labels = np.kron(blocks, np.ones((16, 16), dtype=np.int64))[:side, :side]
+    rgba = palette[labels]
+    noise = rng.random((side, side)) < 0.05
+    rgba[noise, :3] = np.clip(rgba[noise, :3].astype(np.int16) + rng.integers(-6, 7, size=(noise.sum(), 3)), 0, 255)
+    return Image.fromarray(rgba, 'RGBA')
+
+
+def legacy_change_color(img, target_color, new_color):
+    """기존 ImageProcessor.change_color의 픽셀 루프"""
+    new_img_data = []
+    for item in img.getdata():
+        if item == target_color:
+            new_img_data.append(new_color)
+        else:
+            new_img_data.append(item)
+    new_img = Image.new('RGBA', img.size)
+    new_img.putdata(new_img_data)
+    return new_img
+
+
+def vectorized_change_color(img, target_color, new_color, tolerance=0, metric="channel"):
+    rgba = np.array(img)
+    replace_color(rgba, target_color, new_color, tolerance, metric)
+    return Image.fromarray(rgba, 'RGBA')
+
+
+def best_of(repeat, fn, *args):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megapixels', type=float, default=4)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-legacy', action='store_true', help="기존 루프 측정 생략 (큰 이미지용)")
+    args = parser.parse_args()
+
+    img = make_image(args.megapixels)
+    target, new = (200, 30, 30, 255), (0, 255, 0, 255)
+    print(f"image: {img.width}x{img.height} ({img.width * img.height / 1e6:.2f} MP)")
+
+    fast, fast_img = best_of(args.repeat, vectorized_change_color, img, target, new)
+    print(f"numpy exact              : {fast * 1000:9.1f} ms")
+    for metric in ("channel", "euclidean"):
+        t, _ = best_of(args.repeat, vectorized_change_color, img, target, new, 8, metric)
+        print(f"numpy tolerance {metric:9s}: {t * 1000:9.1f} ms")
+
+    if not args.skip_legacy:
+        slow, slow_img = best_of(1, legacy_change_color, img, target, new)
+        same = np.array_equal(np.array(slow_img), np.array(fast_img))
+        print(f"legacy getdata loop      : {slow * 1000:9.1f} ms  (speedup x{slow / fast:.0f}, identical={same})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""저장 벤치마크: 양자화 결과를 RGBA와 팔레트(P 모드)로 쓸 때 프리셋별 파일 크기와 인코딩 시간
+
+사용법:
+    python benchmarks/bench_export.py --megapixels 4 --colors 8 16
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import export
+import image_core
+from synthetic import make_photo
+
+
+def time_save(img, path, preset, indexed, repeat):
+    """가장 빠른 저장 시간(초)과 파일 크기, 실제로 쓴 모드를 반환합니다."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        mode = export.save_image(img, path, preset, indexed=indexed)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, os.path.getsize(path), mode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megapixels', type=float, default=4)
+    parser.add_argument('--colors', type=int, nargs='+', default=[8, 16])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    photo = make_photo(args.megapixels).convert('RGBA')
+    print(f"{photo.width}x{photo.height} photo")
+    print(f"{'colors':>6} {'format':>6} {'preset':>9} {'mode':>5} {'encode (s)':>11} {'size (KB)':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for colors in args.colors:
+            img = image_core.quantize_image(photo, "kmeans-fast", colors)
+            for ext in ('.png', '.gif'):
+                for preset in export.PRESETS:
+                    # GIF는 256색 이하만 저장할 수 있으므로 RGBA 비교는 PNG만
+                    for indexed in ((False, True) if ext == '.png' else (True,)):
+                        elapsed, size, mode = time_save(img, os.path.join(tmp, "out" + ext),
+                                                        preset, indexed, args.repeat)
+                        print(f"{colors:6d} {ext[1:]:>6} {preset:>9} {mode:>5} {elapsed:11.3f} {size / 1024:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""여러 프레임 벤치마크: 공유 팔레트 처리 시간(워커 수별)과 프레임 간 색 안정성
+
+같은 사진을 조금씩 움직인 애니메이션 GIF를 만들어, 프레임마다 따로 양자화했을 때와
+frames.process_file_frames()로 공유 팔레트를 쓸 때 전체 프레임에 나오는 색 수를 비교합니다.
+색 수가 색상 수(--colors)보다 많을수록 프레임마다 색이 바뀌어 깜빡거립니다.
+
+사용법:
+    python benchmarks/bench_frames.py --megapixels 1 --frames 24 --workers 1 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import frames
+import image_core
+from synthetic import make_photo
+
+
+def distinct_colors(path):
+    """모든 프레임에 나오는 (불투명) 색 수"""
+    colors = set()
+    with Image.open(path) as img:
+        for rgba in frames.iter_frames(img):
+            packed = rgba.reshape(-1, 4).view(np.uint32)[:, 0]
+            colors.update(np.unique(packed).tolist())
+    return len(colors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megapixels', type=float, default=1)
+    parser.add_argument('--frames', type=int, default=24)
+    parser.add_argument('--colors', type=int, default=16)
+    parser.add_argument('--method', default="kmeans-fast", choices=list(image_core.INDEXED_METHODS))
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    image_core.warm_up()
+    photo = make_photo(args.megapixels).convert('RGB')
+    # 조금씩 이동하는 화면 (프레임마다 같은 물체가 다른 위치에 있음)
+    shift = max(1, photo.width // (4 * args.frames))
+    clip = [Image.fromarray(np.roll(np.asarray(photo), i * shift, axis=1)) for i in range(args.frames)]
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "clip.tif")
+        clip[0].save(src, save_all=True, append_images=clip[1:])
+        print(f"{args.frames} frames of {photo.width}x{photo.height}, {args.method} k={args.colors}")
+
+        # 프레임마다 따로 학습한 팔레트
+        independent = os.path.join(tmp, "independent.tif")
+        start = time.perf_counter()
+        quantized = [image_core.quantize_image(frame, args.method, args.colors) for frame in clip]
+        quantized[0].save(independent, save_all=True, append_images=quantized[1:])
+        elapsed = time.perf_counter() - start
+        print(f"{'per-frame palettes':>22}: {elapsed:7.2f} s  {distinct_colors(independent):5d} colors")
+
+        for workers in args.workers:
+            shared = os.path.join(tmp, "shared.tif")
+            start = time.perf_counter()
+            frames.process_file_frames(src, shared, args.method, args.colors, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"{f'shared, {workers} workers':>22}: {elapsed:7.2f} s  {distinct_colors(shared):5d} colors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""실행 취소 기록 벤치마크: 단계별 저장 크기와 undo/redo 시간
+
+사진(원본) -> 색상 교체 -> 양자화 -> 색상 교체 2번 순서로 편집한 뒤 모두 되돌리고
+다시 실행하면서, 각 상태가 편집 당시와 같은지 확인합니다.
+
+사용법:
+    python benchmarks/bench_history.py --megapixels 20
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import history
+import image_core
+from synthetic import make_photo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megapixels', type=float, default=20)
+    parser.add_argument('--colors', type=int, default=16)
+    args = parser.parse_args()
+
+    original = make_photo(args.megapixels)
+    rgba_bytes = original.width * original.height * 4
+    print(f"image: {original.width}x{original.height} ({rgba_bytes / 2**20:.0f} MB as RGBA)")
+
+    log = history.History()
+    log.reset(original)
+    states = [original]
+
+    def push(name, step, image):
+        log.push(step)
+        states.append(image)
+        print(f"{name:>24}: step {step.nbytes / 2**20:7.1f} MB")
+
+    corner = tuple(int(v) for v in np.asarray(original)[0, 0])
+    image = image_core.remap_colors(original, [(corner, (255, 0, 0, 255))], tolerance=40)
+    push("recolor (tolerance 40)", history.RecolorStep.between(original, image), image)
+
+    step = history.QuantizeStep.compute(original, "kmeans-fast", args.colors)
+    image = step.image(original)
+    push(f"kmeans-fast k={args.colors}", step, image)
+
+    palette = np.unique(np.asarray(image).reshape(-1, 4).view(np.uint32)).view(np.uint8).reshape(-1, 4)
+    for i in range(2):
+        rule = (tuple(int(v) for v in palette[i]), (0, 64 * i, 255, 255))
+        recolored = image_core.remap_colors(image, [rule])
+        push(f"recolor {i + 1}", history.RecolorStep.between(image, recolored), recolored)
+        image = recolored
+
+    print(f"{'history total':>24}: {log.nbytes / 2**20:7.1f} MB "
+          f"(full copies would be {rgba_bytes * (len(states) - 1) / 2**20:.0f} MB)")
+
+    current = image
+    while log.can_undo:
+        start = time.perf_counter()
+        current = log.undo(current)
+        elapsed = time.perf_counter() - start
+        same = np.array_equal(np.asarray(current), np.asarray(states[log.position]))
+        print(f"{'undo to state ' + str(log.position):>24}: {elapsed * 1000:7.0f} ms  identical={same}")
+    while log.can_redo:
+        start = time.perf_counter()
+        current = log.redo(current)
+        elapsed = time.perf_counter() - start
+        same = np.array_equal(np.asarray(current), np.asarray(states[log.position]))
+        print(f"{'redo to state ' + str(log.position):>24}: {elapsed * 1000:7.0f} ms  identical={same}")
+
+
+if __name__ == "__main__":
+    main()
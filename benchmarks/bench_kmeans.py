@@ -0,0 +1,72 @@
+"""process_with_kmeans 벤치마크: 전체 픽셀 학습과 고유 색상 압축 학습 비교
+
+사용법:
+    python benchmarks/bench_kmeans.py --megapixels 1 --colors 8
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.cluster import KMeans
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_core import process_with_kmeans, unique_colors
+
+
+def make_logo(megapixels, distinct_colors=2000, seed=0):
+    """단색 영역 몇 개와 경계의 중간색으로 이루어진 로고/스크린샷 형태의 RGB 배열"""
+    side = int((megapixels * 1_000_000) ** 0.5)
+    rng = np.random.default_rng(seed)
+    palette = rng.integers(0, 256, size=(distinct_colors, 3), dtype=np.uint8)
+    # 대부분은 소수의 주요 색상, 나머지는 경계 픽셀처럼 드물게 등장
+    weights = np.r_[np.full(8, 100.0), np.ones(distinct_colors - 8)]
+    labels = rng.choice(distinct_colors, size=(side // 8 + 1, side // 8 + 1), p=weights / weights.sum())
+    labels = np.kron(labels, np.ones((8, 8), dtype=np.int64))[:side, :side]
+    edges = rng.random((side, side)) < 0.02
+    labels[edges] = rng.integers(0, distinct_colors, size=edges.sum())
+    return palette[labels]
+
+
+def legacy_kmeans(img_array, color_count):
+    """기존 구현: 모든 픽셀을 그대로 KMeans에 전달"""
+    pixels = img_array.reshape(-1, 3)
+    kmeans = KMeans(n_clusters=color_count, random_state=42, n_init=10)
+    kmeans.fit(pixels)
+    return kmeans.cluster_centers_[kmeans.labels_].reshape(img_array.shape)
+
+
+def mse(a, b):
+    return float(np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megapixels', type=float, default=1)
+    parser.add_argument('--colors', type=int, default=8)
+    parser.add_argument('--distinct', type=int, default=2000, help="입력 이미지의 고유 색상 수")
+    args = parser.parse_args()
+
+    img = make_logo(args.megapixels, args.distinct)
+    n_unique = len(unique_colors(img)[0])
+    print(f"image: {img.shape[1]}x{img.shape[0]}, {n_unique} distinct colors, k={args.colors}")
+
+    start = time.perf_counter()
+    fast = process_with_kmeans(img, args.colors)
+    fast_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    slow = legacy_kmeans(img, args.colors)
+    slow_time = time.perf_counter() - start
+
+    fast_mse, slow_mse = mse(img, fast), mse(img, slow)
+    print(f"all pixels   : {slow_time:8.2f} s  mse={slow_mse:.2f}")
+    print(f"unique colors: {fast_time:8.2f} s  mse={fast_mse:.2f}")
+    # 가중 K-means는 같은 목적 함수를 최적화하므로 오차가 같은 수준이어야 함
+    # (k-means++ 초기값 추첨 순서가 달라 중심 좌표가 비트 단위로 같지는 않음)
+    print(f"speedup x{slow_time / fast_time:.1f}, mse difference {100 * (fast_mse - slow_mse) / slow_mse:+.2f}%")
+
+if __name__ == "__main__":
+    main()
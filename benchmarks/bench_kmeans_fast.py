@@ -0,0 +1,71 @@
+"""kmeans-fast 품질/시간 보고서: 표본 크기별 평균 색상 오차를 전체 K-means와 비교
+
+사용법:
+    python benchmarks/bench_kmeans_fast.py --megapixels 2 --colors 16 --samples 5000 20000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_core import process_with_kmeans, process_with_kmeans_fast
+
+
+def make_photo(megapixels, seed=0):
+    """부드러운 그라디언트와 센서 노이즈가 섞인 사진 형태의 RGB 배열 (고유 색상이 많음)"""
+    side = int((megapixels * 1_000_000) ** 0.5)
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:side, 0:side] / side
+    img = np.empty((side, side, 3), dtype=np.float64)
+    img[..., 0] = 128 + 100 * np.sin(6 * x + 2 * y)
+    img[..., 1] = 128 + 90 * np.cos(4 * y - 3 * x * y)
+    img[..., 2] = 255 * (0.5 * x + 0.5 * y ** 2)
+    img += rng.normal(0, 8, size=img.shape)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def mean_color_error(original, result):
+    """픽셀당 평균 RGB 유클리드 거리"""
+    diff = original.astype(np.float32) - result.astype(np.float32)
+    return float(np.sqrt((diff ** 2).sum(axis=-1)).mean())
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megapixels', type=float, default=1)
+    parser.add_argument('--colors', type=int, default=16)
+    parser.add_argument('--samples', type=int, nargs='+', default=[5_000, 20_000, 50_000, 100_000, 200_000])
+    parser.add_argument('--sampling', choices=["random", "grid"], default="random")
+    parser.add_argument('--skip-full', action='store_true', help="전체 K-means 기준 측정 생략")
+    args = parser.parse_args()
+
+    img = make_photo(args.megapixels)
+    print(f"image: {img.shape[1]}x{img.shape[0]}, k={args.colors}, sampling={args.sampling}")
+    print(f"{'mode':>16} {'time (s)':>9} {'error':>7} {'vs full':>8}")
+
+    full_error = None
+    if not args.skip_full:
+        t, result = timed(process_with_kmeans, img, args.colors)
+        full_error = mean_color_error(img, result)
+        print(f"{'kmeans (full)':>16} {t:9.2f} {full_error:7.2f} {'':>8}")
+
+    for sample_size in args.samples:
+        t, result = timed(process_with_kmeans_fast, img, args.colors,
+                          sample_size=sample_size, sampling=args.sampling)
+        error = mean_color_error(img, result)
+        delta = f"{100 * (error - full_error) / full_error:+7.1f}%" if full_error else ''
+        print(f"{'fast n=' + str(sample_size):>16} {t:9.2f} {error:7.2f} {delta:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""불러오기 벤치마크: 첫 화면까지 걸리는 시간 (축소 디코딩 vs 전체 디코딩)
+
+"full"은 예전처럼 전체를 디코딩하고 RGBA로 바꾼 뒤 캔버스 크기로 줄이는 시간이고,
+"draft"는 image_core.open_draft()로 축소 디코딩한 뒤 줄이는 시간입니다.
+PhotoImage 생성(디스플레이 필요)은 두 경우 모두 같은 크기라 제외합니다.
+
+사용법:
+    python benchmarks/bench_load.py --megapixels 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import image_core
+from synthetic import make_photo
+
+CANVAS = (650, 400)
+
+
+def full_load(path):
+    image = Image.open(path)
+    image.load()
+    image = image.convert('RGBA')
+    image.thumbnail(CANVAS, Image.Resampling.LANCZOS, reducing_gap=2.0)
+    return image
+
+
+def draft_load(path):
+    draft, _ = image_core.open_draft(path, CANVAS)
+    if draft is None:
+        return None
+    draft.thumbnail(CANVAS, Image.Resampling.LANCZOS)
+    return draft
+
+
+def best_of(repeat, func, path):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(path)
+        times.append(time.perf_counter() - start)
+    return None if result is None else min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megapixels', type=float, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    photo = make_photo(args.megapixels).convert('RGB')
+    print(f"{photo.width}x{photo.height} photo")
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {
+            "JPEG q90": os.path.join(tmp, "photo.jpg"),
+            "TIFF pyramid": os.path.join(tmp, "pyramid.tif"),
+            "TIFF flat": os.path.join(tmp, "flat.tif"),
+        }
+        photo.save(files["JPEG q90"], quality=90)
+        photo.save(files["TIFF pyramid"], save_all=True, compression='tiff_deflate',
+                   append_images=[photo.reduce(4), photo.reduce(16)])
+        photo.save(files["TIFF flat"], compression='tiff_deflate')
+        del photo
+
+        print(f"{'file':>13} {'full (s)':>9} {'draft (s)':>10}")
+        for name, path in files.items():
+            full = best_of(args.repeat, full_load, path)
+            draft = best_of(args.repeat, draft_load, path)
+            draft_text = f"{draft:10.3f}" if draft is not None else f"{'n/a':>10}"
+            print(f"{name:>13} {full:9.3f} {draft_text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""quantize_image 메모리/시간 벤치마크: float64 중간 배열을 쓰던 이전 파이프라인과 비교
+
+각 경우를 새 프로세스에서 실행해 tracemalloc 최대치(NumPy 할당)와 처리 중 늘어난
+최대 RSS(PIL 내부 버퍼 포함, Linux 전용)를 잽니다.
+
+사용법:
+    python benchmarks/bench_memory.py --megapixels 4 --colors 16
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import image_core
+
+
+def make_image(megapixels, seed=0):
+    """그라디언트 + 노이즈 RGB에 가장자리가 부드러운 알파를 가진 RGBA 이미지
+
+    측정 대상보다 생성 과정의 메모리가 커지지 않도록 행 단위로 만듭니다.
+    """
+    side = int((megapixels * 1_000_000) ** 0.5)
+    rng = np.random.default_rng(seed)
+    ramp = np.linspace(0, 1, side, dtype=np.float32)
+    rgba = np.empty((side, side, 4), dtype=np.uint8)
+    for y in range(side):
+        noise = rng.integers(0, 12, size=(2, side), dtype=np.uint8)
+        rgba[y, :, 0] = 240 * ramp + noise[0]
+        rgba[y, :, 1] = 240 * ramp[y] + noise[1]
+        rgba[y, :, 2] = 255 * (1 - ramp * ramp[y])
+        rgba[y, :, 3] = np.clip(600 * (0.5 - np.hypot(ramp - 0.5, ramp[y] - 0.5)), 0, 255)
+    return Image.fromarray(rgba)
+
+
+def current_rss():
+    """현재 RSS (바이트, Linux /proc 기준)"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def legacy_quantize_image(img, method, color_count):
+    """이전 파이프라인: float64 임계값/중심, 전체 RGBA 복사로 알파 추출, dstack 후 astype"""
+    img_array = np.array(img.convert('RGB'))
+    if method == "threshold":
+        step = 256 // color_count
+        processed = img_array.copy().astype(float)
+        processed = (processed // step) * step
+        processed_array = np.clip(processed, 0, 255)
+    else:
+        labels, palette = image_core.INDEXED_METHODS[method](img_array, color_count)
+        labels = labels.astype(np.intp)
+        processed_array = palette[labels]
+    alpha = np.array(img)[:, :, 3]
+    processed_rgba = np.dstack((processed_array, alpha))
+    return Image.fromarray(processed_rgba.astype(np.uint8), 'RGBA')
+
+
+def run_case(megapixels, method, colors, variant):
+    img = make_image(megapixels)
+    fn = legacy_quantize_image if variant == "before" else image_core.quantize_image
+    # scikit-learn은 처음 쓸 때 가져오므로 가져오는 시간과 메모리를 측정에서 뺌
+    image_core.warm_up()
+    rss_before = current_rss()
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(img, method, colors)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(json.dumps({'time': elapsed, 'peak': peak, 'rss_growth': max_rss - rss_before}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megapixels', type=float, default=4)
+    parser.add_argument('--colors', type=int, default=16)
+    parser.add_argument('--methods', nargs='+', default=["threshold", "kmeans-fast", "quantize"])
+    parser.add_argument('--case', nargs=2, metavar=("METHOD", "VARIANT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        run_case(args.megapixels, args.case[0], args.colors, args.case[1])
+        return
+
+    print(f"{args.megapixels} MP RGBA, k={args.colors}")
+    print(f"{'method':>12} {'variant':>7} {'time (s)':>9} {'numpy peak':>11} {'RSS growth':>10}")
+    for method in args.methods:
+        for variant in ("before", "after"):
+            out = subprocess.run([sys.executable, __file__, '--megapixels', str(args.megapixels),
+                                  '--colors', str(args.colors), '--case', method, variant],
+                                 check=True, capture_output=True, text=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{method:>12} {variant:>7} {r['time']:9.2f} {r['peak'] / 2**20:8.0f} MB "
+                  f"{r['rss_growth'] / 2**20:7.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
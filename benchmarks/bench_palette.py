@@ -0,0 +1,66 @@
+"""고정 팔레트 스냅 벤치마크: 3D 룩업 테이블과 픽셀마다 거리를 계산하는 방식 비교
+
+룩업 테이블 칸 크기(bits)와 색 공간마다 테이블 생성 시간, 스냅 시간, 정확한 최근접
+색과 일치하는 픽셀 비율을 출력합니다.
+
+사용법:
+    python benchmarks/bench_palette.py --megapixels 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import image_core
+from synthetic import make_photo
+
+# 16색 브랜드 팔레트 예시
+BRAND_PALETTE = (
+    (0, 0, 0), (255, 255, 255), (200, 16, 46), (0, 48, 135), (0, 133, 202), (120, 190, 32),
+    (255, 205, 0), (237, 139, 0), (99, 102, 106), (166, 168, 171), (217, 217, 214), (112, 47, 138),
+    (0, 122, 83), (255, 163, 181), (139, 91, 41), (24, 48, 40),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megapixels', type=float, default=4)
+    parser.add_argument('--bits', type=int, nargs='+', default=[5, 6, 8])
+    args = parser.parse_args()
+
+    pixels = np.asarray(make_photo(args.megapixels).convert('RGB')).reshape(-1, 3)
+    palette = np.array(BRAND_PALETTE, dtype=np.uint8)
+    print(f"{len(pixels) / 1e6:.1f} MP photo, {len(palette)}-color palette")
+
+    exact = {}
+    for space in ("rgb", "lab"):
+        start = time.perf_counter()
+        if space == "rgb":
+            exact[space] = image_core.assign_nearest(pixels, palette)
+        else:
+            exact[space] = np.concatenate([
+                image_core.assign_nearest(image_core.rgb_to_lab(pixels[i:i + 1_000_000]),
+                                          image_core.rgb_to_lab(palette))
+                for i in range(0, len(pixels), 1_000_000)])
+        print(f"per-pixel nearest ({space}): {time.perf_counter() - start:7.3f} s")
+
+    print(f"{'space':>5} {'bits':>4} {'LUT size':>9} {'build (s)':>10} {'snap (s)':>9} {'exact match':>12}")
+    for space in ("rgb", "lab"):
+        for bits in args.bits:
+            start = time.perf_counter()
+            lut = image_core.palette_lut(BRAND_PALETTE, space, bits)
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            labels = image_core.lut_lookup(pixels, lut, bits)
+            snap = time.perf_counter() - start
+            match = (labels == exact[space]).mean()
+            print(f"{space:>5} {bits:4d} {lut.nbytes / 2**10:6.0f} KB {build:10.3f} {snap:9.3f} {match:11.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""영역 색상 변경 벤치마크: 이미지 전체 vs 선택 영역 / 이어진 영역 채우기
+
+큰 로고 이미지에서 같은 색 교체를 이미지 전체에 적용할 때와 일부 사각형 안에만 적용할 때,
+그리고 클릭한 점과 이어진 영역만 채울 때의 시간(교체 + 실행 취소 기록)을 비교합니다.
+영역 쪽은 결과 이미지를 만드는 복사 한 번 외에는 영역 크기에 비례해야 합니다.
+
+사용법:
+    python benchmarks/bench_region.py --megapixels 24 --fractions 0.01 0.1 0.5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import history
+import image_core
+from synthetic import make_logo
+
+NEW_COLOR = (255, 0, 0, 255)
+
+
+def best_of(repeat, func):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def whole(img, rules):
+    result = image_core.remap_colors(img, rules)
+    history.RecolorStep.between(img, result)
+    return result
+
+
+def in_rectangle(img, rules, fraction):
+    side = fraction ** 0.5
+    w, h = int(img.width * side), int(img.height * side)
+    box, mask = image_core.polygon_mask([(0, 0), (w, 0), (w, h), (0, h)], img.size)
+    result = image_core.recolor_region(img, box, mask, rules)
+    history.RecolorStep.within(img, result, box)
+    return result
+
+
+def flood(img, seed):
+    box, mask = image_core.flood_fill_mask(img, seed)
+    result = image_core.recolor_region(img, box, mask, [(img.getpixel(seed), NEW_COLOR)])
+    history.RecolorStep.within(img, result, box)
+    return mask.sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megapixels', type=float, default=24)
+    parser.add_argument('--fractions', type=float, nargs='+', default=[0.01, 0.1, 0.5],
+                        help="selected area as a fraction of the image")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    img = make_logo(args.megapixels)
+    target = img.getpixel((img.width // 2, img.height // 2))
+    rules = [(target, NEW_COLOR)]
+    print(f"{img.width}x{img.height} logo")
+
+    elapsed, _ = best_of(args.repeat, lambda: whole(img, rules))
+    print(f"{'whole image':>18}: {elapsed:7.3f} s")
+    for fraction in args.fractions:
+        elapsed, _ = best_of(args.repeat, lambda: in_rectangle(img, rules, fraction))
+        print(f"{f'rectangle {fraction:.0%}':>18}: {elapsed:7.3f} s")
+    for seed in ((img.width // 2, img.height // 2), (1, 1)):
+        elapsed, filled = best_of(args.repeat, lambda: flood(img, seed))
+        share = filled / (img.width * img.height)
+        print(f"{f'flood fill {share:.0%}':>18}: {elapsed:7.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""교체 표 벤치마크: 규칙마다 change_color를 반복하는 경우와 remap_colors 한 번 비교
+
+양자화된 스프라이트 시트처럼 색이 적은 이미지에서 규칙 수를 늘려가며 잽니다.
+각 규칙의 새 색상은 원본 팔레트에 없는 색이라 두 방식의 결과가 같아야 합니다.
+
+사용법:
+    python benchmarks/bench_remap.py --megapixels 4 --rules 1 10 30
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import image_core
+
+
+def make_sprite_sheet(megapixels, colors=32, seed=0):
+    """colors개의 불투명 색으로 된 8x8 블록 이미지"""
+    side = int((megapixels * 1_000_000) ** 0.5)
+    rng = np.random.default_rng(seed)
+    palette = rng.integers(0, 256, size=(colors, 4), dtype=np.uint8)
+    palette[:, 3] = 255
+    palette[:, 0] |= 1  # 새 색상(짝수 R)과 겹치지 않게
+    blocks = rng.integers(0, colors, size=(side // 8 + 1, side // 8 + 1))
+    labels = np.kron(blocks, np.ones((8, 8), dtype=np.int64))[:side, :side]
+    return Image.fromarray(palette[labels]), palette
+
+
+def best_of(repeat, fn):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def sequential(img, rules, tolerance):
+    for target_color, new_color in rules:
+        img = image_core.change_color(img, target_color, new_color, tolerance)
+    return img
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megapixels', type=float, default=4)
+    parser.add_argument('--rules', type=int, nargs='+', default=[1, 10, 30])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    img, palette = make_sprite_sheet(args.megapixels, colors=max(args.rules) + 2)
+    indexed = img.convert('RGB').quantize(len(palette), method=Image.Quantize.MAXCOVERAGE)
+    print(f"image: {img.width}x{img.height} ({img.width * img.height / 1e6:.2f} MP), {len(palette)} colors")
+    print(f"{'rules':>5} {'tol':>4} {'sequential':>11} {'remap':>9} {'P-mode LUT':>11} {'speedup':>8} identical")
+    for count in args.rules:
+        rules = [(tuple(int(v) for v in palette[i]), (2 * i, 0, 0, 255)) for i in range(count)]
+        for tolerance in (0, 4):
+            slow, expected = best_of(args.repeat, lambda: sequential(img, rules, tolerance))
+            fast, result = best_of(args.repeat, lambda: image_core.remap_colors(img, rules, tolerance))
+            lut, _ = best_of(args.repeat, lambda: image_core.remap_colors(indexed, rules, tolerance))
+            same = np.array_equal(np.asarray(expected), np.asarray(result))
+            print(f"{count:5d} {tolerance:4d} {slow * 1000:8.1f} ms {fast * 1000:6.1f} ms {lut * 1000:8.1f} ms "
+                  f"{slow / fast:7.1f}x {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""시작 시간 벤치마크: 모듈 가져오기와 첫 창 표시까지 걸리는 시간
+
+"before"는 예전처럼 시작할 때 cv2와 scikit-learn을 가져오는 경우를 흉내 내고,
+"after"는 현재 코드 그대로입니다. 각 측정은 새 파이썬 프로세스에서 하며, 프로세스
+시작부터 잽니다. 디스플레이가 없는 환경에서는 첫 창 시간을 건너뜁니다.
+
+사용법:
+    python benchmarks/bench_startup.py --repeat 5 --top 15
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EAGER_IMPORTS = "import cv2\nfrom sklearn.cluster import KMeans, MiniBatchKMeans\n"
+
+IMPORT_ONLY = "import ImageProcessor\n"
+
+FIRST_WINDOW = """
+import tkinter as tk
+import ImageProcessor
+root = tk.Tk()
+app = ImageProcessor.ImageProcessor(root)
+root.update()
+print("ready", flush=True)
+root.destroy()
+"""
+
+
+def run_once(code):
+    """code를 새 프로세스에서 실행하고 걸린 시간(초)을 반환합니다. 실패하면 None"""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    return elapsed if proc.returncode == 0 else None
+
+
+def best_of(repeat, code):
+    times = [run_once(code) for _ in range(repeat)]
+    return None if None in times else min(times)
+
+
+def import_report(top):
+    """-X importtime 출력에서 누적 시간이 큰 모듈 top개를 (모듈, 초) 목록으로 반환합니다."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', IMPORT_ONLY],
+                          cwd=ROOT, capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)", line)
+        # 최상위 두 단계(ImageProcessor와 그것이 직접 가져오는 모듈)만 표시
+        if match and len(match.group(2)) <= 2:
+            rows.append((match.group(3), int(match.group(1)) / 1e6))
+    return sorted(rows, key=lambda row: -row[1])[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help="best of N fresh processes")
+    parser.add_argument('--top', type=int, default=10, help="modules to list from -X importtime")
+    args = parser.parse_args()
+
+    baseline = best_of(args.repeat, "pass")
+    print(f"python -c pass: {baseline:.3f} s (interpreter start, included below)")
+    print(f"{'variant':>8} {'import (s)':>11} {'first window (s)':>17}")
+    for variant, prefix in (("before", EAGER_IMPORTS), ("after", "")):
+        imported = best_of(args.repeat, prefix + IMPORT_ONLY)
+        window = best_of(args.repeat, prefix + FIRST_WINDOW)
+        window_text = f"{window:17.3f}" if window is not None else f"{'n/a (no display)':>17}"
+        print(f"{variant:>8} {imported:11.3f} {window_text}")
+
+    print(f"\nSlowest imports of ImageProcessor (-X importtime, cumulative):")
+    for module, seconds in import_report(args.top):
+        print(f"  {seconds * 1000:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""색상 수 조정 벤치마크: 매번 새로 학습 vs 이전 결과에서 이어서 학습(warm start)
+
+Color Count를 한 칸씩 올렸다 내리는 순서로 양자화하면서 단계별 시간과 평균 제곱 오차
+(픽셀과 팔레트 색의 거리, 작을수록 좋음)를 비교합니다.
+
+사용법:
+    python benchmarks/bench_warm_start.py --megapixels 1 --counts 8 9 10 12 16 11 6
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import image_core
+from synthetic import make_photo
+
+
+def mse(img_array, labels, palette):
+    diff = img_array.astype(np.float32) - palette.astype(np.float32)[labels]
+    return float((diff ** 2).sum(axis=2).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megapixels', type=float, default=1)
+    parser.add_argument('--method', choices=list(image_core.WARM_START_METHODS), default="kmeans")
+    parser.add_argument('--counts', type=int, nargs='+', default=[8, 9, 10, 12, 16, 11, 6])
+    args = parser.parse_args()
+
+    image_core.warm_up()
+    img_array = np.asarray(make_photo(args.megapixels).convert('RGB'))
+    method = image_core.INDEXED_METHODS[args.method]
+    warm = image_core.WarmStart()
+    print(f"{img_array.shape[1]}x{img_array.shape[0]} photo, {args.method}")
+    print(f"{'k':>4} {'fresh (s)':>10} {'warm (s)':>9} {'fresh MSE':>10} {'warm MSE':>9}")
+    for k in args.counts:
+        start = time.perf_counter()
+        labels, palette = method(img_array, k)
+        fresh_time = time.perf_counter() - start
+        fresh_mse = mse(img_array, labels, palette)
+
+        start = time.perf_counter()
+        labels, palette = method(img_array, k, warm=warm)
+        warm_time = time.perf_counter() - start
+        warm_mse = mse(img_array, labels, palette)
+        print(f"{k:4d} {fresh_time:10.3f} {warm_time:9.3f} {fresh_mse:10.1f} {warm_mse:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""로컬 서버 부하 테스트: 동시 클라이언트 수별 처리량, 지연 시간, 거절(503) 수
+
+합성 사진 몇 장을 PNG로 만들어 여러 스레드에서 /quantize(또는 /recolor)로 계속 보냅니다.
+--start를 주면 서버를 하위 프로세스로 띄우고 끝나면 종료합니다. 성공한 응답의
+Server-Timing 헤더를 모아 단계별 평균 시간(ms)도 출력합니다.
+
+사용법:
+    python benchmarks/load_test.py --start --workers 2 --clients 1 4 16 --requests 40
+    python benchmarks/load_test.py --url http://127.0.0.1:8765 --endpoint recolor
+"""
+import argparse
+import io
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_photo
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_bodies(count, megapixels):
+    bodies = []
+    for seed in range(count):
+        buffer = io.BytesIO()
+        make_photo(megapixels, seed=seed).save(buffer, format='PNG', compress_level=1)
+        bodies.append(buffer.getvalue())
+    return bodies
+
+
+def parse_server_timing(value):
+    stages = {}
+    for entry in value.split(','):
+        name, _, duration = entry.strip().partition(';dur=')
+        if duration:
+            stages[name] = stages.get(name, 0.0) + float(duration)
+    return stages
+
+
+def wait_until_up(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url + "/health", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {url} did not start")
+
+
+def run_clients(url, bodies, clients, requests):
+    """requests개의 요청을 clients개 스레드로 보내고 (경과 시간, 지연 목록, 상태 코드별 수, 단계 합)을 반환합니다."""
+    latencies = []
+    statuses = defaultdict(int)
+    stage_totals = defaultdict(float)
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def client():
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            request = urllib.request.Request(url, data=bodies[index % len(bodies)], method='POST',
+                                             headers={'Content-Type': 'application/octet-stream'})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=300) as response:
+                    response.read()
+                    status, timing_header = response.status, response.headers.get('Server-Timing', "")
+            except urllib.error.HTTPError as e:
+                e.read()
+                status, timing_header = e.code, ""
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses[status] += 1
+                if status == 200:
+                    latencies.append(elapsed)
+                    for name, ms in parse_server_timing(timing_header).items():
+                        stage_totals[name] += ms
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies, statuses, stage_totals
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default="http://127.0.0.1:8765")
+    parser.add_argument('--endpoint', choices=["quantize", "recolor"], default="quantize")
+    parser.add_argument('--query', default=None,
+                        help="query string (default: method=kmeans-fast&colors=16, or a white-to-clear rule)")
+    parser.add_argument('--megapixels', type=float, default=0.5)
+    parser.add_argument('--images', type=int, default=8, help="distinct images to cycle through")
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--requests', type=int, default=40, help="requests per client count")
+    parser.add_argument('--start', action='store_true', help="start a server for the duration of the test")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="workers of the started server")
+    parser.add_argument('--queue', type=int, default=None, help="queue size of the started server")
+    args = parser.parse_args()
+
+    query = args.query or ("method=kmeans-fast&colors=16" if args.endpoint == "quantize"
+                           else "rule=255,255,255,255=0,0,0,0&tolerance=32")
+    url = f"{args.url.rstrip('/')}/{args.endpoint}?{query}"
+    bodies = make_bodies(args.images, args.megapixels)
+
+    server = None
+    if args.start:
+        port = args.url.rstrip('/').rsplit(':', 1)[-1]
+        command = [sys.executable, os.path.join(ROOT, "ImageProcessor.py"), "serve", "--quiet",
+                   "--port", port, "--workers", str(args.workers)]
+        if args.queue is not None:
+            command += ["--queue", str(args.queue)]
+        server = subprocess.Popen(command)
+    try:
+        wait_until_up(args.url.rstrip('/'))
+        print(f"{args.images} images of {args.megapixels} MP, POST {url}")
+        print(f"{'clients':>7} {'req/s':>7} {'p50 (s)':>8} {'p95 (s)':>8} {'max (s)':>8} {'503':>5} {'other':>5}")
+        for clients in args.clients:
+            elapsed, latencies, statuses, stage_totals = run_clients(url, bodies, clients, args.requests)
+            ok = statuses.get(200, 0)
+            other = sum(count for status, count in statuses.items() if status not in (200, 503))
+            print(f"{clients:7d} {ok / elapsed:7.2f} {percentile(latencies, 0.5):8.3f} "
+                  f"{percentile(latencies, 0.95):8.3f} {max(latencies, default=float('nan')):8.3f} "
+                  f"{statuses.get(503, 0):5d} {other:5d}")
+            if ok:
+                print("        stages (ms avg): " + ", ".join(
+                    f"{name} {total / ok:.1f}" for name, total in stage_totals.items()))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
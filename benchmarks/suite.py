@@ -0,0 +1,205 @@
+"""양자화/색상 교체 전체 벤치마크
+
+합성 입력(로고, 라인 아트, 사진) x 크기 x 색상 수 x 처리 방법마다 시간과
+최대 메모리(tracemalloc의 NumPy 할당 최대치, RSS 증가량)를 재서 JSON으로 저장합니다.
+각 경우는 새 프로세스에서 실행되므로 서로의 메모리 사용에 영향을 주지 않습니다.
+
+사용법:
+    # 기준 결과 저장
+    python benchmarks/suite.py --sizes 0.25 4 --output baseline.json
+    # 변경 후 비교 (느려지거나 메모리가 늘어난 경우 표시하고 종료 코드 1)
+    python benchmarks/suite.py --sizes 0.25 4 --output new.json --compare baseline.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import image_core
+from synthetic import INPUTS, make_palette
+
+DEFAULT_SIZES = [0.25, 4, 16, 64]
+DEFAULT_COLORS = [4, 16, 64]
+DEFAULT_METHODS = list(image_core.METHODS) + ["change_color"]
+METRICS = ("time", "numpy_peak", "rss_growth")
+
+
+def current_rss():
+    """현재 RSS (바이트). /proc가 없는 환경에서는 0"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return 0
+
+
+def max_rss():
+    """최대 RSS (바이트). resource 모듈이 없는 환경(Windows)에서는 0"""
+    try:
+        import resource
+    except ImportError:
+        return 0
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 바이트, Linux는 KB 단위
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+def run_case(input_name, megapixels, method, colors, repeat):
+    """하나의 경우를 현재 프로세스에서 실행하고 측정값을 반환합니다."""
+    img = INPUTS[input_name](megapixels)
+    if method == "change_color":
+        target = img.getpixel((0, 0))
+        def operation():
+            image_core.change_color(img, target, (0, 255, 0, 255), tolerance=8)
+    else:
+        # 고정 팔레트 방법은 색상 수만큼의 합성 팔레트로 측정
+        options = {'palette': make_palette(colors)} if method == "palette" else {}
+        def operation():
+            image_core.quantize_image(img, method, colors, **options)
+
+    # scikit-learn은 처음 쓸 때 가져오므로 가져오는 시간과 메모리를 측정에서 뺌
+    image_core.warm_up()
+    rss_before = current_rss()
+    tracemalloc.start()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        best = min(best, time.perf_counter() - start)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'time': best,
+        'numpy_peak': peak,
+        'rss_growth': max(0, max_rss() - rss_before) if rss_before else None,
+        'pixels': img.width * img.height,
+    }
+
+
+def iter_cases(args):
+    for input_name in args.inputs:
+        for megapixels in args.sizes:
+            for method in args.methods:
+                # change_color는 색상 수와 무관
+                for colors in ([None] if method == "change_color" else args.colors):
+                    yield input_name, megapixels, method, colors
+
+
+def case_key(r):
+    return (r['input'], r['megapixels'], r['method'], r['colors'])
+
+
+def compare(results, baseline, tolerance, min_time):
+    """기준 대비 tolerance 비율 이상 나빠진 항목을 출력하고 개수를 반환합니다."""
+    base = {case_key(r): r for r in baseline['results']}
+    regressions = 0
+    print(f"\nComparison against baseline ({baseline['meta'].get('date', '?')}), tolerance {tolerance:.0%}:")
+    for r in results:
+        old = base.get(case_key(r))
+        if old is None or r.get('status') != 'ok' or old.get('status') != 'ok':
+            continue
+        flags = []
+        for metric in METRICS:
+            new_value, old_value = r.get(metric), old.get(metric)
+            if new_value is None or not old_value:
+                continue
+            # 아주 짧은 시간은 측정 잡음이 크므로 절대 차이도 함께 확인
+            if metric == "time" and new_value - old_value < min_time:
+                continue
+            change = new_value / old_value - 1
+            if change > tolerance:
+                flags.append(f"{metric} {change:+.0%}")
+        if flags:
+            regressions += 1
+            print(f"  REGRESSION {r['input']:>8} {r['megapixels']:>6} MP {r['method']:>12} "
+                  f"k={r['colors']}: " + ", ".join(flags))
+    print(f"{regressions} regression(s)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--inputs', nargs='+', choices=list(INPUTS), default=list(INPUTS))
+    parser.add_argument('--sizes', nargs='+', type=float, default=DEFAULT_SIZES, metavar="MP")
+    parser.add_argument('--colors', nargs='+', type=int, default=DEFAULT_COLORS)
+    parser.add_argument('--methods', nargs='+', choices=DEFAULT_METHODS, default=DEFAULT_METHODS)
+    parser.add_argument('--repeat', type=int, default=1, help="best of N runs per case")
+    parser.add_argument('--timeout', type=float, default=600, help="seconds per case before it is skipped")
+    parser.add_argument('--output', default="bench_results.json")
+    parser.add_argument('--compare', metavar="BASELINE_JSON")
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help="relative slowdown/memory growth reported as a regression (default: 0.15)")
+    parser.add_argument('--min-time', type=float, default=0.02,
+                        help="ignore time regressions smaller than this many seconds")
+    parser.add_argument('--case', nargs=5, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        input_name, megapixels, method, colors, repeat = args.case
+        colors = None if colors == "-" else int(colors)
+        print(json.dumps(run_case(input_name, float(megapixels), method, colors, int(repeat))))
+        return 0
+
+    import numpy
+    import PIL
+    import sklearn
+    meta = {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'pillow': PIL.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+    results = []
+    print(f"{'input':>8} {'MP':>6} {'method':>12} {'k':>4} {'time (s)':>9} {'numpy peak':>11} {'RSS growth':>10}")
+    for input_name, megapixels, method, colors in iter_cases(args):
+        record = {'input': input_name, 'megapixels': megapixels, 'method': method, 'colors': colors}
+        command = [sys.executable, os.path.abspath(__file__), '--case', input_name, str(megapixels),
+                   method, "-" if colors is None else str(colors), str(args.repeat)]
+        try:
+            proc = subprocess.run(command, capture_output=True, text=True, timeout=args.timeout)
+        except subprocess.TimeoutExpired:
+            record['status'] = 'timeout'
+        else:
+            if proc.returncode == 0:
+                record.update(json.loads(proc.stdout.strip().splitlines()[-1]))
+                record['status'] = 'ok'
+            else:
+                record['status'] = 'error'
+                record['error'] = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else ''
+        results.append(record)
+
+        k = "-" if colors is None else colors
+        if record['status'] == 'ok':
+            rss = f"{record['rss_growth'] / 2**20:7.0f} MB" if record['rss_growth'] is not None else "    n/a"
+            print(f"{input_name:>8} {megapixels:>6} {method:>12} {k:>4} {record['time']:9.3f} "
+                  f"{record['numpy_peak'] / 2**20:8.1f} MB {rss}", flush=True)
+        else:
+            print(f"{input_name:>8} {megapixels:>6} {method:>12} {k:>4} {record['status'].upper()} "
+                  f"{record.get('error', '')}", flush=True)
+
+    with open(args.output, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    print(f"\nSaved {len(results)} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance, args.min_time):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""벤치마크용 결정적(seed 고정) 합성 이미지
+
+모두 RGBA PIL 이미지를 반환하며, 같은 인자면 항상 같은 픽셀을 만듭니다.
+큰 크기에서도 생성 과정의 메모리가 측정 대상보다 커지지 않도록 행 단위로 만듭니다.
+"""
+import numpy as np
+from PIL import Image, ImageDraw
+
+
+def _side(megapixels):
+    return max(16, int((megapixels * 1_000_000) ** 0.5))
+
+
+def make_logo(megapixels, seed=0):
+    """몇 가지 단색 영역으로 이루어진 로고/스크린샷 (고유 색상 수가 매우 적음)"""
+    side = _side(megapixels)
+    rng = np.random.default_rng(seed)
+    palette = rng.integers(0, 256, size=(6, 4), dtype=np.uint8)
+    palette[:, 3] = 255
+    img = Image.new('RGBA', (side, side), tuple(int(v) for v in palette[0]))
+    draw = ImageDraw.Draw(img)
+    for i in range(24):
+        x0, y0 = (rng.random(2) * side * 0.8).astype(int)
+        w, h = (rng.random(2) * side * 0.4 + side * 0.05).astype(int)
+        color = tuple(int(v) for v in palette[1 + i % 5])
+        if i % 2:
+            draw.rectangle((x0, y0, x0 + w, y0 + h), fill=color)
+        else:
+            draw.ellipse((x0, y0, x0 + w, y0 + h), fill=color)
+    return img
+
+
+def make_line_art(megapixels, seed=0):
+    """흰 배경 위 안티앨리어싱된 검은 선 (경계에 중간색이 많음)"""
+    side = _side(megapixels)
+    rng = np.random.default_rng(seed)
+    # 2배 크기로 그린 뒤 줄여서 안티앨리어싱 효과를 냄 (L 모드라 픽셀당 1바이트)
+    big = Image.new('L', (side * 2, side * 2), 255)
+    draw = ImageDraw.Draw(big)
+    for _ in range(60):
+        points = [tuple(p) for p in (rng.random((4, 2)) * side * 2).astype(int)]
+        draw.line(points, fill=0, width=max(2, side // 150))
+    gray = big.resize((side, side), Image.Resampling.BOX)
+    del big, draw
+    ink = Image.new('RGBA', (side, side), (20, 20, 60, 255))
+    paper = Image.new('RGBA', (side, side), (255, 255, 255, 255))
+    return Image.composite(paper, ink, gray)
+
+
+def make_photo(megapixels, seed=0):
+    """부드러운 그라디언트와 센서 노이즈가 섞인 사진 (고유 색상이 매우 많음)"""
+    side = _side(megapixels)
+    rng = np.random.default_rng(seed)
+    ramp = np.linspace(0, 1, side, dtype=np.float32)
+    rgba = np.empty((side, side, 4), dtype=np.uint8)
+    rgba[..., 3] = 255
+    for y in range(side):
+        noise = rng.normal(0, 8, size=(3, side)).astype(np.float32)
+        rgba[y, :, 0] = np.clip(128 + 100 * np.sin(6 * ramp + 2 * ramp[y]) + noise[0], 0, 255)
+        rgba[y, :, 1] = np.clip(128 + 90 * np.cos(4 * ramp[y] - 3 * ramp * ramp[y]) + noise[1], 0, 255)
+        rgba[y, :, 2] = np.clip(255 * (0.5 * ramp + 0.5 * ramp[y] ** 2) + noise[2], 0, 255)
+    return Image.fromarray(rgba)
+
+
+def make_palette(color_count, seed=0):
+    """"palette" 방법용 고정 팔레트: 서로 다른 RGB 튜플 color_count개"""
+    rng = np.random.default_rng(seed)
+    colors = {}
+    while len(colors) < color_count:
+        colors.setdefault(tuple(int(v) for v in rng.integers(0, 256, 3)), None)
+    return list(colors)
+
+
+INPUTS = {
+    "logo": make_logo,
+    "line-art": make_line_art,
+    "photo": make_photo,
+}
@@ -0,0 +1,109 @@
+"""결과 이미지 저장: 색이 적은 이미지는 팔레트(P 모드) PNG/GIF로 씁니다.
+
+양자화 결과는 보통 8~16색인데 RGBA PNG로 쓰면 픽셀당 4바이트를 압축하게 되어 파일이
+크고 인코딩도 느립니다. 색(알파 포함)이 256개 이하이면 팔레트 인덱스(픽셀당 1바이트,
+16색 이하면 PNG는 4비트)와 tRNS 알파 표로 저장합니다.
+"""
+import os
+import zlib
+
+import numpy as np
+from PIL import Image
+
+import image_core
+import timing
+
+# 속도/크기 프리셋
+# compress_level: zlib 압축 수준(0~9), strategy: zlib 전략, optimize: Pillow의 추가 최적화 패스
+# (Pillow는 PNG 행 필터를 고를 수 없으므로 필터 대신 zlib 전략을 조정)
+PRESETS = {
+    "fast": {'compress_level': 1, 'strategy': zlib.Z_RLE, 'optimize': False},
+    "balanced": {'compress_level': 6, 'strategy': zlib.Z_DEFAULT_STRATEGY, 'optimize': False},
+    "smallest": {'compress_level': 9, 'strategy': zlib.Z_DEFAULT_STRATEGY, 'optimize': True},
+}
+DEFAULT_PRESET = "balanced"
+
+INDEXED_EXTENSIONS = ('.png', '.gif')
+NO_ALPHA_EXTENSIONS = ('.jpg', '.jpeg', '.bmp')
+
+
+def _index_pixels(packed, keys, chunk_size=image_core.ASSIGN_CHUNK_SIZE):
+    """packed uint32 픽셀마다 정렬된 keys에서의 위치(uint8)를 구합니다. 모든 픽셀이 keys에 있어야 함"""
+    labels = np.empty(len(packed), dtype=np.uint8)
+    for start in range(0, len(packed), chunk_size):
+        labels[start:start + chunk_size] = np.searchsorted(keys, packed[start:start + chunk_size])
+    return labels
+
+
+def to_indexed(img, max_colors=256, binary_alpha=False):
+    """색(알파 포함)이 max_colors개 이하인 이미지를 P 모드로 바꿉니다. 더 많으면 None
+
+    알파가 있으면 팔레트 항목마다 알파를 transparency(tRNS)로 붙입니다.
+    binary_alpha(GIF)이면 알파를 128 기준으로 완전 투명/불투명으로 나누고, 투명 픽셀은
+    모두 인덱스 0 하나로 모읍니다.
+    """
+    if img.mode == 'P':
+        return img
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    opaque = img.getchannel('A').getextrema() == (255, 255)
+
+    rgba = np.asarray(img)
+    if binary_alpha and not opaque:
+        rgba = rgba.copy()
+        transparent = rgba[..., 3] < 128
+        rgba[transparent] = 0
+        rgba[~transparent, 3] = 255
+        img = Image.fromarray(rgba)
+    colors = img.getcolors(max_colors)
+    if colors is None:
+        return None
+
+    # 알파가 작은 항목을 앞에 두어 tRNS 표(끝의 불투명 항목은 생략 가능)를 짧게 함
+    table = np.array([color for _, color in colors], dtype=np.uint8)
+    table = table[np.argsort(table[:, 3], kind='stable')]
+    keys = table.view(np.uint32)[:, 0]
+    order = np.argsort(keys)
+    labels = _index_pixels(rgba.view(np.uint32).reshape(-1), keys[order])
+    # 정렬된 키 위치를 팔레트 순서의 인덱스로 되돌림
+    labels = order.astype(np.uint8)[labels].reshape(rgba.shape[:2])
+
+    indexed = Image.fromarray(labels)
+    indexed.putpalette(table[:, :3].tobytes())
+    if binary_alpha and table[0, 3] == 0:
+        indexed.info['transparency'] = 0
+    elif not binary_alpha and not opaque:
+        indexed.info['transparency'] = table[:, 3].tobytes()
+    return indexed
+
+
+def save_options(ext, mode, preset=DEFAULT_PRESET):
+    """확장자, 이미지 모드와 프리셋에 맞는 Pillow save() 인자"""
+    settings = PRESETS[preset]
+    if ext == '.png':
+        # PNG optimize는 사진에서는 파일을 줄이지만 단색 면이 많은 팔레트 이미지는 오히려 키움
+        return {'compress_level': settings['compress_level'], 'compress_type': settings['strategy'],
+                'optimize': settings['optimize'] and mode != 'P'}
+    if ext == '.gif':
+        return {'optimize': settings['optimize']}
+    return {}
+
+
+def save_image(img, path, preset=DEFAULT_PRESET, indexed=True, ext=None):
+    """img를 path에 저장하고 실제로 쓴 이미지 모드를 반환합니다.
+
+    indexed이면 PNG/GIF는 가능한 경우 팔레트(P 모드)로 씁니다. JPEG 등 알파 채널을
+    지원하지 않는 형식은 RGB로 변환합니다. path가 파일 객체이면 ext(".png" 등)로 형식을 정합니다.
+    """
+    ext = (ext or os.path.splitext(path)[1]).lower()
+    if ext in NO_ALPHA_EXTENSIONS:
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+    elif indexed and ext in INDEXED_EXTENSIONS:
+        with timing.span("index"):
+            paletted = to_indexed(img, binary_alpha=(ext == '.gif'))
+        if paletted is not None:
+            img = paletted
+    with timing.span("encode"):
+        img.save(path, format=Image.registered_extensions().get(ext), **save_options(ext, img.mode, preset))
+    return img.mode
@@ -0,0 +1,191 @@
+"""여러 프레임 이미지(애니메이션 GIF/APNG/WebP, 여러 페이지 TIFF) 처리
+
+Image.open(...).convert('RGBA')는 첫 프레임만 남기므로, 모든 프레임을 차례로 읽어서
+같은 설정으로 처리하고 원래 프레임 길이(duration)와 반복 횟수(loop)로 다시 저장합니다.
+
+1. 모든 프레임에서 고르게 뽑은 표본으로 팔레트를 한 번만 학습합니다. 프레임마다 따로
+   학습하면 같은 물체의 색이 프레임마다 달라져 깜빡거립니다.
+2. 프레임을 하나씩 디코딩해 프로세스 풀에서 팔레트 할당과 색상 교체를 하고, 끝난 순서가
+   아니라 프레임 순서대로 인코더에 넘깁니다. 동시에 메모리에 있는 프레임은 워커 수의 두 배까지입니다.
+
+TIFF는 프레임마다 바로 파일에 쓰지만, Pillow의 GIF/WebP 인코더는 프레임 사이의 차이를
+계산하려고 넘겨받은 프레임을 끝까지 들고 있고 (GIF는 팔레트 프레임이라 픽셀당 1바이트),
+APNG 인코더는 프레임 목록을 두 번 훑으므로 처리한 프레임을 모두 모은 뒤에 넘깁니다.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import numpy as np
+from PIL import Image
+
+import export
+import image_core
+import timing
+
+# save_all로 여러 프레임을 쓸 수 있는 출력 형식
+ANIMATED_EXTENSIONS = ('.gif', '.png', '.apng', '.webp', '.tif', '.tiff')
+
+# 프레임을 애니메이션으로 읽는 입력 형식 (TIFF는 frame_count()에서 따로 처리)
+ANIMATED_FORMATS = ('GIF', 'PNG', 'WEBP')
+
+
+def frame_count(img):
+    """함께 처리할 프레임 수
+
+    애니메이션 GIF/PNG/WebP의 프레임과, 첫 페이지와 크기가 같은 (앞쪽부터 이어진) TIFF
+    페이지만 프레임으로 셉니다. 피라미드 TIFF의 축소 페이지나 MPO(카메라 JPEG, 본 이미지 +
+    내장 미리보기)의 추가 이미지는 같은 그림의 다른 해상도이므로 한 장으로 봅니다.
+    """
+    if img.format == 'TIFF':
+        sizes = image_core.tiff_page_sizes(img)
+        count = 1
+        while count < len(sizes) and sizes[count] == sizes[0]:
+            count += 1
+        return count
+    if img.format in ANIMATED_FORMATS and getattr(img, 'is_animated', False):
+        return img.n_frames
+    return 1
+
+
+def iter_frames(img):
+    """프레임을 하나씩 디코딩해 RGBA 배열로 반환합니다 (GIF 등은 이전 프레임과 합성된 전체 프레임)."""
+    for index in range(frame_count(img)):
+        img.seek(index)
+        yield np.asarray(img.convert('RGBA'))
+
+
+def frame_durations(img):
+    """프레임별 표시 시간(ms) 목록. 정보가 없는 형식(TIFF)이면 None"""
+    durations = []
+    for index in range(frame_count(img)):
+        img.seek(index)
+        durations.append(img.info.get('duration'))
+    img.seek(0)
+    if all(duration is None for duration in durations):
+        return None
+    return [duration or 0 for duration in durations]
+
+
+def sample_frames(img, sample_size):
+    """모든 프레임에서 격자 간격으로 뽑은 불투명 픽셀 표본 (1, n, 3) uint8"""
+    per_frame = max(1, sample_size // frame_count(img))
+    samples = []
+    for rgba in iter_frames(img):
+        stride = max(1, int(np.sqrt(rgba.shape[0] * rgba.shape[1] / per_frame)))
+        pixels = rgba[::stride, ::stride].reshape(-1, 4)
+        # 투명 픽셀의 RGB는 보이지 않는 값(보통 검정)이라 팔레트를 치우치게 함
+        opaque = pixels[pixels[:, 3] >= 128]
+        samples.append((opaque if len(opaque) else pixels)[:, :3])
+    return np.concatenate(samples).reshape(1, -1, 3)
+
+
+def shared_palette(img, method, color_count, sample_size=image_core.DEFAULT_SAMPLE_SIZE, **options):
+    """모든 프레임에 함께 쓸 uint8 팔레트. 팔레트를 만들지 않는 방법이면 None"""
+    if method == "palette":
+        return np.array(options['palette'], dtype=np.uint8).reshape(-1, 3)
+    if method not in image_core.INDEXED_METHODS:
+        return None
+    with timing.span("sample.frames"):
+        sample = sample_frames(img, sample_size)
+    with timing.span("fit"):
+        return image_core.fit_sample_palette(sample, method, color_count, **options)
+
+
+def process_frame(rgba, job):
+    """워커 프로세스: 프레임 하나에 공유 팔레트와 교체 규칙을 적용해 저장할 이미지를 반환합니다."""
+    method, color_count, palette, replace, tolerance, metric, options, ext = job
+    rgb = rgba[..., :3]
+    if palette is not None:
+        if method == "palette":
+            labels = image_core.palette_indexed(rgb, color_count, **options)[0]
+        else:
+            labels = image_core.assign_nearest(rgb.reshape(-1, 3), palette).reshape(rgb.shape[:2])
+        processed = palette[labels]
+    elif method == "threshold":
+        processed = image_core.process_with_threshold(rgb, color_count)
+    else:
+        processed = rgb
+    out = np.dstack((processed, rgba[..., 3]))
+    image_core.remap_rgba(out, replace, tolerance, metric)
+
+    frame = Image.fromarray(out)
+    if ext == '.gif':
+        # GIF 인코더가 RGBA 프레임을 스스로 양자화하지 않도록 정확한 팔레트 프레임으로 넘김
+        frame = export.to_indexed(frame, binary_alpha=True) or frame
+    return frame
+
+
+def _ordered(func, items, workers):
+    """func(*item) 결과를 items 순서대로 반환합니다. 동시에 제출하는 작업은 워커 수의 두 배까지"""
+    if workers <= 1:
+        for item in items:
+            yield func(*item)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(func, *item))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def process_file_frames(src_path, dst_path, method, color_count, replace=(), tolerance=0,
+                        metric="channel", workers=1, sample_size=image_core.DEFAULT_SAMPLE_SIZE,
+                        preset=export.DEFAULT_PRESET, progress=None, **options):
+    """src_path의 모든 프레임을 처리해 dst_path에 여러 프레임으로 저장하고 프레임 수를 반환합니다.
+
+    method가 "none"이면 색상 교체만 합니다. workers가 1보다 크면 프레임을 프로세스 풀에서 처리합니다.
+    """
+    if method != "none" and method not in image_core.METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    ext = os.path.splitext(dst_path)[1].lower()
+    if ext not in ANIMATED_EXTENSIONS:
+        raise ValueError(f"{ext or dst_path} cannot store multiple frames")
+    report = progress or image_core._no_progress
+
+    with Image.open(src_path) as img:
+        count = frame_count(img)
+        loop = img.info.get('loop')
+        durations = frame_durations(img)
+        report(0.0, f"Fitting shared {method} palette over {count} frames")
+        palette = shared_palette(img, method, color_count, sample_size, **options)
+
+    job = (method, color_count, palette, list(replace), tolerance, metric, options, ext)
+
+    def frame_jobs(img):
+        for rgba in iter_frames(img):
+            yield rgba, job
+
+    def results(img):
+        for index, frame in enumerate(_ordered(process_frame, frame_jobs(img), workers)):
+            report(0.1 + 0.9 * index / count, f"Frame {index + 1}/{count}")
+            yield frame
+
+    with Image.open(src_path) as img:
+        frames = results(img)
+        first = next(frames)
+        params = export.save_options('.png' if ext == '.apng' else ext, first.mode, preset)
+        if ext in ('.png', '.apng'):
+            frames = list(frames)
+            params['format'] = 'PNG'
+        elif ext == '.webp':
+            # 기본값인 손실 압축은 양자화한 색을 다시 흐트러뜨림
+            params['lossless'] = True
+        params.update(save_all=True, append_images=frames)
+        if ext != '.tif' and ext != '.tiff':
+            if durations is not None:
+                params['duration'] = durations
+            if loop is not None:
+                params['loop'] = loop
+        try:
+            with timing.span("frames"):
+                first.save(dst_path, **params)
+        except BaseException:
+            # 취소되거나 실패하면 반쯤 쓴 파일을 남기지 않음
+            if os.path.exists(dst_path):
+                os.remove(dst_path)
+            raise
+    return count
@@ -0,0 +1,254 @@
+"""편집 기록 (실행 취소/다시 실행)
+
+단계마다 RGBA 전체를 복사하지 않고 단계 종류에 맞는 작은 형태로 저장합니다.
+
+- RecolorStep: 바뀐 픽셀의 비트마스크(픽셀당 1비트)와 (이전 색, 새 색) 쌍 표,
+  바뀐 픽셀마다 그 표의 인덱스(1~4바이트). 양쪽 방향으로 적용할 수 있습니다.
+- QuantizeStep: 원본을 양자화한 결과를 라벨 배열 + 팔레트로 저장합니다 (알파는
+  원본에서 가져옴). threshold처럼 빠르고 결정적인 방법은 설정만 저장해서 다시 계산합니다.
+
+양자화는 되돌릴 수 없으므로 QuantizeStep을 취소할 때는 그 이전의 기준 상태(원본이나
+이전 QuantizeStep)에서 색상 교체 단계들을 다시 적용해 이전 상태를 만듭니다.
+
+메모리 한도를 넘으면 가장 오래된 단계부터 "기준 상태"로 접어 넣어 버립니다. 기준
+상태는 원본 또는 QuantizeStep 하나와, 그 위에 누적된 색상 교체를 합친 RecolorStep
+하나로 이루어집니다.
+
+환경 변수:
+    IMAGEPROCESSOR_HISTORY_MB   기록 메모리 한도 (MB, 기본 512)
+"""
+import os
+
+import numpy as np
+from PIL import Image
+
+import image_core
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def _packed_copy(img):
+    """이미지를 RGBA 배열로 복사하고 (배열, 픽셀별 uint32 뷰)를 반환합니다."""
+    rgba = np.array(img if img.mode == 'RGBA' else img.convert('RGBA'))
+    return rgba, rgba.view(np.uint32).reshape(-1)
+
+
+class RecolorStep:
+    """바뀐 픽셀만 저장하는 되돌릴 수 있는 단계"""
+
+    def __init__(self, pixel_count, mask_bits, pairs, index):
+        self.pixel_count = pixel_count
+        self.mask_bits = mask_bits  # np.packbits(바뀐 픽셀 마스크)
+        self.pairs = pairs          # (m, 2) uint32: 열 0 = 이전 색, 열 1 = 새 색
+        self.index = index          # 바뀐 픽셀마다 pairs의 행 번호
+
+    @classmethod
+    def between(cls, before, after):
+        """두 이미지(같은 크기)의 차이로 단계를 만듭니다."""
+        old_all = np.asarray(before if before.mode == 'RGBA' else before.convert('RGBA')).view(np.uint32).reshape(-1)
+        new_all = np.asarray(after if after.mode == 'RGBA' else after.convert('RGBA')).view(np.uint32).reshape(-1)
+        changed = old_all != new_all
+        positions = np.flatnonzero(changed)
+        return cls._from_colors(len(changed), np.packbits(changed), old_all[positions], new_all[positions])
+
+    @classmethod
+    def within(cls, before, after, box):
+        """두 이미지가 box (x0, y0, x1, y1) 안에서만 다를 때 상자 부분만 비교해서 단계를 만듭니다."""
+        x0, y0, _, y1 = box
+        width = before.width
+        pixel_count = width * before.height
+        old_box = np.asarray(before.crop(box).convert('RGBA')).view(np.uint32)[..., 0]
+        new_box = np.asarray(after.crop(box).convert('RGBA')).view(np.uint32)[..., 0]
+        ys, xs = np.nonzero(old_box != new_box)
+        # 상자가 걸친 행들(바이트 경계로 넓힘)의 비트만 만들어 전체 비트마스크에 채움
+        start = y0 * width // 8
+        end = -(-y1 * width // 8)
+        rows = np.zeros((end - start) * 8, dtype=bool)
+        # 상자 안의 행 우선 순서는 전체 이미지의 픽셀 순서와 같음
+        rows[(ys + y0) * width + (xs + x0) - start * 8] = True
+        mask_bits = np.zeros(-(-pixel_count // 8), dtype=np.uint8)
+        mask_bits[start:end] = np.packbits(rows)
+        return cls._from_colors(pixel_count, mask_bits, old_box[ys, xs], new_box[ys, xs])
+
+    @classmethod
+    def _from_colors(cls, pixel_count, mask_bits, old, new):
+        """바뀐 픽셀 비트마스크(np.packbits)와 그 픽셀들의 이전/새 색(uint32)으로 단계를 만듭니다."""
+        # (이전 색, 새 색)을 uint64 하나로 묶어 고유한 쌍만 표에 남김
+        keys = old.astype(np.uint64)
+        keys <<= 32
+        keys |= new
+        unique_keys, index = np.unique(keys, return_inverse=True)
+        pairs = np.empty((len(unique_keys), 2), dtype=np.uint32)
+        pairs[:, 0] = unique_keys >> 32
+        pairs[:, 1] = unique_keys & 0xFFFFFFFF
+        if len(pairs) <= 256:
+            index = index.astype(np.uint8)
+        elif len(pairs) <= 65536:
+            index = index.astype(np.uint16)
+        else:
+            index = index.astype(np.uint32)
+        return cls(pixel_count, mask_bits, pairs, index.reshape(-1))
+
+    def then(self, other):
+        """이 단계 다음에 other를 적용한 것과 같은 단계 하나를 만듭니다 (이미지 없이 합성)."""
+        mine = np.unpackbits(self.mask_bits, count=self.pixel_count).view(bool)
+        theirs = np.unpackbits(other.mask_bits, count=other.pixel_count).view(bool)
+        union = np.flatnonzero(mine | theirs)
+        in_mine, in_theirs = mine[union], theirs[union]
+        del mine, theirs
+        # 이전 색은 먼저 바뀐 쪽(self), 새 색은 나중에 바뀐 쪽(other)을 우선
+        old = np.empty(len(union), dtype=np.uint32)
+        old[in_mine] = self.pairs[:, 0][self.index]
+        old[~in_mine] = other.pairs[:, 0][other.index][~in_mine[in_theirs]]
+        new = np.empty(len(union), dtype=np.uint32)
+        new[in_theirs] = other.pairs[:, 1][other.index]
+        new[~in_theirs] = self.pairs[:, 1][self.index][~in_theirs[in_mine]]
+        # 두 단계를 거쳐 원래 색으로 돌아온 픽셀은 제외
+        keep = old != new
+        changed = np.zeros(self.pixel_count, dtype=bool)
+        changed[union[keep]] = True
+        return self._from_colors(self.pixel_count, np.packbits(changed), old[keep], new[keep])
+
+    @property
+    def nbytes(self):
+        return self.mask_bits.nbytes + self.pairs.nbytes + self.index.nbytes
+
+    def _apply(self, img, column):
+        rgba, packed = _packed_copy(img)
+        positions = np.flatnonzero(np.unpackbits(self.mask_bits, count=self.pixel_count))
+        packed[positions] = self.pairs[:, column][self.index]
+        return Image.fromarray(rgba)
+
+    def undo(self, img):
+        return self._apply(img, 0)
+
+    def redo(self, img):
+        return self._apply(img, 1)
+
+
+class QuantizeStep:
+    """원본을 양자화한 단계. 결과는 원본만 있으면 다시 만들 수 있습니다."""
+
+    def __init__(self, method, color_count, labels=None, palette=None, options=None):
+        self.method = method
+        self.color_count = color_count
+        self.options = options or {}
+        self.labels = labels
+        self.palette = palette
+
+    @classmethod
+    def compute(cls, original, method, color_count, progress=None, cache=None, warm_start=False, **options):
+        """양자화를 실행해 단계를 만듭니다. 결과 이미지는 step.image(original)로 얻습니다."""
+        if method not in image_core.INDEXED_METHODS:
+            return cls(method, color_count, options=options)
+        labels, palette = image_core.quantize_labels(original, method, color_count, progress=progress,
+                                                     cache=cache, warm_start=warm_start, **options)
+        return cls(method, color_count, labels, palette)
+
+    @property
+    def nbytes(self):
+        if self.labels is None:
+            return 0
+        return self.labels.nbytes + self.palette.nbytes
+
+    def image(self, original):
+        if self.labels is None:
+            return image_core.quantize_image(original, self.method, self.color_count, **self.options)
+        return image_core.indexed_to_image(self.labels, self.palette, image_core.source_alpha(original))
+
+
+class History:
+    """실행 취소/다시 실행 스택
+
+    position은 현재 상태까지 적용된 단계 수입니다. push()는 현재 위치 뒤의
+    (다시 실행할 수 있던) 단계들을 버리고 새 단계를 추가합니다.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.reset(None)
+
+    @classmethod
+    def from_env(cls):
+        max_mb = int(os.environ.get('IMAGEPROCESSOR_HISTORY_MB', DEFAULT_MAX_BYTES // (1024 * 1024)))
+        return cls(max_bytes=max_mb * 1024 * 1024)
+
+    def reset(self, original):
+        """새 원본 이미지로 기록을 비웁니다."""
+        self.original = original
+        self.steps = []
+        self.position = 0
+        # 가장 오래된 단계 이전 상태 = 기준 키프레임(None이면 원본) + 누적 색상 교체
+        self.base_key = None
+        self.base_delta = None
+
+    @property
+    def can_undo(self):
+        return self.position > 0
+
+    @property
+    def can_redo(self):
+        return self.position < len(self.steps)
+
+    @property
+    def nbytes(self):
+        total = sum(step.nbytes for step in self.steps)
+        if self.base_key is not None:
+            total += self.base_key.nbytes
+        if self.base_delta is not None:
+            total += self.base_delta.nbytes
+        return total
+
+    def push(self, step):
+        """새 단계를 기록합니다 (다시 실행할 단계는 버려짐)."""
+        del self.steps[self.position:]
+        self.steps.append(step)
+        self.position += 1
+        self._evict()
+
+    def undo(self, current):
+        """현재 이미지(current)에서 한 단계 되돌린 이미지를 반환합니다."""
+        step = self.steps[self.position - 1]
+        self.position -= 1
+        if self.position == 0 and self.base_key is None and self.base_delta is None:
+            return self.original
+        if isinstance(step, RecolorStep):
+            return step.undo(current)
+        return self.state(self.position)
+
+    def redo(self, current):
+        """한 단계 다시 실행한 이미지를 반환합니다."""
+        step = self.steps[self.position]
+        self.position += 1
+        if isinstance(step, RecolorStep):
+            return step.redo(current)
+        return step.image(self.original)
+
+    def state(self, count):
+        """단계 count개를 적용한 상태를 만듭니다. 원본 상태면 원본 객체 그대로 반환합니다."""
+        # 가장 가까운 이전 키프레임(QuantizeStep)에서 시작해 색상 교체만 다시 적용
+        start = 0
+        img = None
+        for i in range(count - 1, -1, -1):
+            if isinstance(self.steps[i], QuantizeStep):
+                start = i + 1
+                img = self.steps[i].image(self.original)
+                break
+        if img is None:
+            img = self.original if self.base_key is None else self.base_key.image(self.original)
+            if self.base_delta is not None:
+                img = self.base_delta.redo(img)
+        for step in self.steps[start:count]:
+            img = step.redo(img)
+        return img
+
+    def _evict(self):
+        """한도를 넘으면 가장 오래된 단계부터 기준 상태로 접어 넣습니다 (마지막 단계는 유지)."""
+        while self.nbytes > self.max_bytes and len(self.steps) > 1:
+            step = self.steps.pop(0)
+            self.position -= 1
+            if isinstance(step, QuantizeStep):
+                # 양자화 결과가 새 기준이 되고 그 이전의 색상 교체는 필요 없어짐
+                self.base_key, self.base_delta = step, None
+                continue
+            self.base_delta = step if self.base_delta is None else self.base_delta.then(step)
@@ -0,0 +1,839 @@
+"""Tk에 의존하지 않는 이미지 처리 로직
+
+GUI(ImageProcessor.py)와 배치 CLI(batch.py)가 같은 함수를 사용합니다.
+scikit-learn은 가져오는 데만 1초 이상 걸리므로 K-means 방법을 처음 쓸 때 가져옵니다.
+"""
+import contextlib
+import functools
+import hashlib
+import os
+import tempfile
+import threading
+
+from PIL import Image, ImageDraw
+import numpy as np
+
+import timing
+
+# kmeans-fast 기본값: 학습 표본 크기와 최근접 중심 할당 시 한 번에 처리할 픽셀 수
+DEFAULT_SAMPLE_SIZE = 100_000
+ASSIGN_CHUNK_SIZE = 262_144
+# 고정 팔레트 3D 룩업 테이블의 채널당 비트 수 (6이면 64^3칸 = 256KB)
+DEFAULT_LUT_BITS = 6
+
+
+def warm_up():
+    """처음 쓸 때 가져오는 무거운 모듈(scikit-learn)을 미리 가져옵니다. 백그라운드 스레드용"""
+    import sklearn.cluster  # noqa: F401
+
+
+class OperationCancelled(Exception):
+    """진행 콜백이 작업 취소를 알릴 때 발생합니다."""
+
+
+def _no_progress(fraction, message=""):
+    pass
+
+
+def color_match_mask(rgba, target_color, tolerance=0, metric="channel"):
+    """target_color와 일치하는 픽셀의 불리언 마스크를 계산합니다.
+
+    tolerance가 0이면 RGBA를 uint32 하나로 묶어 한 번의 비교로 끝냅니다.
+    tolerance가 있으면 채널별(channel) 최대 차이 또는 유클리드(euclidean)
+    거리로 비교하며, 채널마다 256칸 룩업 테이블을 써서 정수 연산만 합니다.
+    """
+    target = np.array(target_color, dtype=np.uint8)
+
+    if tolerance <= 0:
+        packed = rgba.view(np.uint32)[..., 0]
+        return packed == target.view(np.uint32)[0]
+
+    levels = np.arange(256, dtype=np.int32)
+    if metric == "channel":
+        mask = None
+        for c in range(4):
+            lut = np.abs(levels - int(target[c])) <= tolerance
+            channel_mask = lut[rgba[..., c]]
+            mask = channel_mask if mask is None else (mask & channel_mask)
+        return mask
+    elif metric == "euclidean":
+        dist = None
+        for c in range(4):
+            lut = ((levels - int(target[c])) ** 2).astype(np.uint32)
+            channel_dist = lut[rgba[..., c]]
+            dist = channel_dist if dist is None else (dist + channel_dist)
+        return dist <= tolerance * tolerance
+    else:
+        raise ValueError(f"Unknown tolerance metric: {metric}")
+
+
+def replace_color(rgba, target_color, new_color, tolerance=0, metric="channel"):
+    """RGBA 배열(h, w, 4, uint8)에서 색상을 제자리에서 교체하고 마스크를 반환합니다."""
+    mask = color_match_mask(rgba, target_color, tolerance, metric)
+    packed = rgba.view(np.uint32)[..., 0]
+    packed[mask] = np.array(new_color, dtype=np.uint8).view(np.uint32)[0]
+    return mask
+
+
+def change_color(img, target_color, new_color, tolerance=0, metric="channel", progress=None):
+    """PIL 이미지의 색상을 교체한 새 RGBA 이미지를 반환합니다.
+
+    progress(fraction, message)는 단계마다 호출되며, 예외를 던져 작업을 중단할 수 있습니다.
+    """
+    report = progress or _no_progress
+    report(0.0, "Converting")
+    with timing.span("convert"):
+        # 제자리 수정을 위한 복사는 np.array 한 번으로 충분 (RGBA면 convert 생략)
+        rgba = np.array(img if img.mode == 'RGBA' else img.convert('RGBA'))
+    report(0.3, "Replacing color")
+    with timing.span("replace"):
+        replace_color(rgba, target_color, new_color, tolerance, metric)
+    report(0.9, "Building image")
+    with timing.span("build"):
+        return Image.fromarray(rgba)
+
+
+def compile_remap(rules):
+    """(target, new) 규칙 목록을 정렬된 uint32 키와 값 배열로 만듭니다.
+
+    같은 대상 색이 여러 번 나오면 앞의 규칙이 우선합니다.
+    """
+    if not rules:
+        return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.uint32)
+    targets = np.array([target for target, _ in rules], dtype=np.uint8).view(np.uint32)[:, 0]
+    values = np.array([new for _, new in rules], dtype=np.uint8).view(np.uint32)[:, 0]
+    keys, first = np.unique(targets, return_index=True)
+    return keys, values[first]
+
+
+def remap_table(colors, rules, tolerance=0, metric="channel"):
+    """색상 표(n, 4 uint8)의 각 색에 규칙을 적용한 packed uint32 값(n,)을 반환합니다.
+
+    각 색에는 원래 색과 처음으로 일치하는 규칙 하나만 적용됩니다 (규칙이 연쇄되지 않음).
+    """
+    out = colors.view(np.uint32)[:, 0].copy()
+    pending = np.ones(len(out), dtype=bool)
+    for target_color, new_color in rules:
+        hit = color_match_mask(colors, target_color, tolerance, metric) & pending
+        out[hit] = np.array(new_color, dtype=np.uint8).view(np.uint32)[0]
+        pending &= ~hit
+    return out
+
+
+def remap_rgba(rgba, rules, tolerance=0, metric="channel", chunk_size=ASSIGN_CHUNK_SIZE):
+    """RGBA 배열(h, w, 4, uint8)에 여러 교체 규칙을 한 번에, 제자리에서 적용합니다.
+
+    tolerance가 0이면 규칙을 정렬된 uint32 키로 컴파일해 searchsorted로 찾고,
+    tolerance가 있으면 고유 색상 표에만 규칙을 적용한 뒤 역인덱스로 펼칩니다.
+    어느 쪽이든 픽셀 전체는 한 번만 훑습니다.
+    """
+    if not rules:
+        return
+    if len(rules) == 1:
+        # 규칙이 하나면 정렬/고유 색상 계산 없이 마스크 한 번이 가장 빠름
+        replace_color(rgba, *rules[0], tolerance, metric)
+        return
+    packed = rgba.view(np.uint32).reshape(-1)
+    if tolerance <= 0:
+        keys, values = compile_remap(rules)
+        if len(keys) <= 8:
+            # 규칙이 몇 개뿐이면 원본 기준 비교 몇 번이 searchsorted보다 빠름
+            masks = [packed == key for key in keys]
+            for mask, value in zip(masks, values):
+                packed[mask] = value
+            return
+        # searchsorted 인덱스(픽셀당 8바이트)가 이미지 전체 크기로 커지지 않도록 나눠서 처리
+        for start in range(0, len(packed), chunk_size):
+            chunk = packed[start:start + chunk_size]
+            idx = np.searchsorted(keys, chunk)
+            idx[idx == len(keys)] = 0
+            hit = keys[idx] == chunk
+            chunk[hit] = values[idx[hit]]
+        return
+    keys, inverse = np.unique(packed, return_inverse=True)
+    colors = keys.view(np.uint8).reshape(-1, 4)
+    packed[:] = remap_table(colors, rules, tolerance, metric)[inverse.reshape(-1)]
+
+
+def palette_rgba(img):
+    """P 모드 이미지의 팔레트 인덱스별 RGBA 색상 표(256, 4 uint8, 투명도 반영)"""
+    strip = Image.frombytes('P', (256, 1), bytes(range(256)))
+    mode = img.palette.mode
+    strip.putpalette(img.getpalette(mode), mode)
+    if 'transparency' in img.info:
+        strip.info['transparency'] = img.info['transparency']
+    return np.array(strip.convert('RGBA'))[0]
+
+
+def remap_colors(img, rules, tolerance=0, metric="channel", progress=None):
+    """여러 (target, new) 교체 규칙을 한 번에 적용한 새 RGBA 이미지를 반환합니다.
+
+    이미 팔레트(P 모드)로 양자화된 이미지는 256칸 팔레트 표에만 규칙을 적용하고
+    인덱스로 조회해서 픽셀마다 색을 비교하지 않습니다.
+    """
+    report = progress or _no_progress
+    if img.mode == 'P':
+        report(0.1, "Remapping palette")
+        with timing.span("remap"):
+            lut = remap_table(palette_rgba(img), rules, tolerance, metric)
+            indices = np.asarray(img)
+            rgba = lut[indices].view(np.uint8).reshape(indices.shape + (4,))
+        report(0.9, "Building image")
+        with timing.span("build"):
+            return Image.fromarray(rgba)
+
+    report(0.0, "Converting")
+    with timing.span("convert"):
+        rgba = np.array(img if img.mode == 'RGBA' else img.convert('RGBA'))
+    report(0.3, f"Applying {len(rules)} color rules")
+    with timing.span("remap"):
+        remap_rgba(rgba, rules, tolerance, metric)
+    report(0.9, "Building image")
+    with timing.span("build"):
+        return Image.fromarray(rgba)
+
+
+def polygon_mask(points, size):
+    """다각형(이미지 좌표 (x, y) 목록) 안쪽 픽셀의 (경계 상자, 상자 크기의 불리언 마스크)
+
+    마스크는 이미지 전체가 아니라 경계 상자 크기로만 만듭니다. 이미지 밖이면 None
+    """
+    xs, ys = zip(*points)
+    x0, y0 = max(0, int(min(xs))), max(0, int(min(ys)))
+    x1, y1 = min(size[0], int(max(xs)) + 1), min(size[1], int(max(ys)) + 1)
+    if x0 >= x1 or y0 >= y1:
+        return None
+    mask = Image.new('1', (x1 - x0, y1 - y0), 0)
+    ImageDraw.Draw(mask).polygon([(x - x0, y - y0) for x, y in points], fill=1, outline=1)
+    return (x0, y0, x1, y1), np.asarray(mask)
+
+
+def flood_fill_mask(img, seed, tolerance=0, metric="channel", progress=None):
+    """seed (x, y)의 색과 (tolerance 안에서) 같은 색으로 상하좌우 이어진 픽셀을 찾습니다.
+
+    행 단위 스캔라인 채우기로, 영역이 지나는 행만 한 줄씩 읽어 비교하므로 계산과 메모리가
+    이미지 전체가 아니라 영역 크기에 비례합니다. 반환값: (경계 상자, 상자 크기의 불리언 마스크)
+    """
+    report = progress or _no_progress
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    width, height = img.size
+    target = img.getpixel(seed)
+    open_rows = {}  # 행 번호 -> 색이 일치하고 아직 채우지 않은 픽셀 (bool 행)
+
+    def row(y):
+        match = open_rows.get(y)
+        if match is None:
+            pixels = np.asarray(img.crop((0, y, width, y + 1)))
+            match = open_rows[y] = color_match_mask(pixels, target, tolerance, metric)[0]
+        return match
+
+    spans = []  # (y, 시작 x, 끝 x)
+    stack = [seed]
+    while stack:
+        x, y = stack.pop()
+        match = row(y)
+        if not match[x]:
+            continue
+        # x에서 왼쪽/오른쪽으로 처음 일치하지 않는 픽셀까지가 한 구간
+        run = match[x::-1]
+        n = int(run.argmin())
+        left = x - n + 1 if not run[n] else 0
+        run = match[x:]
+        n = int(run.argmin())
+        right = x + n if not run[n] else width
+        match[left:right] = False
+        spans.append((y, left, right))
+        if len(spans) % 1024 == 0:
+            report(0.0, f"Filling region ({len(spans)} spans)")
+
+        # 위아래 행에서 이 구간과 맞닿은 일치 구간마다 시작점 하나씩
+        for ny in (y - 1, y + 1):
+            if 0 <= ny < height:
+                segment = row(ny)[left:right]
+                starts = np.flatnonzero(segment[1:] & ~segment[:-1]) + 1
+                if segment[0]:
+                    stack.append((left, ny))
+                stack.extend((left + int(start), ny) for start in starts)
+
+    y0 = min(span[0] for span in spans)
+    y1 = max(span[0] for span in spans) + 1
+    x0 = min(span[1] for span in spans)
+    x1 = max(span[2] for span in spans)
+    mask = np.zeros((y1 - y0, x1 - x0), dtype=bool)
+    for y, left, right in spans:
+        mask[y - y0, left - x0:right - x0] = True
+    return (x0, y0, x1, y1), mask
+
+
+def recolor_region(img, box, mask, rules, tolerance=0, metric="channel", progress=None):
+    """box 안에서 mask가 True인 픽셀에만 교체 규칙을 적용한 새 RGBA 이미지를 반환합니다.
+
+    결과 이미지를 만드는 복사 한 번 외에는 영역 안의 픽셀만 비교하고 바꿉니다.
+    """
+    report = progress or _no_progress
+    report(0.0, "Copying")
+    with timing.span("copy"):
+        result = img.copy() if img.mode == 'RGBA' else img.convert('RGBA')
+    report(0.3, f"Applying {len(rules)} color rules to the region")
+    with timing.span("remap"):
+        rgba = np.array(result.crop(box))
+        remapped = rgba.copy()
+        remap_rgba(remapped, rules, tolerance, metric)
+        # 상자 안에서도 영역 밖 픽셀은 원래 색 유지
+        np.copyto(rgba.view(np.uint32)[..., 0], remapped.view(np.uint32)[..., 0], where=mask)
+    report(0.9, "Building image")
+    with timing.span("build"):
+        result.paste(Image.fromarray(rgba), box[:2])
+    return result
+
+
+def unique_colors(img_array):
+    """RGB 픽셀을 uint32로 묶어 고유 색상, 역인덱스, 개수를 구합니다.
+
+    반환값: (colors (n, 3) uint8, inverse (픽셀 수,) 정수, counts (n,) 정수)
+    """
+    pixels = img_array.reshape(-1, 3)
+    # 임시 배열 없이 하나의 uint32 배열에 차례로 채워 넣음
+    packed = pixels[:, 0].astype(np.uint32)
+    packed <<= 8
+    packed |= pixels[:, 1]
+    packed <<= 8
+    packed |= pixels[:, 2]
+    keys, inverse, counts = np.unique(packed, return_inverse=True, return_counts=True)
+    colors = np.empty((len(keys), 3), dtype=np.uint8)
+    colors[:, 0] = keys >> 16
+    colors[:, 1] = (keys >> 8) & 0xFF
+    colors[:, 2] = keys & 0xFF
+    return colors, inverse.reshape(-1), counts
+
+
+def compact_labels(labels, palette_size):
+    """라벨 배열을 팔레트 크기에 맞는 가장 작은 정수형(uint8/uint16)으로 바꿉니다."""
+    dtype = np.uint8 if palette_size <= 256 else np.uint16
+    return labels.astype(dtype, copy=False)
+
+
+class WarmStart:
+    """색상 수만 바꿔 같은 이미지로 K-means를 다시 학습할 때 이전 결과를 이어 쓰기 위한 상태
+
+    학습 데이터(kmeans는 고유 색상 표, kmeans-fast는 표본)를 다시 만들지 않고, 마지막 중심과
+    데이터별 클러스터 번호에서 새 색상 수의 초기 중심을 만들어 한 번만(n_init=1) 학습합니다.
+    작업 스레드 여러 개가 같은 상태를 쓰지 않도록 lock을 잡고 사용합니다.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = None
+        self.centers = None
+        self.labels = None
+
+    @property
+    def nbytes(self):
+        arrays = (self.data if isinstance(self.data, tuple) else (self.data,)) + (self.centers, self.labels)
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def initial_centers(self, points, weights, color_count):
+        """이전 결과가 있으면 color_count개로 늘리거나 줄인 초기 중심, 없으면 None"""
+        if self.centers is None:
+            return None
+        return resize_centers(points, weights, self.centers, self.labels, color_count)
+
+    def remember(self, centers, labels):
+        self.centers = np.asarray(centers, dtype=np.float64)
+        self.labels = np.asarray(labels)
+
+
+def resize_centers(points, weights, centers, labels, k):
+    """이전 K-means 결과(centers, points별 labels)에서 k개의 초기 중심을 만듭니다.
+
+    늘릴 때는 가중 제곱오차가 가장 큰 클러스터를 주축 방향으로 중심 ± 표준편차 위치의 둘로
+    나누고, 줄일 때는 가장 가까운 두 중심을 클러스터 가중치로 평균해 합칩니다.
+    더 나눌 클러스터가 없으면(서로 다른 점이 k개보다 적으면) None을 반환합니다.
+    """
+    points = points.astype(np.float64)
+    weights = np.ones(len(points)) if weights is None else weights.astype(np.float64)
+    centers = np.array(centers, dtype=np.float64)
+    labels = np.asarray(labels)
+
+    # 한 번에 하나씩 나누고 다시 할당해야 여러 칸을 건너뛸 때도 새로 학습한 결과와 비슷함
+    while len(centers) < k:
+        diff = points - centers[labels]
+        sse = np.bincount(labels, weights=weights * (diff ** 2).sum(axis=1), minlength=len(centers))
+        i = sse.argmax()
+        if sse[i] <= 0:
+            return None
+        member = labels == i
+        d, w = diff[member], weights[member]
+        values, vectors = np.linalg.eigh((d * w[:, None]).T @ d / w.sum())
+        offset = vectors[:, -1] * np.sqrt(max(values[-1], 0.0))
+        centers = np.vstack([centers, centers[i] - offset])
+        centers[i] += offset
+        labels = assign_nearest(points, centers)
+
+    if len(centers) > k:
+        cluster_weights = np.bincount(labels, weights=weights, minlength=len(centers))
+        while len(centers) > k:
+            dist = ((centers[:, None] - centers[None]) ** 2).sum(axis=2)
+            np.fill_diagonal(dist, np.inf)
+            a, b = np.unravel_index(dist.argmin(), dist.shape)
+            total = cluster_weights[a] + cluster_weights[b]
+            if total > 0:
+                centers[a] = (centers[a] * cluster_weights[a] + centers[b] * cluster_weights[b]) / total
+            cluster_weights[a] = total
+            centers = np.delete(centers, b, axis=0)
+            cluster_weights = np.delete(cluster_weights, b)
+    return centers
+
+
+# 이전 색상 수의 결과에서 이어서 학습할 수 있는 방법
+WARM_START_METHODS = ("kmeans", "kmeans-fast")
+
+
+def kmeans_indexed(img_array, color_count, warm=None):
+    """K-means 클러스터링 결과를 (라벨 배열, 팔레트)로 반환합니다.
+
+    같은 색의 픽셀을 고유 색상 하나와 개수(sample_weight)로 압축해서 학습하므로
+    비용이 픽셀 수가 아니라 고유 색상 수에 비례합니다. 결과는 역인덱스로
+    전체 픽셀에 되돌립니다. warm(WarmStart)을 주면 고유 색상 표를 다시 만들지 않고
+    이전 색상 수의 결과에서 이어서 학습합니다.
+    """
+    with warm.lock if warm is not None else contextlib.nullcontext():
+        if warm is not None and warm.data is not None:
+            colors, inverse, counts = warm.data
+        else:
+            with timing.span("unique_colors"):
+                colors, inverse, counts = unique_colors(img_array)
+            if warm is not None:
+                inverse = inverse.astype(np.uint32)
+                warm.data = (colors, inverse, counts)
+
+        # 이미 색상 수가 충분히 적으면 각 색상이 그대로 클러스터 중심이 됨
+        if len(colors) <= color_count:
+            return compact_labels(inverse, len(colors)).reshape(img_array.shape[:2]), colors
+
+        from sklearn.cluster import KMeans
+
+        init = None
+        if warm is not None:
+            with timing.span("warm_start"):
+                init = warm.initial_centers(colors, counts, color_count)
+        if init is None:
+            kmeans = KMeans(n_clusters=color_count, random_state=42, n_init=10)
+        else:
+            kmeans = KMeans(n_clusters=color_count, init=init, n_init=1, random_state=42)
+        with timing.span("kmeans.fit"):
+            kmeans.fit(colors, sample_weight=counts)
+        if warm is not None:
+            warm.remember(kmeans.cluster_centers_, kmeans.labels_)
+
+        # 고유 색상 -> 클러스터 번호 룩업 테이블을 픽셀 단위로 펼치기
+        with timing.span("assign"):
+            labels = compact_labels(kmeans.labels_, color_count)[inverse]
+        return labels.reshape(img_array.shape[:2]), kmeans.cluster_centers_
+
+
+def process_with_kmeans(img_array, color_count):
+    """K-means 클러스터링을 사용한 색상 양자화"""
+    labels, palette = kmeans_indexed(img_array, color_count)
+    return palette.astype(np.uint8)[labels]
+
+
+def sample_pixels(img_array, sample_size, sampling="random"):
+    """학습용 픽셀 표본을 뽑습니다.
+
+    random: 무작위 추출, grid: 일정 간격 격자로 이미지 전체에서 고르게 추출
+    """
+    pixels = img_array.reshape(-1, 3)
+    if len(pixels) <= sample_size:
+        return pixels
+    if sampling == "random":
+        rng = np.random.default_rng(42)
+        return pixels[rng.choice(len(pixels), size=sample_size, replace=False)]
+    elif sampling == "grid":
+        stride = max(1, int(np.sqrt(len(pixels) / sample_size)))
+        return img_array[::stride, ::stride].reshape(-1, 3)
+    else:
+        raise ValueError(f"Unknown sampling: {sampling}")
+
+
+def assign_nearest(pixels, centers, chunk_size=ASSIGN_CHUNK_SIZE):
+    """각 픽셀에 가장 가까운 중심의 인덱스를 구합니다.
+
+    거리 행렬은 chunk_size x k 크기로만 만들기 때문에 메모리 사용량이
+    이미지 크기와 무관하게 제한됩니다.
+    """
+    centers = centers.astype(np.float32)
+    # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2 에서 ||x||^2는 argmin에 영향 없음
+    center_norms = (centers ** 2).sum(axis=1)
+    labels = np.empty(len(pixels), dtype=np.uint8 if len(centers) <= 256 else np.uint16)
+    for start in range(0, len(pixels), chunk_size):
+        chunk = pixels[start:start + chunk_size].astype(np.float32)
+        dist = center_norms - 2 * chunk @ centers.T
+        labels[start:start + chunk_size] = dist.argmin(axis=1)
+    return labels
+
+
+def kmeans_fast_indexed(img_array, color_count, sample_size=DEFAULT_SAMPLE_SIZE, sampling="random", warm=None):
+    """표본 픽셀로 MiniBatchKMeans를 학습하고 전체 픽셀은 청크 단위로 할당
+
+    고유 색상이 많은 사진에서 픽셀 수에 비례하는 비용을 학습에서 제거합니다.
+    warm(WarmStart)을 주면 표본을 다시 뽑지 않고 이전 색상 수의 결과에서 이어서 학습합니다.
+    """
+    with warm.lock if warm is not None else contextlib.nullcontext():
+        if warm is not None and warm.data is not None:
+            sample = warm.data
+        else:
+            with timing.span("sample"):
+                sample = sample_pixels(img_array, sample_size, sampling)
+            if warm is not None:
+                warm.data = sample
+
+        # 표본의 색상 수가 충분히 적으면 (표본 픽셀이 color_count보다 적은 작은 이미지 포함)
+        # 각 색상이 그대로 클러스터 중심이 됨
+        colors = unique_colors(sample)[0]
+        if len(colors) <= color_count:
+            centers = colors
+        else:
+            from sklearn.cluster import MiniBatchKMeans
+
+            init = None
+            if warm is not None:
+                with timing.span("warm_start"):
+                    init = warm.initial_centers(sample, None, color_count)
+            if init is None:
+                kmeans = MiniBatchKMeans(n_clusters=color_count, random_state=42, n_init=3,
+                                         batch_size=4096)
+            else:
+                kmeans = MiniBatchKMeans(n_clusters=color_count, init=init, n_init=1, random_state=42,
+                                         batch_size=4096)
+            with timing.span("kmeans.fit"):
+                kmeans.fit(sample)
+            if warm is not None:
+                warm.remember(kmeans.cluster_centers_, kmeans.labels_)
+            centers = kmeans.cluster_centers_
+    with timing.span("assign"):
+        labels = assign_nearest(img_array.reshape(-1, 3), centers)
+    return labels.reshape(img_array.shape[:2]), centers
+
+
+def process_with_kmeans_fast(img_array, color_count, sample_size=DEFAULT_SAMPLE_SIZE, sampling="random"):
+    """표본 기반 K-means를 사용한 색상 양자화 (사진용)"""
+    labels, palette = kmeans_fast_indexed(img_array, color_count, sample_size, sampling)
+    return palette.astype(np.uint8)[labels]
+
+
+def quantize_indexed(img_array, color_count):
+    """PIL quantize 결과(P 모드)를 (라벨 배열, 팔레트)로 반환합니다."""
+    with timing.span("pil.quantize"):
+        quantized = Image.fromarray(img_array).quantize(colors=color_count)
+    labels = np.array(quantized)
+    palette = np.array(quantized.getpalette()[:3 * (int(labels.max()) + 1)], dtype=np.uint8).reshape(-1, 3)
+    return labels, palette
+
+
+def process_with_quantize(img_array, color_count):
+    """PIL의 quantize를 사용한 색상 양자화"""
+    labels, palette = quantize_indexed(img_array, color_count)
+    return palette[labels]
+
+
+def threshold_lut(color_count):
+    """채널 값 -> 임계값 적용 값의 256칸 룩업 테이블 (uint8)"""
+    step = 256 // color_count
+    return (np.arange(256) // step * step).clip(0, 255).astype(np.uint8)
+
+
+def process_with_threshold(img_array, color_count):
+    """단순 임계값을 사용한 색상 양자화"""
+    return threshold_lut(color_count)[img_array]
+
+
+def rgb_to_lab(rgb):
+    """sRGB(..., 3, 0~255)를 CIELAB(D65, float32)으로 변환합니다."""
+    c = np.asarray(rgb, dtype=np.float32) / 255
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ np.array([[0.4124564, 0.2126729, 0.0193339],
+                             [0.3575761, 0.7151522, 0.1191920],
+                             [0.1804375, 0.0721750, 0.9503041]], dtype=np.float32)
+    xyz /= np.array([0.95047, 1.0, 1.08883], dtype=np.float32)
+    f = np.where(xyz > 216 / 24389, np.cbrt(xyz), (24389 / 27 * xyz + 16) / 116)
+    return np.stack([116 * f[..., 1] - 16,
+                     500 * (f[..., 0] - f[..., 1]),
+                     200 * (f[..., 1] - f[..., 2])], axis=-1).astype(np.float32)
+
+
+def _build_palette_lut(palette, space, bits, out):
+    """칸마다 가운데 색에 가장 가까운 팔레트 인덱스를 out((2^bits)^3,)에 채웁니다."""
+    shift = 8 - bits
+    side = 1 << bits
+    levels = (np.arange(side, dtype=np.uint16) << shift) + ((1 << shift) >> 1)
+    centers = palette if space == "rgb" else rgb_to_lab(palette)
+    # 한 번에 R 평면 몇 장씩 (최대 ASSIGN_CHUNK_SIZE 칸) 계산
+    planes = max(1, ASSIGN_CHUNK_SIZE // (side * side))
+    g, b = np.meshgrid(levels, levels, indexing='ij')
+    gb = np.stack([g.ravel(), b.ravel()], axis=1)
+    for r0 in range(0, side, planes):
+        r = np.repeat(levels[r0:r0 + planes], side * side)
+        cells = np.column_stack([r, np.tile(gb, (len(r) // len(gb), 1))])
+        if space == "lab":
+            cells = rgb_to_lab(cells)
+        out[r0 * side * side:(r0 * side * side) + len(cells)] = assign_nearest(cells, centers)
+    # 팔레트 색 자체는 칸 가운데와 달라도 항상 자기 자신으로 맞춤
+    index = palette.astype(np.uint32) >> shift
+    out[(index[:, 0] << (2 * bits)) | (index[:, 1] << bits) | index[:, 2]] = np.arange(len(palette))
+
+
+@functools.lru_cache(maxsize=4)
+def palette_lut(palette, space="rgb", bits=DEFAULT_LUT_BITS, lut_dir=None):
+    """고정 팔레트의 최근접 색 3D 룩업 테이블((2^bits)^3 uint8, 인덱스 = r·g·b 상위 bits비트)
+
+    palette는 RGB 튜플의 튜플(최대 256색), space는 거리를 잴 색 공간("rgb" 또는 "lab")입니다.
+    프로세스 안에서는 최근 몇 개를 메모리에 보관하고, lut_dir을 주면 .npy 파일로 저장해
+    다음부터는 메모리 맵으로 엽니다 (bits=8이면 16MB, 모든 색이 정확).
+    """
+    if space not in ("rgb", "lab"):
+        raise ValueError(f"Unknown color space: {space}")
+    if not 1 <= len(palette) <= 256:
+        raise ValueError("A fixed palette needs 1 to 256 colors")
+    if not 1 <= bits <= 8:
+        raise ValueError("LUT bits must be between 1 and 8")
+    colors = np.array(palette, dtype=np.uint8).reshape(-1, 3)
+    size = 1 << (3 * bits)
+
+    if not lut_dir:
+        lut = np.empty(size, dtype=np.uint8)
+        with timing.span("palette.lut"):
+            _build_palette_lut(colors, space, bits, lut)
+        return lut
+
+    digest = hashlib.blake2b(colors.tobytes(), digest_size=8).hexdigest()
+    path = os.path.join(lut_dir, f"palette-{digest}-{space}-{bits}.npy")
+    if not os.path.exists(path):
+        os.makedirs(lut_dir, exist_ok=True)
+        # 다른 프로세스와 동시에 만들어도 완성된 파일만 보이도록 임시 파일에 쓴 뒤 교체
+        fd, tmp_path = tempfile.mkstemp(suffix='.npy', dir=lut_dir)
+        os.close(fd)
+        try:
+            lut = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint8, shape=(size,))
+            with timing.span("palette.lut"):
+                _build_palette_lut(colors, space, bits, lut)
+            lut.flush()
+            del lut
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    return np.load(path, mmap_mode='r')
+
+
+def lut_lookup(pixels, lut, bits, chunk_size=ASSIGN_CHUNK_SIZE):
+    """RGB 픽셀(n, 3 uint8)마다 3D 룩업 테이블에서 팔레트 인덱스를 찾습니다 (픽셀당 조회 한 번)."""
+    shift = 8 - bits
+    labels = np.empty(len(pixels), dtype=np.uint8)
+    for start in range(0, len(pixels), chunk_size):
+        chunk = pixels[start:start + chunk_size]
+        index = (chunk[:, 0] >> shift).astype(np.uint32)
+        index <<= bits
+        index |= chunk[:, 1] >> shift
+        index <<= bits
+        index |= chunk[:, 2] >> shift
+        labels[start:start + chunk_size] = lut[index]
+    return labels
+
+
+def palette_indexed(img_array, color_count, palette=(), space="rgb", lut_bits=DEFAULT_LUT_BITS, lut_dir=None):
+    """고정 팔레트의 가장 가까운 색으로 맞춥니다 (color_count는 사용하지 않음).
+
+    팔레트를 학습하지 않으므로 같은 팔레트면 어느 이미지에서나 같은 색이 나옵니다.
+    """
+    if not palette:
+        raise ValueError("The palette method needs a palette")
+    lut = palette_lut(tuple(tuple(color) for color in palette), space, lut_bits, lut_dir)
+    with timing.span("assign"):
+        labels = lut_lookup(img_array.reshape(-1, 3), lut, lut_bits)
+    return labels.reshape(img_array.shape[:2]), np.array(palette, dtype=np.uint8).reshape(-1, 3)
+
+
+def process_with_palette(img_array, color_count, **options):
+    """고정 팔레트 스냅"""
+    labels, palette = palette_indexed(img_array, color_count, **options)
+    return palette[labels]
+
+
+# 처리 방법 이름 -> 함수 (GUI 콤보박스와 CLI 선택지가 같은 목록을 사용)
+METHODS = {
+    "kmeans": process_with_kmeans,
+    "kmeans-fast": process_with_kmeans_fast,
+    "quantize": process_with_quantize,
+    "threshold": process_with_threshold,
+    "palette": process_with_palette,
+}
+
+# 팔레트 + 라벨 배열로 결과를 낼 수 있는 방법 (결과 캐시에 압축 저장 가능)
+# threshold는 캐시 조회보다 다시 계산하는 편이 빠르므로 제외
+INDEXED_METHODS = {
+    "kmeans": kmeans_indexed,
+    "kmeans-fast": kmeans_fast_indexed,
+    "quantize": quantize_indexed,
+    "palette": palette_indexed,
+}
+
+
+def fit_sample_palette(sample, method, color_count, **options):
+    """미리 뽑은 표본 배열 (h, w, 3)로 팔레트를 학습해 uint8 팔레트를 반환합니다.
+
+    띠 단위 처리나 여러 프레임처럼 표본을 직접 만든 경우에 씁니다. kmeans-fast가 표본을
+    기본 표본 크기로 다시 줄이지 않도록 표본 전체를 학습에 쓰게 합니다.
+    """
+    if method == "kmeans-fast":
+        options = dict(options, sample_size=sample.shape[0] * sample.shape[1])
+    _, palette = INDEXED_METHODS[method](sample, color_count, **options)
+    return palette.astype(np.uint8)
+
+
+def indexed_to_image(labels, palette, alpha=None):
+    """라벨 배열 + uint8 팔레트를 PIL 이미지로 만듭니다.
+
+    alpha(h, w uint8)가 있으면 RGBA 출력 버퍼를 한 번만 할당해서 색상은 uint32
+    팔레트 조회로, 알파는 그 자리에 채워 넣습니다. 알파가 없으면 P 모드 이미지를
+    거쳐 RGB로 변환합니다.
+    """
+    if alpha is not None:
+        palette4 = np.zeros((len(palette), 4), dtype=np.uint8)
+        palette4[:, :3] = palette
+        rgba = palette4.view(np.uint32)[:, 0][labels].view(np.uint8).reshape(labels.shape + (4,))
+        rgba[..., 3] = alpha
+        return Image.fromarray(rgba)
+    if labels.dtype == np.uint8:
+        indexed = Image.fromarray(labels)
+        indexed.putpalette(palette.tobytes())
+        return indexed.convert('RGB')
+    return Image.fromarray(palette[labels])
+
+
+def quantize_image(img, method, color_count, progress=None, cache=None, **options):
+    """안티앨리어싱 제거: 색상 수를 줄인 이미지를 반환합니다 (알파 채널 보존).
+
+    options는 처리 함수에 그대로 전달됩니다 (예: kmeans-fast의 sample_size).
+    progress(fraction, message)는 단계마다 호출되며, 예외를 던져 작업을 중단할 수 있습니다.
+    cache(result_cache.ResultCache)를 주면 같은 이미지와 설정의 결과를 재사용합니다.
+    중간 결과는 모두 uint8(또는 라벨 배열)로만 만들어 float64 복사본이 생기지 않습니다.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    report = progress or _no_progress
+
+    if method not in INDEXED_METHODS:
+        # threshold: 채널별 룩업 테이블을 PIL에서 바로 적용 (알파는 항등 변환)
+        report(0.1, f"Running {method}")
+        source = img if img.mode in ('RGB', 'RGBA') else img.convert('RGB')
+        lut = threshold_lut(color_count).tolist() * 3
+        if source.mode == 'RGBA':
+            lut += list(range(256))
+        with timing.span("threshold"):
+            return source.point(lut)
+
+    labels, palette = quantize_labels(img, method, color_count, progress=report, cache=cache, **options)
+
+    # 알파 채널 보존
+    report(0.9, "Restoring alpha")
+    with timing.span("alpha"):
+        return indexed_to_image(labels, palette, source_alpha(img))
+
+
+def source_alpha(img):
+    """RGBA 이미지의 알파 채널(h, w uint8). 알파가 없으면 None"""
+    return np.asarray(img.getchannel('A')) if img.mode == 'RGBA' else None
+
+
+def quantize_labels(img, method, color_count, progress=None, cache=None, warm_start=False, **options):
+    """팔레트를 만드는 방법(INDEXED_METHODS)으로 양자화한 (라벨 배열, uint8 팔레트)를 반환합니다.
+
+    결과 이미지는 indexed_to_image(labels, palette, source_alpha(img))로 만듭니다.
+    warm_start이면 (cache가 있을 때) 같은 이미지의 이전 색상 수 결과에서 이어서 학습합니다.
+    이 결과는 이전에 고른 색상 수에 따라 달라지므로 새로 학습한 결과와 다른 키로 캐시합니다.
+    """
+    if method not in INDEXED_METHODS:
+        raise ValueError(f"Method does not produce a palette: {method}")
+    report = progress or _no_progress
+
+    key = None
+    cached = None
+    warm = {}
+    if cache is not None:
+        report(0.0, "Checking cache")
+        with timing.span("cache.lookup"):
+            digest = cache.digest(img)
+            key = cache.make_key(digest, method, color_count, options)
+            cached = cache.get(key)
+        if cached is None and warm_start and method in WARM_START_METHODS:
+            state = cache.warm_start(digest, method, options)
+            warm['warm'] = state
+            # 이전 결과가 없으면 새로 학습하는 것과 같으므로 일반 키를 그대로 사용
+            if state.centers is not None:
+                key = cache.make_key(digest, method, color_count, {**options, 'warm_start': True})
+                cached = cache.get(key)
+
+    if cached is not None:
+        return cached
+
+    # RGB로 변환하여 처리
+    report(0.05, "Converting")
+    with timing.span("convert"):
+        img_array = np.asarray(img.convert('RGB'))
+    report(0.1, f"Running {method}")
+    labels, palette = INDEXED_METHODS[method](img_array, color_count, **options, **warm)
+    del img_array
+    palette = palette.astype(np.uint8)
+    if cache is not None:
+        cache.put(key, labels, palette)
+    return labels, palette
+
+
+def open_draft(path, max_size):
+    """빠른 첫 화면용 축소 디코딩: (RGBA 이미지 또는 None, 원본 (width, height))를 반환합니다.
+
+    JPEG은 draft()로 DCT 단계에서 1/2~1/8 크기로 바로 디코딩하고, 여러 해상도를 담은
+    (피라미드) TIFF는 max_size를 채우는 가장 작은 축소 페이지를 읽습니다. 축소 디코딩을
+    할 수 없는 형식이면 이미지 대신 None을 반환합니다 (헤더만 읽음).
+    """
+    with Image.open(path) as img:
+        size = img.size
+        if img.format == 'JPEG':
+            img.draft('RGB', max_size)
+            return img.convert('RGBA'), size
+        if img.format == 'TIFF' and getattr(img, 'n_frames', 1) > 1:
+            page = _reduced_tiff_page(img, size, max_size)
+            if page is not None:
+                img.seek(page)
+                return img.convert('RGBA'), size
+    return None, size
+
+
+def tiff_page_sizes(img):
+    """여러 페이지 TIFF의 페이지별 (width, height) 목록 (헤더만 읽고 현재 페이지로 돌아감)"""
+    current = img.tell()
+    sizes = []
+    for page in range(getattr(img, 'n_frames', 1)):
+        img.seek(page)
+        sizes.append(img.size)
+    img.seek(current)
+    return sizes
+
+
+def _reduced_tiff_page(img, size, max_size):
+    """원본과 비율이 같은 축소 페이지 중 max_size를 채우는 가장 작은 페이지 번호. 없으면 None"""
+    width, height = size
+    fitting, smaller = [], []
+    for page, (w, h) in enumerate(tiff_page_sizes(img)[1:], start=1):
+        # 다른 그림이 담긴 여러 페이지 TIFF는 제외 (반올림 오차 1픽셀까지 허용)
+        if w >= width or abs(w * height - h * width) > max(width, height):
+            continue
+        if w >= min(max_size[0], width) or h >= min(max_size[1], height):
+            fitting.append((w, page))
+        else:
+            smaller.append((w, page))
+    if fitting:
+        return min(fitting)[1]
+    return max(smaller)[1] if smaller else None
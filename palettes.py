@@ -0,0 +1,157 @@
+"""팔레트와 색상 교체 표(remap table) 파일 읽기/쓰기
+
+고정 팔레트("palette" 방법)는 RGB 튜플 목록입니다. load_palette()는 hex 목록 문자열,
+GIMP .gpl, Adobe .act, .json(hex 목록), .hex/.txt(한 줄에 하나씩) 파일을 읽습니다.
+
+교체 규칙은 (target, new) RGBA 튜플 쌍의 목록입니다.
+
+JSON:
+    {"rules": [{"target": "#ffffffff", "new": "#00000000"}, ...]}
+    색상은 "#rrggbb", "#rrggbbaa" 문자열 또는 [r, g, b(, a)] 목록으로 씁니다.
+
+GPL (GIMP 팔레트):
+    색상을 두 개씩 짝지어 (대상, 새 색상) 순서로 적습니다. GPL에는 알파가 없으므로
+    읽을 때는 불투명(255)으로 간주하고, 알파가 있는 규칙은 JSON으로만 저장할 수 있습니다.
+"""
+import json
+import os
+
+
+def parse_hex(text):
+    """"#rrggbb" 또는 "#rrggbbaa"를 RGBA 튜플로 바꿉니다."""
+    value = text.strip().lstrip('#')
+    if len(value) not in (6, 8):
+        raise ValueError(f"Invalid hex color: {text!r}")
+    try:
+        channels = [int(value[i:i + 2], 16) for i in range(0, len(value), 2)]
+    except ValueError:
+        raise ValueError(f"Invalid hex color: {text!r}") from None
+    if len(channels) == 3:
+        channels.append(255)
+    return tuple(channels)
+
+
+def format_hex(color):
+    return '#' + ''.join(f"{v:02x}" for v in color)
+
+
+def _parse_color(value):
+    if isinstance(value, str):
+        return parse_hex(value)
+    channels = [int(v) for v in value]
+    if len(channels) == 3:
+        channels.append(255)
+    if len(channels) != 4 or not all(0 <= v <= 255 for v in channels):
+        raise ValueError(f"Invalid color: {value!r}")
+    return tuple(channels)
+
+
+def _load_json(path):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    rules = data['rules'] if isinstance(data, dict) else data
+    return [(_parse_color(rule['target']), _parse_color(rule['new'])) for rule in rules]
+
+
+def _read_gpl_colors(path):
+    colors = []
+    with open(path, encoding='utf-8') as f:
+        if f.readline().strip() != "GIMP Palette":
+            raise ValueError(f"{path} is not a GIMP palette")
+        for line in f:
+            line = line.strip()
+            # 헤더(Name:, Columns:)와 주석은 건너뜀
+            if not line or line.startswith('#') or ':' in line.split()[0]:
+                continue
+            r, g, b = (int(v) for v in line.split()[:3])
+            colors.append((r, g, b))
+    return colors
+
+
+def _load_gpl(path):
+    colors = [color + (255,) for color in _read_gpl_colors(path)]
+    if len(colors) % 2:
+        raise ValueError(f"{path} has an odd number of colors; expected target/new pairs")
+    return list(zip(colors[0::2], colors[1::2]))
+
+
+def load_remap(path):
+    """파일 확장자(.json/.gpl)에 따라 교체 규칙 목록을 읽습니다."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.gpl':
+        return _load_gpl(path)
+    if ext == '.json':
+        return _load_json(path)
+    raise ValueError(f"Unsupported remap table format: {ext or path}")
+
+
+def save_remap(path, rules):
+    """교체 규칙 목록을 파일 확장자(.json/.gpl)에 맞는 형식으로 저장합니다."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        data = {'rules': [{'target': format_hex(target), 'new': format_hex(new)} for target, new in rules]}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+            f.write('\n')
+    elif ext == '.gpl':
+        if any(target[3] != 255 or new[3] != 255 for target, new in rules):
+            raise ValueError("GPL palettes cannot store alpha; save the table as JSON instead")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("GIMP Palette\n")
+            f.write(f"Name: {os.path.splitext(os.path.basename(path))[0]}\n")
+            f.write("Columns: 2\n#\n")
+            for i, (target, new) in enumerate(rules, 1):
+                f.write(f"{target[0]:3d} {target[1]:3d} {target[2]:3d}\ttarget {i}\n")
+                f.write(f"{new[0]:3d} {new[1]:3d} {new[2]:3d}\tnew {i}\n")
+    else:
+        raise ValueError(f"Unsupported remap table format: {ext or path}")
+
+
+def _read_act_colors(path):
+    """Adobe Color Table: RGB 256개(768바이트) + 선택적으로 색 개수/투명 인덱스(각 2바이트)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) not in (768, 772):
+        raise ValueError(f"{path} is not an Adobe color table")
+    count = int.from_bytes(data[768:770], 'big') if len(data) == 772 else 256
+    if not 1 <= count <= 256:
+        count = 256
+    return [tuple(data[i:i + 3]) for i in range(0, 3 * count, 3)]
+
+
+def parse_palette_text(text):
+    """"#ff0000,#00ff00 ..." 같은 hex 목록(쉼표나 공백으로 구분)을 고정 팔레트로 읽습니다."""
+    return _unique_palette([parse_hex(token)[:3] for token in text.replace(',', ' ').split()])
+
+
+def _unique_palette(colors):
+    colors = list(dict.fromkeys(colors))
+    if not 1 <= len(colors) <= 256:
+        raise ValueError(f"A palette needs 1 to 256 colors, got {len(colors)}")
+    return colors
+
+
+def load_palette(spec):
+    """고정 팔레트를 RGB 튜플 목록으로 읽습니다 (중복은 처음 것만 남김).
+
+    spec이 파일이면 확장자로 형식을 고르고, 아니면 "#ff0000,#00ff00 ..." 같은
+    hex 목록(쉼표나 공백으로 구분)으로 해석합니다.
+    """
+    if not os.path.isfile(spec):
+        return parse_palette_text(spec)
+
+    ext = os.path.splitext(spec)[1].lower()
+    if ext == '.gpl':
+        colors = _read_gpl_colors(spec)
+    elif ext == '.act':
+        colors = _read_act_colors(spec)
+    elif ext == '.json':
+        with open(spec, encoding='utf-8') as f:
+            data = json.load(f)
+        entries = data['colors'] if isinstance(data, dict) else data
+        colors = [_parse_color(entry)[:3] for entry in entries]
+    else:
+        with open(spec, encoding='utf-8') as f:
+            colors = [parse_hex(line)[:3] for line in f
+                      if line.strip() and not line.lstrip().startswith(';')]
+    return _unique_palette(colors)
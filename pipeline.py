@@ -0,0 +1,66 @@
+"""이미지 한 장 처리 파이프라인: 디코딩 → 양자화 → 색상 교체 → 인코딩
+
+배치 CLI(batch.py)와 로컬 서버(server.py)가 같은 순서와 규칙으로 처리하도록 함께 씁니다.
+색상 교체 규칙 문자열('R,G,B,A=R,G,B,A')의 파싱과 워커 프로세스별 결과 캐시도 여기에 둡니다.
+"""
+from PIL import Image
+
+import export
+import image_core
+import result_cache
+import timing
+
+DEFAULT_CACHE_MB = 64
+
+# 워커 프로세스마다 하나씩 만드는 결과 캐시
+_worker_cache = None
+
+
+def parse_color(text):
+    """'R,G,B[,A]' 문자열을 RGBA 튜플로 변환합니다. 잘못되면 ValueError"""
+    try:
+        values = [int(v) for v in text.split(',')]
+    except ValueError:
+        values = []
+    if len(values) == 3:
+        values.append(255)
+    if len(values) != 4 or not all(0 <= v <= 255 for v in values):
+        raise ValueError(f"invalid color: {text!r} (expected R,G,B[,A] in 0-255)")
+    return tuple(values)
+
+
+def parse_replace(text):
+    """'R,G,B,A=R,G,B,A' 형식의 색상 교체 규칙을 (target, new)로 파싱합니다. 잘못되면 ValueError"""
+    if '=' not in text:
+        raise ValueError(f"invalid rule: {text!r} (expected TARGET=NEW)")
+    target, new = text.split('=', 1)
+    return parse_color(target), parse_color(new)
+
+
+def worker_cache(disk_dir=None, max_mb=DEFAULT_CACHE_MB):
+    """현재 프로세스의 결과 캐시를 반환합니다 (처음 부를 때의 설정으로 만듦)."""
+    global _worker_cache
+    if _worker_cache is None:
+        _worker_cache = result_cache.ResultCache(max_bytes=max_mb * 1024 * 1024, disk_dir=disk_dir)
+    return _worker_cache
+
+
+def process_image(src, dst, method, color_count, method_options=None, replace=(), tolerance=0,
+                  metric="channel", preset=export.DEFAULT_PRESET, indexed=True, ext=None, cache=None):
+    """src(경로나 파일 객체)의 이미지를 처리해 dst에 저장하고 저장한 이미지 모드를 반환합니다.
+
+    method가 "none"이면 색상 교체만 합니다. dst가 파일 객체이면 ext(".png" 등)로 형식을 정합니다.
+    """
+    with timing.span("decode"):
+        img = Image.open(src)
+        # 색상 교체만 할 때는 팔레트(P) 이미지를 그대로 두어 팔레트 표로 교체
+        if not (method == "none" and replace and img.mode == 'P'):
+            img = img.convert('RGBA')
+
+    if method != "none":
+        img = image_core.quantize_image(img, method, color_count, cache=cache, **(method_options or {}))
+    if replace:
+        img = image_core.remap_colors(img, replace, tolerance, metric)
+
+    # 색이 256개 이하면 팔레트 PNG/GIF로, JPEG 등 알파가 없는 형식은 RGB로 저장
+    return export.save_image(img, dst, preset, indexed=indexed, ext=ext)
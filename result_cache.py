@@ -0,0 +1,165 @@
+"""양자화 결과 캐시
+
+이미지 내용 해시와 (방법, 색상 수, 옵션)을 키로 결과를 보관합니다. 결과는
+RGBA 복사본 대신 uint8/uint16 라벨 배열과 팔레트로 저장하므로 픽셀당 1~2바이트만
+사용합니다. 메모리 한도를 넘으면 가장 오래 쓰지 않은 결과부터 버리고,
+disk_dir을 지정하면 결과를 .npz 파일로도 남겨 재시작 후에도 재사용합니다.
+최근 이미지의 K-means 학습 상태(image_core.WarmStart)도 메모리에만 몇 개 보관하며,
+그 크기(픽셀별 역인덱스 포함)도 메모리 한도에 포함합니다.
+
+환경 변수:
+    IMAGEPROCESSOR_CACHE_MB   메모리 한도 (MB, 기본 256)
+    IMAGEPROCESSOR_CACHE_DIR  디스크 캐시 폴더 (지정하지 않으면 사용 안 함)
+"""
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+import image_core
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# 색상 수를 바꿀 때 이어 쓸 K-means 상태 수 (원본과 미리보기 축소본, 방법별)
+WARM_STATES = 4
+
+
+def image_digest(img):
+    """이미지 모드, 크기, 픽셀 데이터로 만든 128비트 해시(hex)"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{img.mode}:{img.width}x{img.height}".encode())
+    h.update(img.tobytes())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """메모리 LRU와 선택적 디스크 계층으로 이루어진 결과 캐시 (스레드 안전)"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()  # key -> (labels, palette)
+        self._bytes = 0
+        self._digests = {}  # id(image) -> (weakref, digest)
+        self._warm = OrderedDict()  # (digest, method, options) 키 -> image_core.WarmStart
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        max_mb = int(os.environ.get('IMAGEPROCESSOR_CACHE_MB', DEFAULT_MAX_BYTES // (1024 * 1024)))
+        return cls(max_bytes=max_mb * 1024 * 1024,
+                   disk_dir=os.environ.get('IMAGEPROCESSOR_CACHE_DIR') or None)
+
+    def digest(self, img):
+        """이미지 해시를 계산합니다. 같은 이미지 객체는 한 번만 계산합니다."""
+        key = id(img)
+        with self._lock:
+            entry = self._digests.get(key)
+            if entry is not None and entry[0]() is img:
+                return entry[1]
+        digest = image_digest(img)
+        with self._lock:
+            self._digests[key] = (weakref.ref(img, lambda _, key=key: self._digests.pop(key, None)), digest)
+        return digest
+
+    @staticmethod
+    def make_key(digest, method, color_count, options=None):
+        options = ",".join(f"{k}={v!r}" for k, v in sorted((options or {}).items()))
+        return hashlib.blake2b(f"{digest}|{method}|{color_count}|{options}".encode(),
+                               digest_size=16).hexdigest()
+
+    def warm_start(self, digest, method, options=None):
+        """같은 이미지/방법/옵션에서 색상 수만 바꿀 때 이어 쓸 K-means 상태 (최근 WARM_STATES개만 보관)"""
+        key = self.make_key(digest, method, "*", options)
+        with self._lock:
+            state = self._warm.pop(key, None) or image_core.WarmStart()
+            self._warm[key] = state
+            while len(self._warm) > WARM_STATES:
+                self._warm.popitem(last=False)
+        return state
+
+    def get(self, key):
+        """(labels, palette)를 반환합니다. 없으면 None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            if os.path.exists(path):
+                try:
+                    with np.load(path) as data:
+                        entry = (data['labels'], data['palette'])
+                except (OSError, KeyError, ValueError):
+                    return None
+                self._remember(key, entry)
+                return entry
+        return None
+
+    def put(self, key, labels, palette):
+        entry = (labels, palette)
+        self._remember(key, entry)
+        if self.disk_dir:
+            # 다른 프로세스가 반쯤 쓴 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    np.savez(f, labels=labels, palette=palette)
+                os.replace(tmp_path, path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._warm.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return self._bytes + self._warm_nbytes()
+
+    def _warm_nbytes(self):
+        # 학습 상태는 warm_start()로 넘겨준 뒤에 채워지므로 그때그때 계산
+        return sum(state.nbytes for state in self._warm.values())
+
+    def _remember(self, key, entry):
+        size = entry[0].nbytes + entry[1].nbytes
+        with self._lock:
+            if key in self._entries:
+                old = self._entries.pop(key)
+                self._bytes -= old[0].nbytes + old[1].nbytes
+            # 한도보다 큰 결과는 메모리에 두지 않음 (디스크 캐시만 사용)
+            if size <= self.max_bytes:
+                self._entries[key] = entry
+                self._bytes += size
+            self._evict()
+
+    def _evict(self):
+        """한도를 넘으면 오래된 학습 상태부터, 그다음 오래된 결과부터 버립니다.
+
+        가장 최근 학습 상태는 한도의 절반 이하이면 결과보다 나중에 버립니다.
+        """
+        while True:
+            warm_bytes = self._warm_nbytes()
+            if self._bytes + warm_bytes <= self.max_bytes:
+                break
+            if len(self._warm) > 1 or (self._warm and (not self._entries or warm_bytes > self.max_bytes // 2)):
+                self._warm.popitem(last=False)
+            elif self._entries:
+                _, old = self._entries.popitem(last=False)
+                self._bytes -= old[0].nbytes + old[1].nbytes
+            else:
+                break
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.npz")
@@ -0,0 +1,345 @@
+"""로컬 HTTP 처리 서버
+
+사용법:
+    python ImageProcessor.py serve --port 8765 --workers 4
+
+    curl --data-binary @in.png "http://127.0.0.1:8765/quantize?method=kmeans-fast&colors=16" -o out.png
+    curl --data-binary @in.png "http://127.0.0.1:8765/recolor?rule=255,255,255,255=0,0,0,0&tolerance=8" -o out.png
+
+엔드포인트 (요청 본문은 이미지 파일 바이트, 응답 본문은 처리한 이미지):
+    POST /quantize   method, colors, sample_size, sampling, palette(hex 목록), lab, lut_bits
+    POST /recolor    rule(R,G,B,A=R,G,B,A, 여러 번 가능), tolerance, metric
+                     (/quantize에도 rule을 주면 양자화한 뒤 교체)
+    공통             format(png/gif/webp/tif/jpg/bmp, 기본 png), preset
+    GET  /health     워커 수, 처리 중인 요청 수, 누적 처리/실패/거절 수 (JSON)
+
+요청 스레드는 파라미터 검사와 응답 전송만 하고, 디코딩/양자화/인코딩은 프로세스 풀에서 합니다.
+풀에 올라간 요청(실행 중 + 대기 중)이 --workers + --queue개를 넘으면 기다리게 하지 않고
+바로 503과 Retry-After로 거절합니다. 같은 이미지와 파라미터의 요청이 동시에 들어오면
+하나만 처리하고 결과를 함께 돌려줍니다. 워커마다 결과 캐시(result_cache)를 두므로
+같은 이미지를 다시 보내면 양자화를 건너뛰고 인코딩만 합니다.
+
+응답의 Server-Timing 헤더에 풀 대기 시간(queue), 워커의 단계별 시간, 전체 시간(total)이
+밀리초로 들어 있습니다.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from PIL import Image
+
+import export
+import image_core
+import palettes
+import pipeline
+import timing
+
+warnings.filterwarnings('ignore')
+
+DEFAULT_PORT = 8765
+OUTPUT_FORMATS = ('png', 'gif', 'webp', 'tif', 'jpg', 'bmp')
+
+
+class RequestError(ValueError):
+    """잘못된 요청 (400으로 응답)"""
+
+
+def init_worker(cache_dir, cache_mb, trace_path):
+    """워커 프로세스마다 결과 캐시를 만들고 scikit-learn을 미리 가져옵니다."""
+    pipeline.worker_cache(cache_dir, cache_mb)
+    timing.configure(trace_path=trace_path)
+    image_core.warm_up()
+
+
+def _single(query, name, default=None, convert=str):
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        return convert(values[-1])
+    except ValueError:
+        raise RequestError(f"invalid {name}: {values[-1]!r}") from None
+
+
+def parse_params(endpoint, query, lut_dir=None):
+    """쿼리 문자열(parse_qs 결과)을 워커에 넘길 작업 설정으로 바꿉니다. 잘못되면 RequestError"""
+    fmt = _single(query, 'format', 'png').lower().lstrip('.')
+    if fmt not in OUTPUT_FORMATS:
+        raise RequestError(f"format must be one of {', '.join(OUTPUT_FORMATS)}")
+    preset = _single(query, 'preset', export.DEFAULT_PRESET)
+    if preset not in export.PRESETS:
+        raise RequestError(f"preset must be one of {', '.join(export.PRESETS)}")
+    try:
+        replace = [pipeline.parse_replace(rule) for rule in query.get('rule', [])]
+    except ValueError as e:
+        raise RequestError(str(e)) from None
+    tolerance = _single(query, 'tolerance', 0, int)
+    metric = _single(query, 'metric', "channel")
+    if metric not in ("channel", "euclidean"):
+        raise RequestError("metric must be channel or euclidean")
+
+    method, colors, options = "none", 0, {}
+    if endpoint == "quantize":
+        method = _single(query, 'method', "kmeans-fast")
+        if method not in image_core.METHODS:
+            raise RequestError(f"method must be one of {', '.join(image_core.METHODS)}")
+        colors = _single(query, 'colors', 8, int)
+        if not 2 <= colors <= 256:
+            raise RequestError("colors must be between 2 and 256")
+        if method == "kmeans-fast":
+            options = {'sample_size': _single(query, 'sample_size', image_core.DEFAULT_SAMPLE_SIZE, int),
+                       'sampling': _single(query, 'sampling', "random")}
+            if options['sampling'] not in ("random", "grid"):
+                raise RequestError("sampling must be random or grid")
+        elif method == "palette":
+            spec = _single(query, 'palette')
+            if not spec:
+                raise RequestError("method=palette needs palette=#rrggbb,...")
+            try:
+                # 파일 경로는 받지 않고 hex 목록만 허용
+                fixed_palette = palettes.parse_palette_text(spec)
+            except ValueError as e:
+                raise RequestError(f"invalid palette: {e}") from None
+            lut_bits = _single(query, 'lut_bits', image_core.DEFAULT_LUT_BITS, int)
+            if not 4 <= lut_bits <= 8:
+                raise RequestError("lut_bits must be between 4 and 8")
+            lab = _single(query, 'lab', "0") not in ("0", "false", "")
+            options = {'palette': tuple(fixed_palette), 'space': "lab" if lab else "rgb",
+                       'lut_bits': lut_bits, 'lut_dir': lut_dir}
+    elif not replace:
+        raise RequestError("recolor needs at least one rule=R,G,B,A=R,G,B,A")
+
+    return {'method': method, 'colors': colors, 'options': options, 'replace': replace,
+            'tolerance': tolerance, 'metric': metric, 'ext': '.' + fmt, 'preset': preset}
+
+
+def process_request(data, params, submitted):
+    """워커 프로세스: 이미지 바이트를 처리해 (결과 바이트, 대기 시간, 단계별 시간, 처리 시간)을 반환합니다."""
+    queued = max(0.0, time.time() - submitted)
+    with timing.operation(f"serve:{params['method']}") as record:
+        out = io.BytesIO()
+        pipeline.process_image(io.BytesIO(data), out, params['method'], params['colors'], params['options'],
+                               replace=params['replace'], tolerance=params['tolerance'],
+                               metric=params['metric'], preset=params['preset'], ext=params['ext'],
+                               cache=pipeline.worker_cache())
+    if record is None:
+        return out.getvalue(), queued, [], 0.0
+    return out.getvalue(), queued, record['stages'], record['total']
+
+
+class Dispatcher:
+    """요청을 프로세스 풀에 올리고, 풀에 올라간 요청 수를 capacity로 제한합니다."""
+
+    def __init__(self, workers, queue_size, cache_dir=None, cache_mb=64, trace_path=None):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                            initargs=(cache_dir, cache_mb, trace_path))
+        self.lut_dir = cache_dir
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self._inflight = {}  # 요청 키 -> future (같은 요청 합치기)
+        self.served = 0
+        self.failed = 0
+        self.rejected = 0
+        self.coalesced = 0
+
+    def start(self):
+        """워커 프로세스를 모두 미리 띄웁니다 (첫 요청이 프로세스 시작과 scikit-learn 로드를 기다리지 않도록)."""
+        for future in [self.executor.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    def submit(self, data, params):
+        """(future, 합쳐졌는지)를 반환합니다. 풀이 가득 차면 (None, False)"""
+        key = hashlib.blake2b(data + repr(sorted(params.items())).encode(), digest_size=16).digest()
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, True
+            if not self._slots.acquire(blocking=False):
+                self.rejected += 1
+                return None, False
+            try:
+                future = self.executor.submit(process_request, data, params, time.time())
+            except BaseException:
+                self._slots.release()
+                raise
+            self._inflight[key] = future
+
+        def finished(_future):
+            with self._lock:
+                self._inflight.pop(key, None)
+                # 잘못된 이미지 등으로 실패하거나 종료 중 취소된 작업은 처리 수에 넣지 않음
+                if not _future.cancelled() and _future.exception() is None:
+                    self.served += 1
+                else:
+                    self.failed += 1
+            self._slots.release()
+
+        future.add_done_callback(finished)
+        return future, False
+
+    def status(self):
+        with self._lock:
+            return {'workers': self.workers, 'capacity': self.capacity, 'in_flight': len(self._inflight),
+                    'served': self.served, 'failed': self.failed, 'rejected': self.rejected, 'coalesced': self.coalesced}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def server_timing(queued, stages, processing, total):
+    """Server-Timing 헤더 값 (밀리초)"""
+    entries = [('queue', queued)] + list(stages) + [('process', processing), ('total', total)]
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in entries)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive (응답마다 Content-Length를 보냄)
+    server_version = "ImageProcessor"
+
+    def do_GET(self):
+        if urlsplit(self.path).path != "/health":
+            self._send_error(404, "not found")
+            return
+        self._send(200, json.dumps(self.server.dispatcher.status()).encode(), "application/json")
+
+    def do_POST(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        endpoint = url.path.strip('/')
+        if endpoint not in ("quantize", "recolor"):
+            # 읽지 않은 본문이 다음 요청으로 해석되지 않도록 연결을 닫음
+            self.close_connection = True
+            self._send_error(404, "not found")
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # 본문 길이를 모르면 연결에 남은 바이트를 읽을 수 없으므로 연결도 닫음
+            self.close_connection = True
+            self._send_error(400, "invalid Content-Length")
+            return
+        if length > self.server.max_bytes:
+            self.close_connection = True
+            self._send_error(413, f"image larger than {self.server.max_bytes // (1024 * 1024)} MB")
+            return
+        data = self.rfile.read(length)
+        if not data:
+            self._send_error(400, "request body must be an image file")
+            return
+        try:
+            params = parse_params(endpoint, parse_qs(url.query), self.server.dispatcher.lut_dir)
+        except RequestError as e:
+            self._send_error(400, str(e))
+            return
+
+        future, shared = self.server.dispatcher.submit(data, params)
+        if future is None:
+            self._send_error(503, "server busy", {'Retry-After': "1"})
+            return
+        try:
+            body, queued, stages, processing = future.result(timeout=self.server.timeout_seconds)
+        except FutureTimeout:
+            self._send_error(504, "processing timed out")
+            return
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            self._send_error(400, f"cannot process image: {e}")
+            return
+        except Exception as e:
+            self._send_error(500, f"processing failed: {e}")
+            return
+
+        headers = {'Server-Timing': server_timing(queued, stages, processing, time.perf_counter() - start)}
+        if shared:
+            headers['X-Coalesced'] = "1"
+        self._send(200, body, Image.MIME.get(Image.registered_extensions()[params['ext']],
+                                              "application/octet-stream"), headers)
+
+    def _send_error(self, status, message, headers=None):
+        self._send(status, json.dumps({'error': message}).encode(), "application/json", headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class ProcessingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, dispatcher, max_bytes, timeout_seconds, quiet=False):
+        super().__init__(address, RequestHandler)
+        self.dispatcher = dispatcher
+        self.max_bytes = max_bytes
+        self.timeout_seconds = timeout_seconds
+        self.quiet = quiet
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ImageProcessor.py serve",
+                                     description="Serve quantize/recolor over local HTTP.")
+    parser.add_argument('--host', default="127.0.0.1", help="bind address (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="port (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="process pool size (default: number of cores)")
+    parser.add_argument('--queue', type=int, default=None,
+                        help="requests allowed to wait for a worker before answering 503 "
+                             "(default: 2 x workers)")
+    parser.add_argument('--cache-dir', help="also keep quantization results and palette tables in this directory")
+    parser.add_argument('--cache-mb', type=int, default=64,
+                        help="in-memory result cache per worker in MB (default: %(default)s)")
+    parser.add_argument('--max-mb', type=int, default=100,
+                        help="largest accepted request body in MB (default: %(default)s)")
+    parser.add_argument('--timeout', type=float, default=120,
+                        help="seconds to wait for a result before answering 504 (default: %(default)s)")
+    parser.add_argument('--trace', metavar="JSONL", help="append per-stage timings of every request to this file")
+    parser.add_argument('--quiet', action='store_true', help="do not log each request")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.workers < 1:
+        print("error: --workers must be at least 1", file=sys.stderr)
+        return 2
+    queue_size = args.workers * 2 if args.queue is None else max(0, args.queue)
+    dispatcher = Dispatcher(args.workers, queue_size, args.cache_dir, args.cache_mb, args.trace)
+    try:
+        server = ProcessingServer((args.host, args.port), dispatcher, args.max_mb * 1024 * 1024,
+                                  args.timeout, args.quiet)
+    except OSError as e:
+        dispatcher.shutdown()
+        print(f"error: cannot listen on {args.host}:{args.port}: {e}", file=sys.stderr)
+        return 1
+    dispatcher.start()
+    print(f"Serving on http://{args.host}:{server.server_address[1]} with {args.workers} workers "
+          f"(queue {queue_size})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        dispatcher.shutdown()
+    return 0
@@ -0,0 +1,61 @@
+"""frames.frame_count 테스트: 진짜 애니메이션/같은 크기 페이지만 프레임으로 셈
+
+python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import frames
+
+SIZE = (64, 48)
+
+
+def image(color):
+    return Image.new('RGB', SIZE, color)
+
+
+def count_frames(path):
+    with Image.open(path) as img:
+        count = frames.frame_count(img)
+        assert img.tell() == 0
+        return count
+
+
+@pytest.mark.parametrize('ext', ['.gif', '.png', '.webp'])
+def test_animation_counts_every_frame(tmp_path, ext):
+    path = str(tmp_path / f"anim{ext}")
+    image('red').save(path, save_all=True, append_images=[image('green'), image('blue')], duration=100)
+    assert count_frames(path) == 3
+
+
+def test_single_image_is_one_frame(tmp_path):
+    path = str(tmp_path / "still.png")
+    image('red').save(path)
+    assert count_frames(path) == 1
+
+
+def test_tiff_pages_of_same_size_are_frames(tmp_path):
+    path = str(tmp_path / "pages.tif")
+    image('red').save(path, save_all=True, append_images=[image('green'), image('blue')])
+    assert count_frames(path) == 3
+
+
+def test_pyramid_tiff_is_one_frame(tmp_path):
+    path = str(tmp_path / "pyramid.tif")
+    full = image('red')
+    full.save(path, save_all=True, append_images=[full.resize((32, 24)), full.resize((16, 12))])
+    assert count_frames(path) == 1
+
+
+def test_mpo_preview_is_not_a_frame(tmp_path):
+    path = str(tmp_path / "camera.jpg")
+    full = image('red')
+    full.save(path, format='MPO', save_all=True, append_images=[full.resize((16, 12))])
+    with Image.open(path) as img:
+        assert img.format == 'MPO' and img.n_frames == 2
+    assert count_frames(path) == 1
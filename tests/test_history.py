@@ -0,0 +1,187 @@
+"""history.py 테스트: RecolorStep 합성, 기준 상태로 접어 넣기, 실행 취소
+
+python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import history
+
+SIZE = (37, 23)  # 픽셀 수가 8의 배수가 아니도록 (비트마스크 끝 처리)
+
+
+def make_image(seed=0):
+    rng = np.random.default_rng(seed)
+    palette = rng.integers(0, 256, (6, 4), dtype=np.uint8)
+    palette[:, 3] = 255
+    return Image.fromarray(palette[rng.integers(0, len(palette), SIZE[::-1])], 'RGBA')
+
+
+def paint(img, mask, color):
+    """mask(h, w bool)인 픽셀을 color로 칠한 새 이미지"""
+    rgba = np.array(img)
+    rgba[mask] = color
+    return Image.fromarray(rgba, 'RGBA')
+
+
+def random_mask(seed, density=0.3):
+    return np.random.default_rng(seed).random(SIZE[::-1]) < density
+
+
+def assert_same(a, b):
+    np.testing.assert_array_equal(np.asarray(a.convert('RGBA')), np.asarray(b.convert('RGBA')))
+
+
+def changed_count(step):
+    return int(np.unpackbits(step.mask_bits, count=step.pixel_count).sum())
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_then_matches_applying_both_steps(seed):
+    # 앞 단계만, 뒤 단계만, 둘 다 바꾼 픽셀이 섞이도록 겹치는 무작위 마스크를 사용
+    a = make_image(seed)
+    b = paint(a, random_mask(seed + 100), (255, 0, 0, 255))
+    c = paint(b, random_mask(seed + 200), (0, 0, 255, 128))
+    combined = history.RecolorStep.between(a, b).then(history.RecolorStep.between(b, c))
+
+    assert_same(combined.redo(a), c)
+    assert_same(combined.undo(c), a)
+    direct = history.RecolorStep.between(a, c)
+    np.testing.assert_array_equal(combined.mask_bits, direct.mask_bits)
+    np.testing.assert_array_equal(combined.pairs, direct.pairs)
+    np.testing.assert_array_equal(combined.index, direct.index)
+
+
+def test_then_uses_each_steps_own_pixels():
+    # 뒤 단계만 바꾼 픽셀의 이전 색은 뒤 단계 표에서, 앞 단계만 바꾼 픽셀의 새 색은 앞 단계 표에서 와야 함
+    a = Image.new('RGBA', SIZE, (10, 20, 30, 255))
+    first = np.zeros(SIZE[::-1], dtype=bool)
+    first[:, ::3] = True
+    second = np.zeros(SIZE[::-1], dtype=bool)
+    second[::2, :] = True
+    b = paint(a, first, (1, 1, 1, 255))
+    c = paint(b, second, (2, 2, 2, 255))
+    combined = history.RecolorStep.between(a, b).then(history.RecolorStep.between(b, c))
+
+    assert changed_count(combined) == int((first | second).sum())
+    assert_same(combined.redo(a), c)
+    assert_same(combined.undo(c), a)
+
+
+def test_then_drops_pixels_back_to_original_color():
+    a = make_image(1)
+    mask = random_mask(7, density=0.5)
+    back = mask & random_mask(8, density=0.5)
+    b = paint(a, mask, (255, 255, 255, 255))
+    c = Image.fromarray(np.where(back[..., None], np.asarray(a), np.asarray(b)), 'RGBA')
+    combined = history.RecolorStep.between(a, b).then(history.RecolorStep.between(b, c))
+
+    assert changed_count(combined) == int((mask & ~back).sum())
+    assert_same(combined.redo(a), c)
+    assert_same(combined.undo(c), a)
+
+    # 전부 되돌아오면 빈 단계
+    empty = history.RecolorStep.between(a, b).then(history.RecolorStep.between(b, a))
+    assert changed_count(empty) == 0
+    assert len(empty.pairs) == 0
+    assert_same(empty.redo(a), a)
+
+
+def record_edits(hist, original, edits):
+    """edits를 차례로 적용하며 기록하고, 적용 전후의 모든 상태 목록을 반환합니다."""
+    states = [original]
+    current = original
+    for edit in edits:
+        if isinstance(edit, tuple):
+            method, colors = edit
+            step = history.QuantizeStep.compute(original, method, colors)
+            current = step.image(original)
+        else:
+            result = edit(current)
+            step = history.RecolorStep.between(current, result)
+            current = result
+        hist.push(step)
+        states.append(current)
+    return states
+
+
+EDITS = [
+    lambda img: paint(img, random_mask(1), (255, 0, 0, 255)),
+    lambda img: paint(img, random_mask(2), (0, 255, 0, 255)),
+    ('quantize', 4),
+    lambda img: paint(img, random_mask(3), (0, 0, 255, 255)),
+    lambda img: paint(img, random_mask(4), (255, 255, 0, 255)),
+    ('threshold', 2),
+    lambda img: paint(img, random_mask(5), (0, 255, 255, 255)),
+    lambda img: paint(img, random_mask(6), (255, 0, 255, 255)),
+]
+
+
+@pytest.mark.parametrize('keep', range(1, len(EDITS) + 1))
+def test_state_after_eviction_matches_real_edits(keep):
+    original = make_image(3)
+    hist = history.History()
+    hist.reset(original)
+    states = record_edits(hist, original, EDITS)
+
+    # 남은 단계가 keep개 이하가 될 때까지 접어 넣음 (QuantizeStep을 지나치는 경우 포함).
+    # 합친 기준 단계가 커지면 한 번에 여러 단계가 접힐 수 있음
+    while len(hist.steps) > keep:
+        hist.max_bytes = hist.nbytes - 1
+        hist._evict()
+    hist.max_bytes = history.DEFAULT_MAX_BYTES
+    evicted = len(EDITS) - len(hist.steps)
+
+    assert hist.position == len(hist.steps)
+    for count in range(len(hist.steps) + 1):
+        assert_same(hist.state(count), states[evicted + count])
+
+
+@pytest.mark.parametrize('max_bytes', [0, 2000, 10 ** 9])
+def test_undo_redo_walk_matches_real_edits(max_bytes):
+    original = make_image(4)
+    hist = history.History(max_bytes=max_bytes)
+    hist.reset(original)
+    states = record_edits(hist, original, EDITS)
+    evicted = len(EDITS) - len(hist.steps)
+    assert max_bytes > 10 ** 6 or evicted > 0
+
+    current = states[-1]
+    while hist.can_undo:
+        current = hist.undo(current)
+        assert_same(current, states[evicted + hist.position])
+    assert hist.position == 0
+    while hist.can_redo:
+        current = hist.redo(current)
+        assert_same(current, states[evicted + hist.position])
+
+
+def test_undo_to_original_returns_original_object():
+    original = make_image(5)
+    hist = history.History()
+    hist.reset(original)
+    states = record_edits(hist, original, EDITS[:3])
+    current = states[-1]
+    while hist.can_undo:
+        current = hist.undo(current)
+    assert current is original
+
+
+def test_push_discards_redo_steps():
+    original = make_image(6)
+    hist = history.History()
+    hist.reset(original)
+    states = record_edits(hist, original, EDITS[:2])
+    current = hist.undo(states[-1])
+    branch = paint(current, random_mask(9), (9, 9, 9, 255))
+    hist.push(history.RecolorStep.between(current, branch))
+
+    assert len(hist.steps) == 2
+    assert not hist.can_redo
+    assert_same(hist.state(2), branch)
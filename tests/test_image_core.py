@@ -0,0 +1,29 @@
+"""image_core 테스트: 색상 수보다 픽셀/색이 적은 이미지의 양자화
+
+python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import image_core
+
+
+@pytest.mark.parametrize('method', ["kmeans", "kmeans-fast"])
+def test_fewer_pixels_than_colors_keeps_every_color(method):
+    img_array = np.random.default_rng(0).integers(0, 256, (10, 10, 3), dtype=np.uint8)
+    labels, palette = image_core.INDEXED_METHODS[method](img_array, 200)
+    assert len(palette) == 100
+    np.testing.assert_array_equal(palette.astype(np.uint8)[labels], img_array)
+
+
+def test_kmeans_fast_warm_start_with_few_colors():
+    img_array = np.random.default_rng(1).integers(0, 256, (10, 10, 3), dtype=np.uint8)
+    warm = image_core.WarmStart()
+    for color_count in (200, 50, 300, 8):
+        _, palette = image_core.kmeans_fast_indexed(img_array, color_count, warm=warm)
+        assert len(palette) == min(color_count, 100)
@@ -0,0 +1,141 @@
+"""메모리보다 큰 이미지를 위한 타일(띠) 단위 처리
+
+전체 이미지를 RGBA로 펼치지 않고 가로 띠(tile_rows 줄) 단위로 처리합니다.
+
+1. 첫 번째 패스: 띠마다 격자 간격으로 픽셀을 뽑아 작은 표본 이미지를 만들고
+   그 표본으로 팔레트를 학습합니다.
+2. 두 번째 패스: 띠마다 가장 가까운 팔레트 색을 찾아 디스크의 메모리 맵
+   버퍼(np.memmap)에 씁니다.
+3. 메모리 맵 버퍼를 복사 없이 PIL 이미지로 감싸서 저장합니다. 인코더는 버퍼를
+   줄 단위로 읽으므로 결과 전체가 메모리에 올라오지 않습니다.
+
+작업 메모리는 띠 크기에 비례합니다. 단, 압축된 형식(PNG, JPEG 등)의 원본은
+PIL이 한 번에 디코딩하므로 원본 모드 그대로(RGB면 픽셀당 3바이트)는 메모리에
+올라옵니다. 비압축 형식은 PIL이 파일을 메모리 맵으로 엽니다.
+"""
+import os
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+import export
+import image_core
+import timing
+
+DEFAULT_TILE_ROWS = 512
+
+
+def _open_large(src_path):
+    """큰 이미지도 열 수 있도록 디컴프레션 폭탄 검사를 끄고 엽니다."""
+    limit = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+    try:
+        return Image.open(src_path)
+    finally:
+        Image.MAX_IMAGE_PIXELS = limit
+
+
+def iter_bands(img, tile_rows, mode):
+    """(y, 띠 배열)을 위에서부터 차례로 반환합니다."""
+    for y in range(0, img.height, tile_rows):
+        band = img.crop((0, y, img.width, min(y + tile_rows, img.height)))
+        yield y, np.asarray(band.convert(mode))
+
+
+def has_alpha(img):
+    return img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+
+
+def sample_image(img, sample_size, tile_rows=DEFAULT_TILE_ROWS):
+    """띠 단위로 읽으면서 격자 간격 표본(작은 RGB 배열)을 만듭니다."""
+    stride = max(1, int(np.sqrt(img.width * img.height / sample_size)))
+    # 띠 경계에서 격자가 어긋나지 않도록 띠 높이를 stride의 배수로 맞춤
+    rows = max(stride, tile_rows // stride * stride)
+    rows_out = []
+    for _, band in iter_bands(img, rows, 'RGB'):
+        rows_out.append(band[::stride, ::stride])
+    return np.concatenate(rows_out, axis=0)
+
+
+def quantize_file_tiled(src_path, dst_path, method, color_count, tile_rows=DEFAULT_TILE_ROWS,
+                        sample_size=image_core.DEFAULT_SAMPLE_SIZE, replace=(), tolerance=0,
+                        metric="channel", preset=export.DEFAULT_PRESET, progress=None, **options):
+    """src_path를 띠 단위로 양자화해 dst_path에 저장하고 (width, height)를 반환합니다.
+
+    replace는 양자화 뒤 띠마다 적용할 (target_color, new_color) 규칙 목록입니다.
+    method가 "none"이면 색상 교체만 합니다. preset은 export.PRESETS의 인코딩 프리셋입니다.
+    """
+    if method != "none" and method not in image_core.METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    report = progress or image_core._no_progress
+
+    with timing.span("decode"):
+        img = _open_large(src_path)
+        img.load()
+    width, height = img.size
+    alpha = has_alpha(img)
+
+    # 1. 표본으로 팔레트 학습 (팔레트를 만드는 방법만)
+    palette = None
+    if method == "palette":
+        # 고정 팔레트는 학습할 필요가 없음
+        palette = np.array(options['palette'], dtype=np.uint8).reshape(-1, 3)
+    elif method in image_core.INDEXED_METHODS:
+        report(0.0, "Sampling")
+        with timing.span("sample"):
+            sample = sample_image(img, sample_size, tile_rows)
+        report(0.1, f"Fitting {method} palette")
+        with timing.span("fit"):
+            palette = image_core.fit_sample_palette(sample, method, color_count, **options)
+
+    # 알파도 교체 규칙도 없으면 1바이트 팔레트 인덱스(P)로, 아니면 RGBA로 출력
+    # (PIL은 P/RGBA 버퍼만 복사 없이 감쌀 수 있어 RGB 출력도 RGBA로 씀)
+    indexed_output = palette is not None and not alpha and not replace
+    out_mode = 'P' if indexed_output else 'RGBA'
+
+    out_dir = os.path.dirname(os.path.abspath(dst_path))
+    os.makedirs(out_dir, exist_ok=True)
+    fd, buffer_path = tempfile.mkstemp(suffix='.buf', dir=out_dir)
+    os.close(fd)
+    out = result = None
+    try:
+        shape = (height, width) if indexed_output else (height, width, 4)
+        out = np.memmap(buffer_path, dtype=np.uint8, mode='w+', shape=shape)
+
+        # 2. 띠 단위로 양자화/색상 교체
+        with timing.span("bands"):
+            for y, band in iter_bands(img, tile_rows, 'RGB' if indexed_output else 'RGBA'):
+                report(0.2 + 0.7 * y / height, f"Processing rows {y}-{y + len(band)}")
+                rgb = band[..., :3]
+                if palette is not None:
+                    if method == "palette":
+                        labels = image_core.palette_indexed(rgb, color_count, **options)[0]
+                    else:
+                        labels = image_core.assign_nearest(rgb.reshape(-1, 3), palette).reshape(rgb.shape[:2])
+                    if indexed_output:
+                        out[y:y + len(band)] = labels
+                        continue
+                    processed = palette[labels]
+                elif method == "threshold":
+                    processed = image_core.process_with_threshold(rgb, color_count)
+                else:
+                    processed = rgb
+
+                tile = np.dstack((processed, band[..., 3]))
+                image_core.remap_rgba(tile, replace, tolerance, metric)
+                out[y:y + len(band)] = tile
+            out.flush()
+
+        # 3. 메모리 맵 버퍼를 그대로 감싸서 인코딩
+        report(0.9, "Encoding")
+        result = Image.frombuffer(out_mode, (width, height), out, 'raw', out_mode, 0, 1)
+        if indexed_output:
+            result.putpalette(palette.tobytes())
+        # RGBA 결과를 팔레트로 바꾸려면 전체를 메모리에 올려야 하므로 그대로 저장
+        export.save_image(result, dst_path, preset, indexed=False)
+    finally:
+        # 매핑을 먼저 해제해야 (Windows에서도) 임시 파일을 지울 수 있음
+        out = result = None
+        os.remove(buffer_path)
+    return width, height
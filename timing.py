@@ -0,0 +1,154 @@
+"""단계별 시간 측정 (가벼운 계측 계층)
+
+처리 단계를 이름 붙은 구간(span)으로 감싸고, 한 번의 작업(operation)에 속한
+구간들을 모아 요약합니다.
+
+    with timing.operation("process:kmeans") as op:
+        with timing.span("kmeans.fit"):
+            ...
+    print(timing.format_summary(op))
+
+최근 구간 기록은 고정 크기 링 버퍼에 남습니다. 측정을 끄면 span()과 operation()이
+미리 만들어 둔 빈 컨텍스트를 돌려주므로 비용이 거의 없습니다.
+
+환경 변수:
+    IMAGEPROCESSOR_TIMING=0       측정 끄기
+    IMAGEPROCESSOR_TRACE=path     작업마다 단계별 시간을 JSON 한 줄로 path에 추가
+    IMAGEPROCESSOR_PROFILE=path   다음 작업 하나를 cProfile로 실행해 path에 저장
+"""
+import datetime
+import json
+import os
+import threading
+import time
+from collections import deque
+
+RING_SIZE = 256
+
+enabled = os.environ.get('IMAGEPROCESSOR_TIMING', '1') != '0'
+_trace_path = os.environ.get('IMAGEPROCESSOR_TRACE') or None
+_profile_path = os.environ.get('IMAGEPROCESSOR_PROFILE') or None
+
+_recent = deque(maxlen=RING_SIZE)  # (operation, stage, seconds)
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def configure(enable=None, trace_path=None, profile_path=None):
+    """환경 변수 대신 코드에서 설정합니다 (예: 배치 워커 초기화)."""
+    global enabled, _trace_path, _profile_path
+    if enable is not None:
+        enabled = enable
+    if trace_path:
+        _trace_path = trace_path
+    if profile_path:
+        _profile_path = profile_path
+
+
+class _NullContext:
+    seconds = 0.0
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullContext()
+
+
+class _Span:
+    __slots__ = ('name', 'start', 'seconds')
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.start
+        op = getattr(_local, 'operation', None)
+        if op is not None:
+            op['stages'].append((self.name, self.seconds))
+        _recent.append((op['name'] if op is not None else None, self.name, self.seconds))
+        return False
+
+
+def span(name):
+    """이름 붙은 구간. 현재 스레드에 진행 중인 작업이 있으면 그 작업에 기록됩니다."""
+    if not enabled:
+        return _NULL
+    return _Span(name)
+
+
+class _Operation:
+    def __init__(self, name):
+        self.record = {'name': name, 'stages': [], 'total': 0.0}
+        self.profiler = None
+
+    def __enter__(self):
+        global _profile_path
+        self.parent = getattr(_local, 'operation', None)
+        _local.operation = self.record
+        with _lock:
+            profile_path, _profile_path = _profile_path, None
+        if profile_path:
+            import cProfile
+            self.profile_path = profile_path
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.start = time.perf_counter()
+        return self.record
+
+    def __exit__(self, *exc):
+        self.record['total'] = time.perf_counter() - self.start
+        _local.operation = self.parent
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profile_path)
+        if _trace_path:
+            _write_trace(self.record)
+        return False
+
+
+def operation(name):
+    """작업 하나를 감싸서 그 안의 구간들을 모읍니다. with 문은 기록(dict)을 반환합니다."""
+    if not enabled and not _profile_path:
+        return _NULL
+    return _Operation(name)
+
+
+def _write_trace(record):
+    line = json.dumps({
+        'time': datetime.datetime.now().isoformat(timespec='milliseconds'),
+        'pid': os.getpid(),
+        'operation': record['name'],
+        'total': round(record['total'], 6),
+        'stages': [{'name': name, 'seconds': round(seconds, 6)} for name, seconds in record['stages']],
+    })
+    with _lock:
+        with open(_trace_path, 'a') as f:
+            f.write(line + '\n')
+
+
+def recent():
+    """최근 구간 기록 (operation, stage, seconds) 목록 (오래된 것부터)"""
+    return list(_recent)
+
+
+def _format_seconds(seconds):
+    return f"{seconds * 1000:.0f} ms" if seconds < 1 else f"{seconds:.2f} s"
+
+
+def format_summary(record, extra=()):
+    """작업 기록을 상태 표시줄용 한 줄 문자열로 만듭니다. extra는 추가 (이름, 초) 목록."""
+    if not record:
+        return ""
+    stages = list(record['stages']) + list(extra)
+    parts = [f"{name} {_format_seconds(seconds)}" for name, seconds in stages]
+    total = record['total'] + sum(seconds for _, seconds in extra)
+    return " · ".join(parts) + f" (total {_format_seconds(total)})"